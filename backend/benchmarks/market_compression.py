@@ -0,0 +1,131 @@
+"""
+Scan time and size of a long daily range over uncompressed and compressed `market_data` chunks, against the
+configured database.
+
+    python -m benchmarks.market_compression --days 1095 --repeat 5
+
+Writes synthetic hourly bars under a throwaway ticker, runs the daily rollup query over the whole range on
+row storage, compresses the chunks it landed in and runs it again. The chunks are decompressed and the
+bars deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import datetime
+import statistics
+import time
+import typing
+
+import loguru
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, async_sessionmaker
+
+from src.models.db.market import MarketBar
+from src.repository.crud.market import MarketDataCRUDRepository
+from src.repository.database import async_db
+from src.repository.timescale import MARKET_DATA_TABLE, enable_market_data_compression
+
+BENCHMARK_TICKER = "ZZBENCH"
+START = datetime.datetime(2000, 1, 3, tzinfo=datetime.timezone.utc)
+BENCHMARK_SYMBOL_ID = "(SELECT id FROM symbols WHERE ticker = :ticker)"
+
+DAILY_SCAN_QUERY = text(f"""
+    SELECT
+        time_bucket(INTERVAL '1 day', timestamp) AS bucket,
+        first(open_price, timestamp) AS open_price,
+        max(high_price) AS high_price,
+        min(low_price) AS low_price,
+        last(close_price, timestamp) AS close_price,
+        sum(volume) AS volume
+    FROM {MARKET_DATA_TABLE}
+    WHERE symbol_id = {BENCHMARK_SYMBOL_ID} AND timestamp >= :start AND timestamp < :end
+    GROUP BY 1
+    ORDER BY 1
+""")
+# Only the chunks the synthetic range landed in, so real data is never touched
+RANGE_CHUNKS = (
+    f"show_chunks('{MARKET_DATA_TABLE}', "
+    "newer_than => CAST(:start AS TIMESTAMPTZ), older_than => CAST(:end AS TIMESTAMPTZ))"
+)
+
+
+def generate_market_bars(days: int) -> typing.List[MarketBar]:
+    return [
+        (BENCHMARK_TICKER, START + datetime.timedelta(hours=i), 100.0 + i % 50, 101.0 + i % 50, 99.0 + i % 50,
+         100.5 + i % 50, 1000 + i % 997)
+        for i in range(days * 24)
+    ]
+
+
+async def scan(connection: AsyncConnection, end: datetime.datetime, repeat: int) -> tuple[int, float]:
+    timings, rows = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await connection.execute(DAILY_SCAN_QUERY, {"ticker": BENCHMARK_TICKER, "start": START, "end": end})
+        rows = len(result.fetchall())
+        timings.append(time.perf_counter() - started)
+    return rows, statistics.median(timings)
+
+
+async def compression_sizes(connection: AsyncConnection, end: datetime.datetime) -> tuple[int, int]:
+    """
+    Total bytes of the range's chunks before and after compression.
+    """
+    result = await connection.execute(
+        text(f"""
+            SELECT coalesce(sum(before_compression_total_bytes), 0), coalesce(sum(after_compression_total_bytes), 0)
+            FROM chunk_compression_stats('{MARKET_DATA_TABLE}')
+            WHERE compression_status = 'Compressed'
+            AND chunk_schema || '.' || chunk_name IN (SELECT CAST(chunk AS TEXT) FROM {RANGE_CHUNKS} AS chunk)
+        """),
+        {"start": START, "end": end},
+    )
+    before, after = result.one()
+    return int(before), int(after)
+
+
+async def main(days: int, repeat: int) -> None:
+    session_factory = async_sessionmaker(async_db.async_engine, expire_on_commit=False)
+    end = START + datetime.timedelta(days=days)
+
+    async with session_factory() as session:
+        written = await MarketDataCRUDRepository(session).copy_market_bars(generate_market_bars(days=days))
+
+    try:
+        async with async_db.async_engine.connect() as connection:
+            connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            await connection.execute(text(f"ANALYZE {MARKET_DATA_TABLE}"))
+            rows, uncompressed = await scan(connection, end=end, repeat=repeat)
+
+            await enable_market_data_compression(connection=connection)
+            await connection.execute(
+                text(f"SELECT compress_chunk(chunk, if_not_compressed => TRUE) FROM {RANGE_CHUNKS} AS chunk"),
+                {"start": START, "end": end},
+            )
+            _, compressed = await scan(connection, end=end, repeat=repeat)
+            uncompressed_bytes, compressed_bytes = await compression_sizes(connection, end=end)
+    finally:
+        async with async_db.async_engine.begin() as connection:
+            await connection.execute(
+                text(f"SELECT decompress_chunk(chunk, if_compressed => TRUE) FROM {RANGE_CHUNKS} AS chunk"),
+                {"start": START, "end": end},
+            )
+            await connection.execute(
+                text(f"DELETE FROM {MARKET_DATA_TABLE} WHERE symbol_id = {BENCHMARK_SYMBOL_ID}"),
+                {"ticker": BENCHMARK_TICKER},
+            )
+        await async_db.async_engine.dispose()
+
+    loguru.logger.info(f"{written} hourly bars over {days} days, daily scan returns {rows} rows (median of {repeat})")
+    loguru.logger.info(f"{'uncompressed':<14} {uncompressed * 1000:10.2f} ms {uncompressed_bytes / 2**20:10.2f} MiB")
+    loguru.logger.info(f"{'compressed':<14} {compressed * 1000:10.2f} ms {compressed_bytes / 2**20:10.2f} MiB")
+    size_ratio = uncompressed_bytes / max(compressed_bytes, 1)
+    loguru.logger.info(f"scan speedup {uncompressed / compressed:.2f}x, size ratio {size_ratio:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=1095)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(days=args.days, repeat=args.repeat))
@@ -0,0 +1,90 @@
+"""
+Rows/sec of the three `market_data` write paths against the configured database.
+
+    python -m benchmarks.market_ingest --rows 50000
+
+Every run writes synthetic bars under a throwaway ticker and deletes them afterwards.
+"""
+
+import argparse
+import asyncio
+import datetime
+import time
+import typing
+
+import loguru
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.models.db.market import MarketBar, MarketData
+from src.repository.crud.market import MarketDataCRUDRepository
+from src.repository.database import async_db
+from src.repository.symbols import symbol_cache
+
+BENCHMARK_TICKER = "ZZBENCH"
+
+
+def generate_market_bars(rows: int) -> typing.List[MarketBar]:
+    start = datetime.datetime(2000, 1, 3, tzinfo=datetime.timezone.utc)
+    return [
+        (BENCHMARK_TICKER, start + datetime.timedelta(minutes=i), 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 1000 + i)
+        for i in range(rows)
+    ]
+
+
+async def run_orm_bulk(repo: MarketDataCRUDRepository, market_bars: typing.List[MarketBar]) -> int:
+    symbol_ids = await symbol_cache.get_ids(repo.async_session, [BENCHMARK_TICKER], create=True)
+    market_data_list = [
+        MarketData(
+            symbol_id=symbol_ids[ticker],
+            timestamp=timestamp,
+            open_price=open_price,
+            high_price=high_price,
+            low_price=low_price,
+            close_price=close_price,
+            volume=volume,
+        )
+        for ticker, timestamp, open_price, high_price, low_price, close_price, volume in market_bars
+    ]
+    return len(await repo.create_market_data_bulk(market_data_list))
+
+
+async def run_multi_row_insert(repo: MarketDataCRUDRepository, market_bars: typing.List[MarketBar]) -> int:
+    return await repo.insert_market_bars(market_bars)
+
+
+async def run_copy(repo: MarketDataCRUDRepository, market_bars: typing.List[MarketBar]) -> int:
+    return await repo.copy_market_bars(market_bars)
+
+
+WRITE_PATHS: typing.Dict[str, typing.Callable[..., typing.Awaitable[int]]] = {
+    "orm_bulk (before)": run_orm_bulk,
+    "multi_row_insert": run_multi_row_insert,
+    "copy": run_copy,
+}
+
+
+async def main(rows: int) -> None:
+    session_factory = async_sessionmaker(async_db.async_engine, expire_on_commit=False)
+    market_bars = generate_market_bars(rows=rows)
+
+    for name, write_path in WRITE_PATHS.items():
+        async with session_factory() as session:
+            repo = MarketDataCRUDRepository(session)
+            started = time.perf_counter()
+            written = await write_path(repo, market_bars)
+            elapsed = time.perf_counter() - started
+
+            symbol_id = await symbol_cache.get_id(session, BENCHMARK_TICKER)
+            await session.execute(delete(MarketData).where(MarketData.symbol_id == symbol_id))
+            await session.commit()
+
+        loguru.logger.info(f"{name:<20} {written:>8} rows in {elapsed:8.3f}s -> {written / elapsed:>12,.0f} rows/sec")
+
+    await async_db.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    asyncio.run(main(rows=parser.parse_args().rows))
@@ -0,0 +1,147 @@
+"""
+Bytes per bar, heap and each index, of the old row-per-ticker `market_data` layout against the compact
+`(symbol_id, timestamp)` one, against the configured database.
+
+    python -m benchmarks.market_storage --tickers 500 --days 2
+
+Builds both layouts as throwaway hypertables with the chunking and indexes of the migrations, fills them with
+the same synthetic minute bars and drops them afterwards. Compression is left off, so the numbers are those of
+the row storage recent chunks live in.
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import typing
+
+import loguru
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.repository.database import async_db
+
+BAR_COLUMNS = "timestamp, open_price, high_price, low_price, close_price, volume"
+
+
+@dataclasses.dataclass(frozen=True)
+class Layout:
+    table: str
+    columns: str
+    # Index name -> indexed columns
+    indexes: typing.Dict[str, str]
+    key_column: str
+    # Key of the synthetic ticker number `n`
+    key_value: str
+
+
+LAYOUTS: typing.Dict[str, Layout] = {
+    "before": Layout(
+        table="storage_bench_wide",
+        columns="""
+            id SERIAL NOT NULL,
+            ticker VARCHAR(10) NOT NULL,
+            timestamp TIMESTAMPTZ NOT NULL,
+            open_price DOUBLE PRECISION NOT NULL,
+            high_price DOUBLE PRECISION NOT NULL,
+            low_price DOUBLE PRECISION NOT NULL,
+            close_price DOUBLE PRECISION NOT NULL,
+            volume BIGINT NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        """,
+        indexes={
+            "storage_bench_wide_pkey": "id, timestamp",
+            "storage_bench_wide_ticker_timestamp": "ticker, timestamp",
+            "storage_bench_wide_timestamp": "timestamp DESC",
+        },
+        key_column="ticker",
+        key_value="'T' || lpad(CAST(n AS TEXT), 4, '0')",
+    ),
+    "after": Layout(
+        table="storage_bench_compact",
+        columns="""
+            symbol_id INTEGER NOT NULL,
+            timestamp TIMESTAMPTZ NOT NULL,
+            open_price DOUBLE PRECISION NOT NULL,
+            high_price DOUBLE PRECISION NOT NULL,
+            low_price DOUBLE PRECISION NOT NULL,
+            close_price DOUBLE PRECISION NOT NULL,
+            volume BIGINT NOT NULL
+        """,
+        indexes={
+            "storage_bench_compact_pkey": "symbol_id, timestamp",
+            "storage_bench_compact_timestamp": "timestamp DESC",
+        },
+        key_column="symbol_id",
+        key_value="n",
+    ),
+}
+
+
+async def build(connection: AsyncConnection, layout: Layout, tickers: int, days: int) -> None:
+    await connection.execute(text(f"CREATE TABLE {layout.table} ({layout.columns})"))
+    await connection.execute(
+        text(
+            f"""
+            SELECT create_hypertable(
+                '{layout.table}', 'timestamp', chunk_time_interval => INTERVAL '1 day', create_default_indexes => FALSE
+            )
+            """
+        )
+    )
+    for name, columns in layout.indexes.items():
+        await connection.execute(text(f"CREATE INDEX {name} ON {layout.table} ({columns})"))
+    # Bars are written in time order, every ticker per minute, like the ingester does
+    await connection.execute(
+        text(
+            f"""
+            INSERT INTO {layout.table} ({layout.key_column}, {BAR_COLUMNS})
+            SELECT {layout.key_value}, timestamp, 100.0 + n, 101.0 + n, 99.0 + n, 100.5 + n, 1000 + n
+            FROM generate_series(
+                TIMESTAMPTZ '2000-01-03', TIMESTAMPTZ '2000-01-03' + :days * INTERVAL '1 day' - INTERVAL '1 minute',
+                INTERVAL '1 minute'
+            ) AS timestamp
+            CROSS JOIN generate_series(1, :tickers) AS n
+            ORDER BY timestamp, n
+            """
+        ),
+        {"days": days, "tickers": tickers},
+    )
+    await connection.execute(text(f"VACUUM ANALYZE {layout.table}"))
+
+
+async def measure(connection: AsyncConnection, layout: Layout) -> typing.Dict[str, int]:
+    result = await connection.execute(text(f"SELECT table_bytes FROM hypertable_detailed_size('{layout.table}')"))
+    sizes = {"heap": result.scalar_one()}
+    for name in layout.indexes:
+        result = await connection.execute(text(f"SELECT hypertable_index_size('{name}')"))
+        sizes[name.removeprefix(f"{layout.table}_")] = result.scalar_one()
+    return sizes
+
+
+async def main(tickers: int, days: int) -> None:
+    rows = tickers * days * 24 * 60
+    try:
+        async with async_db.async_engine.connect() as connection:
+            connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            for name, layout in LAYOUTS.items():
+                await build(connection, layout=layout, tickers=tickers, days=days)
+                sizes = await measure(connection, layout=layout)
+
+                loguru.logger.info(f"{name} --- {layout.table}, {rows} bars")
+                for part, size in sizes.items():
+                    loguru.logger.info(f"    {part:<20} {size / 2**20:10.2f} MiB {size / rows:8.1f} bytes/bar")
+                total = sum(sizes.values())
+                loguru.logger.info(f"    {'total':<20} {total / 2**20:10.2f} MiB {total / rows:8.1f} bytes/bar")
+    finally:
+        async with async_db.async_engine.begin() as connection:
+            for layout in LAYOUTS.values():
+                await connection.execute(text(f"DROP TABLE IF EXISTS {layout.table}"))
+        await async_db.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--days", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(main(tickers=args.tickers, days=args.days))
@@ -14,4 +14,10 @@ done
 
 echo "DB Connection --- Successfully Established!"
 
+echo "DB Migrations --- Upgrading . . ."
+
+alembic upgrade head || exit 1
+
+echo "DB Migrations --- Successfully Upgraded!"
+
 exec "$@"
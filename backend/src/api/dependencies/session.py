@@ -1,6 +1,7 @@
 import typing
 
 from fastapi import Request
+from starlette.requests import HTTPConnection
 from sqlalchemy.ext.asyncio import (
     async_sessionmaker as sqlalchemy_async_sessionmaker,
     AsyncSession as SQLAlchemyAsyncSession,
@@ -9,19 +10,37 @@ from sqlalchemy.ext.asyncio import (
 
 from src.repository.database import async_db
 
+from src.repository.market_broadcast import MarketBroadcaster
 from src.repository.redis import RedisClient
+from src.repository.single_flight import SingleFlight
 
 
 async def get_async_session() -> typing.AsyncGenerator[SQLAlchemyAsyncSession, None]:
-    async_session = async_db.async_session
-    try:
-        yield async_session
-    except Exception as e:
-        await async_session.rollback()
-        raise e
-    finally:
-        await async_session.close()
+    # A session, and so a pooled connection, per request: concurrent requests run on separate connections
+    # instead of queueing on one shared session. Work the handler left pending is committed once it
+    # returns and rolled back if it raises; closing the session hands the connection back to the pool.
+    async with async_db.async_session_factory() as async_session:
+        try:
+            yield async_session
+            await async_session.commit()
+        except Exception as e:
+            await async_session.rollback()
+            raise e
+
+
+def get_async_session_factory() -> sqlalchemy_async_sessionmaker[SQLAlchemyAsyncSession]:
+    # For responses that outlive the request handler (e.g. streaming), which open and close their own session
+    return async_db.async_session_factory
 
 
 def get_redis_client(request: Request) -> RedisClient:
     return request.app.state.redis
+
+
+def get_single_flight(request: Request) -> SingleFlight:
+    return request.app.state.single_flight
+
+
+def get_market_broadcaster(connection: HTTPConnection) -> MarketBroadcaster:
+    # HTTPConnection rather than Request, so WebSocket routes can depend on it too
+    return connection.app.state.market_broadcaster
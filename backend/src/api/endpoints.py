@@ -2,8 +2,12 @@ import fastapi
 
 from src.api.routes.authentication import router as auth_router
 from src.api.routes.market import router as market_router
+from src.api.routes.metrics import router as metrics_router
+from src.api.routes.push import router as push_router
 
 router = fastapi.APIRouter()
 
 router.include_router(router=market_router)
 router.include_router(router=auth_router)
+router.include_router(router=metrics_router)
+router.include_router(router=push_router)
@@ -0,0 +1,10 @@
+import fastapi
+
+
+class RawJSONResponse(fastapi.Response):
+    """
+    Response for bodies that are already encoded JSON bytes (e.g. straight from Redis), sent without
+    FastAPI's `jsonable_encoder` pass or any re-encoding.
+    """
+
+    media_type = "application/json"
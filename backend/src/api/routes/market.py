@@ -1,173 +1,447 @@
+import bisect
 import datetime
-import json
-from typing import Any, List
+from typing import Any, AsyncIterator, Literal
 
 import fastapi
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from src.api.dependencies.session import get_async_session, get_redis_client
+from src.api.dependencies.session import (
+    get_async_session,
+    get_async_session_factory,
+    get_redis_client,
+    get_single_flight,
+)
+from src.api.responses import RawJSONResponse
+from src.config.manager import settings
+from src.indicators.engine import IndicatorSpec
+from src.repository.correlation_cache import ReturnCorrelationCache
 from src.repository.crud.market import MarketDataCRUDRepository
+from src.repository.indicator_cache import IndicatorSeriesCache
+from src.repository.market_cache import (
+    EMPTY_CACHED_BODY,
+    MarketDataRangeCache,
+    as_utc,
+    latest_cache_key,
+    range_cache_key,
+    serialize_market_data,
+)
 from src.repository.redis import RedisClient
+from src.repository.single_flight import SingleFlight
+from src.repository.timescale import OHLCV_INTERVALS, OhlcvInterval, OhlcvIntervalName
+from src.utilities.formatters.cursor_formatter import decode_cursor, encode_cursor
+from src.utilities.formatters.json_formatter import format_into_json_bytes
+from src.utilities.formatters.series_formatter import (
+    SeriesFormat,
+    StreamFormat,
+    format_series,
+    format_stream,
+    series_media_type,
+    stream_media_type,
+)
 
 router = APIRouter()
 
+DAILY_BUCKET = datetime.timedelta(days=1)
+# Aggregate intervals of the streaming route, with the time field each names its bucket by
+STREAM_AGGREGATES = {"hourly": (OHLCV_INTERVALS["1h"], "hour"), "daily": (OHLCV_INTERVALS["1d"], "date")}
+SERIES_FORMAT_DESCRIPTION = "`rows` (list of bars), `columnar` (one array per field) or `arrow` (Arrow IPC stream)"
 
-@router.get("/market/{ticker}")
+
+def parse_tickers(tickers: str) -> list[str]:
+    return list(dict.fromkeys(ticker.strip() for ticker in tickers.split(",") if ticker.strip()))
+
+
+def splice_snapshots(snapshots: dict[str, bytes]) -> bytes:
+    """
+    Assemble `{"data": {ticker: snapshot, ...}}` from snapshots that are already encoded JSON, without
+    decoding and re-encoding them.
+    """
+    members = b",".join(format_into_json_bytes(ticker) + b":" + snapshot for ticker, snapshot in snapshots.items())
+    return b'{"data":{' + members + b"}}"
+
+
+def series_cache_key(cache_key: str, series_format: SeriesFormat) -> str:
+    # Row bodies keep their original keys, the other encodings are cached next to them
+    return cache_key if series_format == "rows" else f"{cache_key}:{series_format}"
+
+
+def series_response(body: bytes, series_format: SeriesFormat) -> fastapi.Response:
+    return fastapi.Response(content=body, media_type=series_media_type(series_format))
+
+
+# Declared ahead of `/market/{ticker}`, which would otherwise take `correlation` for a ticker
+@router.get("/market/correlation", response_class=RawJSONResponse)
+async def get_market_correlation(
+    tickers: str = Query(..., description="Comma-separated tickers of the universe"),
+    interval: OhlcvIntervalName = Query("1d", description="Bar interval returns are taken over"),
+    window: int = Query(
+        252, ge=2, le=settings.MARKET_CORRELATION_MAX_WINDOW, description="Number of most recent returns"
+    ),
+    end_time: datetime.datetime | None = Query(None, description="End time in ISO format, defaults to now"),
+    async_session: AsyncSession = Depends(get_async_session),
+    redis_client: RedisClient = Depends(get_redis_client),
+    single_flight: SingleFlight = Depends(get_single_flight)
+) -> RawJSONResponse:
+    """
+    Covariance and correlation matrices of the log returns of `tickers`, in sorted ticker order. Each pair
+    is measured over the returns both tickers have; entries with fewer than two are null.
+    """
+    symbols = parse_tickers(tickers)
+    if len(symbols) > settings.MARKET_CORRELATION_MAX_TICKERS:
+        raise fastapi.HTTPException(
+            status_code=400,
+            detail=f"At most {settings.MARKET_CORRELATION_MAX_TICKERS} tickers can be correlated at once"
+        )
+
+    correlation_cache = ReturnCorrelationCache(
+        redis_client=redis_client,
+        market_repo=MarketDataCRUDRepository(async_session),
+        single_flight=single_flight
+    )
+    body = await correlation_cache.get_correlation(
+        tickers=symbols,
+        interval=OHLCV_INTERVALS[interval],
+        window=window,
+        end_time=end_time
+    )
+
+    if not body:
+        raise fastapi.HTTPException(
+            status_code=404,
+            detail="No market data available for the requested tickers"
+        )
+
+    return RawJSONResponse(content=body)
+
+
+@router.get("/market/{ticker}", response_class=RawJSONResponse)
 async def get_market_data(
     ticker: str,
     start_time: datetime.datetime | None = Query(None, description="Start time in ISO format"),
     end_time: datetime.datetime | None = Query(None, description="End time in ISO format"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    series_format: SeriesFormat = Query("rows", alias="format", description=SERIES_FORMAT_DESCRIPTION),
+    cursor: str | None = Query(None, description="`next_cursor` of the previous page"),
     async_session: AsyncSession = Depends(get_async_session),
-    redis_client: RedisClient = Depends(get_redis_client)
-) -> dict[str, Any]:
-    cache_key = f"market_data:{ticker}"
-    cached_data = await redis_client.get(cache_key)
+    redis_client: RedisClient = Depends(get_redis_client),
+    single_flight: SingleFlight = Depends(get_single_flight)
+) -> fastapi.Response:
+    if cursor is not None:
+        try:
+            cursor_ticker, cursor_timestamp = decode_cursor(cursor)
+        except ValueError as e:
+            raise fastapi.HTTPException(status_code=400, detail=str(e))
+        if cursor_ticker != ticker:
+            raise fastapi.HTTPException(status_code=400, detail=f"Cursor does not belong to {ticker}")
+        # Keyset paging: the page continues strictly below the last bar seen, an index seek on
+        # `(ticker, timestamp)` instead of skipping rows with OFFSET
+        before = cursor_timestamp - datetime.timedelta(microseconds=1)
+        end_time = before if end_time is None else min(as_utc(end_time), before)
 
-    if cached_data:
-        await redis_client.set(f"frequent_ticker:{ticker}", "1", expire=3600)
-        return {"data": json.loads(cached_data)}
+    await redis_client.set(f"frequent_ticker:{ticker}", "1", expire=3600)
 
-    market_repo = MarketDataCRUDRepository(async_session)
-    data = await market_repo.get_market_data(
+    range_cache = MarketDataRangeCache(
+        redis_client=redis_client,
+        market_repo=MarketDataCRUDRepository(async_session),
+        single_flight=single_flight
+    )
+    # One bar past the page tells whether there is a next one without an extra round trip
+    result = await range_cache.get_market_data(
         ticker=ticker,
         start_time=start_time,
         end_time=end_time,
-        limit=limit
+        limit=limit + 1
     )
 
-    if not data:
+    if not result and cursor is None:
         raise fastapi.HTTPException(
             status_code=404,
             detail=f"No market data available for {ticker}"
         )
 
-    result = [{
-        "ticker": item.ticker,
-        "timestamp": item.timestamp.isoformat(),
-        "open_price": item.open_price,
-        "high_price": item.high_price,
-        "low_price": item.low_price,
-        "close_price": item.close_price,
-        "volume": item.volume
-    } for item in data]
+    page = result[:limit]
+    next_cursor = encode_cursor(ticker, page[-1]["timestamp"]) if len(result) > limit else None
+    body = format_series(
+        page, ticker=ticker, time_field="timestamp", series_format=series_format, extra={"next_cursor": next_cursor}
+    )
+    return series_response(body, series_format)
 
-    return {"data": result}
 
+async def get_ohlcv_response(
+    ticker: str,
+    interval: OhlcvInterval,
+    time_field: str,
+    cache_prefix: str,
+    label: str,
+    start_time: datetime.datetime | None,
+    end_time: datetime.datetime | None,
+    series_format: SeriesFormat,
+    async_session: AsyncSession,
+    redis_client: RedisClient,
+    single_flight: SingleFlight
+) -> fastapi.Response:
+    # Months have no fixed length, their bounds are aligned to the day instead
+    cache_key = series_cache_key(
+        range_cache_key(cache_prefix, ticker, interval.duration or DAILY_BUCKET, start_time, end_time), series_format
+    )
+    # Cached as the finished response body, so a hit is sent as-is without touching JSON at all
+    cached_body = await redis_client.get_bytes(cache_key)
 
-@router.get("/market/{ticker}/daily")
-async def get_daily_market_data(
+    if cached_body:
+        return series_response(cached_body, series_format)
+
+    market_repo = MarketDataCRUDRepository(async_session)
+
+    async def load_ohlcv() -> bytes:
+        data = await market_repo.get_ohlcv(
+            ticker=ticker,
+            interval=interval,
+            start_time=start_time,
+            end_time=end_time
+        )
+        result = [{
+            "ticker": ticker,
+            time_field: item["bucket"].isoformat(),
+            "open_price": item["open_price"],
+            "high_price": item["high_price"],
+            "low_price": item["low_price"],
+            "close_price": item["close_price"],
+            "volume": item["volume"]
+        } for item in data]
+
+        if not result:
+            # An empty body briefly marks the range as having no bars, so repeated misses for it are
+            # coalesced and answered from the cache instead of each going to the database
+            await redis_client.set(cache_key, EMPTY_CACHED_BODY, expire=settings.MARKET_CACHE_EMPTY_TTL)
+            return EMPTY_CACHED_BODY
+        body = format_series(result, ticker=ticker, time_field=time_field, series_format=series_format)
+        await redis_client.set(cache_key, body, expire=3600)
+        return body
+
+    if cached_body is None:
+        body = await single_flight.do(
+            key=cache_key,
+            load=load_ohlcv,
+            read_cached=lambda: redis_client.get_bytes(cache_key)
+        )
+    else:
+        body = cached_body
+
+    if not body:
+        raise fastapi.HTTPException(
+            status_code=404,
+            detail=f"No {label} market data available for {ticker}"
+        )
+
+    return series_response(body, series_format)
+
+
+@router.get("/market/{ticker}/ohlcv", response_class=RawJSONResponse)
+async def get_ohlcv_market_data(
     ticker: str,
+    interval: OhlcvIntervalName = Query(..., description="Bar interval"),
     start_time: datetime.datetime | None = Query(None, description="Start time in ISO format"),
     end_time: datetime.datetime | None = Query(None, description="End time in ISO format"),
+    series_format: SeriesFormat = Query("rows", alias="format", description=SERIES_FORMAT_DESCRIPTION),
     async_session: AsyncSession = Depends(get_async_session),
-    redis_client: RedisClient = Depends(get_redis_client)
-) -> dict[str, Any]:
-    cache_key = f"market_data_daily:{ticker}"
-    cached_data = await redis_client.get(cache_key)
+    redis_client: RedisClient = Depends(get_redis_client),
+    single_flight: SingleFlight = Depends(get_single_flight)
+) -> fastapi.Response:
+    return await get_ohlcv_response(
+        ticker=ticker,
+        interval=OHLCV_INTERVALS[interval],
+        time_field="timestamp",
+        cache_prefix=f"market_data_ohlcv_{interval}",
+        label=interval,
+        start_time=start_time,
+        end_time=end_time,
+        series_format=series_format,
+        async_session=async_session,
+        redis_client=redis_client,
+        single_flight=single_flight
+    )
 
-    if cached_data:
-        return {"data": json.loads(cached_data)}
 
-    market_repo = MarketDataCRUDRepository(async_session)
-    data = await market_repo.get_daily_aggregates(
+@router.get("/market/{ticker}/daily", response_class=RawJSONResponse)
+async def get_daily_market_data(
+    ticker: str,
+    start_time: datetime.datetime | None = Query(None, description="Start time in ISO format"),
+    end_time: datetime.datetime | None = Query(None, description="End time in ISO format"),
+    series_format: SeriesFormat = Query("rows", alias="format", description=SERIES_FORMAT_DESCRIPTION),
+    async_session: AsyncSession = Depends(get_async_session),
+    redis_client: RedisClient = Depends(get_redis_client),
+    single_flight: SingleFlight = Depends(get_single_flight)
+) -> fastapi.Response:
+    return await get_ohlcv_response(
         ticker=ticker,
+        interval=OHLCV_INTERVALS["1d"],
+        time_field="date",
+        cache_prefix="market_data_daily",
+        label="daily",
         start_time=start_time,
-        end_time=end_time
+        end_time=end_time,
+        series_format=series_format,
+        async_session=async_session,
+        redis_client=redis_client,
+        single_flight=single_flight
     )
 
-    if not data:
-        raise fastapi.HTTPException(
-            status_code=404,
-            detail=f"No daily market data available for {ticker}"
-        )
 
-    result = [{
-        "ticker": ticker,
-        "date": item["bucket"].isoformat(),
-        "open_price": item["open_price"],
-        "high_price": item["high_price"],
-        "low_price": item["low_price"],
-        "close_price": item["close_price"],
-        "volume": item["volume"]
-    } for item in data]
-
-    safe_result = redis_client.convert_decimals(result)
-    await redis_client.set(cache_key, json.dumps(safe_result), expire=3600)
-    return {"data": result}
+@router.get("/market/{ticker}/hourly", response_class=RawJSONResponse)
+async def get_hourly_market_data(
+    ticker: str,
+    start_time: datetime.datetime | None = Query(None, description="Start time in ISO format"),
+    end_time: datetime.datetime | None = Query(None, description="End time in ISO format"),
+    series_format: SeriesFormat = Query("rows", alias="format", description=SERIES_FORMAT_DESCRIPTION),
+    async_session: AsyncSession = Depends(get_async_session),
+    redis_client: RedisClient = Depends(get_redis_client),
+    single_flight: SingleFlight = Depends(get_single_flight)
+) -> fastapi.Response:
+    return await get_ohlcv_response(
+        ticker=ticker,
+        interval=OHLCV_INTERVALS["1h"],
+        time_field="hour",
+        cache_prefix="market_data_hourly",
+        label="hourly",
+        start_time=start_time,
+        end_time=end_time,
+        series_format=series_format,
+        async_session=async_session,
+        redis_client=redis_client,
+        single_flight=single_flight
+    )
 
 
-@router.get("/market/{ticker}/hourly")
-async def get_hourly_market_data(
+@router.get("/market/{ticker}/indicators", response_class=RawJSONResponse)
+async def get_market_indicators(
     ticker: str,
+    interval: OhlcvIntervalName = Query("1d", description="Bar interval the indicators are computed on"),
+    indicators: str = Query(
+        "sma:20,ema:20,rsi:14",
+        description="Comma-separated `name[:param...]` of sma, ema, rsi, macd, bbands, vwap, e.g. `macd:12:26:9`"
+    ),
     start_time: datetime.datetime | None = Query(None, description="Start time in ISO format"),
     end_time: datetime.datetime | None = Query(None, description="End time in ISO format"),
     async_session: AsyncSession = Depends(get_async_session),
     redis_client: RedisClient = Depends(get_redis_client)
-) -> dict[str, Any]:
-    cache_key = f"market_data_hourly:{ticker}"
-    cached_data = await redis_client.get(cache_key)
-
-    if cached_data:
-        return {"data": json.loads(cached_data)}
+) -> RawJSONResponse:
+    try:
+        specs = list({spec.key: spec for spec in map(IndicatorSpec.parse, indicators.split(","))}.values())
+    except ValueError as e:
+        raise fastapi.HTTPException(status_code=400, detail=str(e))
 
-    market_repo = MarketDataCRUDRepository(async_session)
-    data = await market_repo.get_hourly_aggregates(
+    indicator_cache = IndicatorSeriesCache(
+        redis_client=redis_client,
+        market_repo=MarketDataCRUDRepository(async_session)
+    )
+    # Computed over the whole history, so values do not depend on where the requested range starts
+    timestamps, values = await indicator_cache.get_indicators(
         ticker=ticker,
-        start_time=start_time,
-        end_time=end_time
+        interval=OHLCV_INTERVALS[interval],
+        specs=specs
     )
 
-    if not data:
+    if not timestamps:
         raise fastapi.HTTPException(
             status_code=404,
-            detail=f"No hourly market data available for {ticker}"
+            detail=f"No market data available for {ticker}"
         )
 
-    result = [{
+    parsed = [datetime.datetime.fromisoformat(timestamp) for timestamp in timestamps]
+    first = bisect.bisect_left(parsed, as_utc(start_time)) if start_time else 0
+    last = bisect.bisect_right(parsed, as_utc(end_time)) if end_time else len(parsed)
+    return RawJSONResponse(content=format_into_json_bytes({
         "ticker": ticker,
-        "hour": item["bucket"].isoformat(),
-        "open_price": item["open_price"],
-        "high_price": item["high_price"],
-        "low_price": item["low_price"],
-        "close_price": item["close_price"],
-        "volume": item["volume"]
-    } for item in data]
+        "interval": interval,
+        "data": {
+            "timestamp": timestamps[first:last],
+            **{output: column[first:last] for output, column in values.items()}
+        }
+    }))
+
 
-    safe_result = redis_client.convert_decimals(result)
-    await redis_client.set(cache_key, json.dumps(safe_result), expire=3600)
-    return {"data": result}
+@router.get("/market/{ticker}/stream")
+async def stream_market_data(
+    ticker: str,
+    start_time: datetime.datetime | None = Query(None, description="Start time in ISO format"),
+    end_time: datetime.datetime | None = Query(None, description="End time in ISO format"),
+    interval: Literal["raw", "hourly", "daily"] = Query("raw", description="Raw bars or an aggregate interval"),
+    stream_format: StreamFormat = Query("ndjson", alias="format", description="`ndjson` or a chunked JSON document"),
+    async_session_factory: async_sessionmaker[AsyncSession] = Depends(get_async_session_factory)
+) -> StreamingResponse:
+    """
+    Unbounded range of `ticker`, newest first, written out as rows arrive from a server-side cursor.
+    """
+    async def iter_batches() -> AsyncIterator[list[dict[str, Any]]]:
+        # The session has to live as long as the response body, not the handler
+        async with async_session_factory() as async_session:
+            market_repo = MarketDataCRUDRepository(async_session)
+            if interval == "raw":
+                async for batch in market_repo.stream_market_data(
+                    ticker=ticker,
+                    start_time=start_time,
+                    end_time=end_time,
+                    batch_size=settings.MARKET_STREAM_BATCH_SIZE
+                ):
+                    yield batch
+                return
+
+            ohlcv_interval, time_field = STREAM_AGGREGATES[interval]
+            async for batch in market_repo.stream_ohlcv(
+                interval=ohlcv_interval,
+                ticker=ticker,
+                start_time=start_time,
+                end_time=end_time,
+                batch_size=settings.MARKET_STREAM_BATCH_SIZE
+            ):
+                yield [{
+                    "ticker": ticker,
+                    time_field: item["bucket"],
+                    "open_price": item["open_price"],
+                    "high_price": item["high_price"],
+                    "low_price": item["low_price"],
+                    "close_price": item["close_price"],
+                    "volume": item["volume"]
+                } for item in batch]
+
+    return StreamingResponse(
+        format_stream(iter_batches(), stream_format=stream_format),
+        media_type=stream_media_type(stream_format)
+    )
 
 
-@router.get("/market")
+@router.get("/market", response_class=RawJSONResponse)
 async def get_all_market_data(
+    tickers: str | None = Query(None, description="Comma-separated tickers, defaults to the configured watchlist"),
     async_session: AsyncSession = Depends(get_async_session),
     redis_client: RedisClient = Depends(get_redis_client)
-) -> dict[str, Any]:
-    tickers = ["AAPL", "MSFT", "GOOGL", "AMZN", "META"]
-    result = {}
-    market_repo = MarketDataCRUDRepository(async_session)
+) -> RawJSONResponse:
+    symbols = parse_tickers(tickers) if tickers else settings.market_tickers
+    if len(symbols) > settings.MARKET_SNAPSHOT_MAX_TICKERS:
+        raise fastapi.HTTPException(
+            status_code=400,
+            detail=f"At most {settings.MARKET_SNAPSHOT_MAX_TICKERS} tickers can be requested at once"
+        )
+
+    # One MGET for the cached snapshots and one statement for all misses, whatever the watchlist size
+    cached_data = await redis_client.mget_bytes([latest_cache_key(ticker) for ticker in symbols])
+    snapshots = {ticker: cached for ticker, cached in zip(symbols, cached_data) if cached}
+
+    missing = [ticker for ticker in symbols if ticker not in snapshots]
+    if missing:
+        market_repo = MarketDataCRUDRepository(async_session)
+        latest_data = await market_repo.get_latest_market_data_bulk(missing)
+        fresh = {item.ticker: format_into_json_bytes(serialize_market_data(item)) for item in latest_data}
+        if fresh:
+            await redis_client.set_many(
+                {latest_cache_key(ticker): snapshot for ticker, snapshot in fresh.items()},
+                expire=settings.MARKET_SNAPSHOT_TTL
+            )
+        snapshots.update(fresh)
 
-    for ticker in tickers:
-        cache_key = f"market_data:{ticker}"
-        cached_data = await redis_client.get(cache_key)
-
-        if cached_data:
-            result[ticker] = json.loads(cached_data)
-            continue
-
-        latest_data = await market_repo.get_latest_market_data(ticker)
-        if latest_data:
-            result[ticker] = {
-                "ticker": latest_data.ticker,
-                "timestamp": latest_data.timestamp.isoformat(),
-                "open_price": latest_data.open_price,
-                "high_price": latest_data.high_price,
-                "low_price": latest_data.low_price,
-                "close_price": latest_data.close_price,
-                "volume": latest_data.volume
-            }
+    result = {ticker: snapshots[ticker] for ticker in symbols if ticker in snapshots}
 
     if not result:
         raise fastapi.HTTPException(
@@ -175,4 +449,4 @@ async def get_all_market_data(
             detail="No market data available"
         )
 
-    return {"data": result} 
\ No newline at end of file
+    return RawJSONResponse(content=splice_snapshots(result))
@@ -0,0 +1,41 @@
+import os
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from src.api.dependencies.session import get_market_broadcaster, get_redis_client, get_single_flight
+from src.repository.market_broadcast import MarketBroadcaster
+from src.repository.redis import RedisClient
+from src.repository.single_flight import SingleFlight
+from src.scheduler.jobs import read_job_states
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/cache", name="metrics:cache")
+async def get_cache_metrics(
+    single_flight: SingleFlight = Depends(get_single_flight),
+    redis_client: RedisClient = Depends(get_redis_client),
+) -> dict[str, Any]:
+    # Counters live in each worker process, so the pid tells apart which worker answered
+    return {
+        "pid": os.getpid(),
+        "single_flight": single_flight.metrics.snapshot(),
+        "local_cache": redis_client.local_cache.snapshot() if redis_client.local_cache else None,
+        "redis": {**redis_client.metrics.snapshot(), "evicted_keys": await redis_client.evicted_keys()},
+        "redis_codec": redis_client.payload_codec.snapshot(),
+    }
+
+
+@router.get("/push", name="metrics:push")
+async def get_push_metrics(broadcaster: MarketBroadcaster = Depends(get_market_broadcaster)) -> dict[str, Any]:
+    return {
+        "pid": os.getpid(),
+        "market_broadcast": broadcaster.metrics.snapshot(),
+    }
+
+
+@router.get("/scheduler", name="metrics:scheduler")
+async def get_scheduler_metrics(redis_client: RedisClient = Depends(get_redis_client)) -> dict[str, Any]:
+    # Saved by the ingest leader after every run, so this answers from any worker or replica
+    return {"jobs": await read_job_states(redis_client)}
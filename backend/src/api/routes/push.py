@@ -0,0 +1,87 @@
+import asyncio
+from typing import AsyncIterator
+
+import fastapi
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from src.api.dependencies.session import get_market_broadcaster
+from src.api.routes.market import parse_tickers
+from src.config.manager import settings
+from src.repository.market_broadcast import MarketBroadcaster
+
+router = APIRouter(prefix="/push", tags=["push"])
+
+TICKERS_DESCRIPTION = "Comma-separated tickers to receive new bars for"
+
+
+@router.websocket("/ws")
+async def push_market_bars_websocket(
+    websocket: WebSocket,
+    tickers: str = Query(..., description=TICKERS_DESCRIPTION),
+    broadcaster: MarketBroadcaster = Depends(get_market_broadcaster)
+) -> None:
+    symbols = parse_tickers(tickers)
+    if not symbols or len(symbols) > settings.MARKET_SNAPSHOT_MAX_TICKERS:
+        await websocket.close(code=fastapi.status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = broadcaster.subscribe(symbols)
+
+    async def forward_bars() -> None:
+        while True:
+            await websocket.send_text((await subscription.get()).decode())
+
+    async def wait_for_disconnect() -> None:
+        # Nothing is expected from the client; reading is how a closed socket is noticed while no bars come
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.create_task(forward_bars()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get("/sse")
+async def push_market_bars_sse(
+    tickers: str = Query(..., description=TICKERS_DESCRIPTION),
+    broadcaster: MarketBroadcaster = Depends(get_market_broadcaster)
+) -> StreamingResponse:
+    """
+    Server-sent events fallback of `/push/ws`: one `bars` event per published message, and a comment line
+    as heartbeat so proxies keep idle connections open.
+    """
+    symbols = parse_tickers(tickers)
+    if len(symbols) > settings.MARKET_SNAPSHOT_MAX_TICKERS:
+        raise fastapi.HTTPException(
+            status_code=400,
+            detail=f"At most {settings.MARKET_SNAPSHOT_MAX_TICKERS} tickers can be requested at once"
+        )
+
+    async def iter_events() -> AsyncIterator[bytes]:
+        subscription = broadcaster.subscribe(symbols)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.get(), timeout=settings.MARKET_PUSH_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield b"event: bars\ndata: " + message + b"\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        iter_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
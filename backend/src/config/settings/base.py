@@ -42,6 +42,21 @@ class BackendBaseSettings(BaseSettings):
     REDIS_PASSWORD: str | None = decouple.config("REDIS_PASSWORD", default=None, cast=str)
     REDIS_POOL_SIZE: int = decouple.config("REDIS_POOL_SIZE", default=10, cast=int)
     REDIS_POOL_TIMEOUT: int = decouple.config("REDIS_POOL_TIMEOUT", default=5, cast=int)
+    REDIS_CACHE_CODEC: str = decouple.config("REDIS_CACHE_CODEC", default="zlib", cast=str)
+    REDIS_CACHE_COMPRESSION_THRESHOLD: int = decouple.config("REDIS_CACHE_COMPRESSION_THRESHOLD", default=1024, cast=int)
+    REDIS_CACHE_COMPRESSION_LEVEL: int = decouple.config("REDIS_CACHE_COMPRESSION_LEVEL", default=6, cast=int)
+
+    LOCAL_CACHE_MAX_ENTRIES: int = decouple.config("LOCAL_CACHE_MAX_ENTRIES", default=10000, cast=int)
+    LOCAL_CACHE_TTL: float = decouple.config("LOCAL_CACHE_TTL", default=5.0, cast=float)
+
+    MARKET_CACHE_SEGMENT_HOURS: int = decouple.config("MARKET_CACHE_SEGMENT_HOURS", default=24, cast=int)
+    MARKET_CACHE_SEGMENT_BATCH: int = decouple.config("MARKET_CACHE_SEGMENT_BATCH", default=8, cast=int)
+    MARKET_CACHE_MAX_SEGMENTS: int = decouple.config("MARKET_CACHE_MAX_SEGMENTS", default=120, cast=int)
+    MARKET_CACHE_SEGMENT_TTL: int = decouple.config("MARKET_CACHE_SEGMENT_TTL", default=86400, cast=int)
+    MARKET_CACHE_OPEN_SEGMENT_TTL: int = decouple.config("MARKET_CACHE_OPEN_SEGMENT_TTL", default=60, cast=int)
+    MARKET_CACHE_EMPTY_TTL: int = decouple.config("MARKET_CACHE_EMPTY_TTL", default=60, cast=int)
+    SINGLE_FLIGHT_LOCK_TTL_MS: int = decouple.config("SINGLE_FLIGHT_LOCK_TTL_MS", default=10000, cast=int)
+    SINGLE_FLIGHT_POLL_INTERVAL_MS: int = decouple.config("SINGLE_FLIGHT_POLL_INTERVAL_MS", default=50, cast=int)
 
     IS_DB_ECHO_LOG: bool = decouple.config("IS_DB_ECHO_LOG", cast=bool)
     IS_DB_FORCE_ROLLBACK: bool = decouple.config("IS_DB_FORCE_ROLLBACK", cast=bool)
@@ -76,13 +91,50 @@ class BackendBaseSettings(BaseSettings):
     JWT_ALGORITHM: str = decouple.config("JWT_ALGORITHM", cast=str)
 
     POLYGON_API_KEY: str = decouple.config("POLYGON_API_KEY", cast=str)
-    UPDATE_INTERVAL_MINUTES: str = decouple.config("UPDATE_INTERVAL_MINUTES", default=60, cast=int)
+    # Comma-separated; kept as a string because pydantic-settings would expect JSON for a list from the env
+    MARKET_TICKERS: str = decouple.config("MARKET_TICKERS", default="AAPL,MSFT,GOOGL,AMZN,META", cast=str)
+    MARKET_SNAPSHOT_MAX_TICKERS: int = decouple.config("MARKET_SNAPSHOT_MAX_TICKERS", default=1000, cast=int)
+    MARKET_SNAPSHOT_TTL: int = decouple.config("MARKET_SNAPSHOT_TTL", default=300, cast=int)
+    MARKET_STREAM_BATCH_SIZE: int = decouple.config("MARKET_STREAM_BATCH_SIZE", default=1000, cast=int)
+    INDICATOR_CACHE_TTL: int = decouple.config("INDICATOR_CACHE_TTL", default=604800, cast=int)
+    MARKET_CORRELATION_MAX_TICKERS: int = decouple.config("MARKET_CORRELATION_MAX_TICKERS", default=500, cast=int)
+    MARKET_CORRELATION_MAX_WINDOW: int = decouple.config("MARKET_CORRELATION_MAX_WINDOW", default=2520, cast=int)
+    MARKET_CORRELATION_TTL: int = decouple.config("MARKET_CORRELATION_TTL", default=900, cast=int)
+    MARKET_PUSH_QUEUE_SIZE: int = decouple.config("MARKET_PUSH_QUEUE_SIZE", default=100, cast=int)
+    MARKET_PUSH_HEARTBEAT_SECONDS: float = decouple.config("MARKET_PUSH_HEARTBEAT_SECONDS", default=15.0, cast=float)
+    UPDATE_INTERVAL_MINUTES: int = decouple.config("UPDATE_INTERVAL_MINUTES", default=60, cast=int)
+    INGEST_JITTER_SECONDS: float = decouple.config("INGEST_JITTER_SECONDS", default=30.0, cast=float)
+    INGEST_TIMEOUT_SECONDS: float = decouple.config("INGEST_TIMEOUT_SECONDS", default=1800.0, cast=float)
+    CACHE_WARM_INTERVAL_SECONDS: int = decouple.config("CACHE_WARM_INTERVAL_SECONDS", default=240, cast=int)
+    # Postgres intervals; empty disables the policy
+    MARKET_DATA_COMPRESS_AFTER: str = decouple.config("MARKET_DATA_COMPRESS_AFTER", default="7 days", cast=str)
+    MARKET_DATA_RETENTION: str = decouple.config("MARKET_DATA_RETENTION", default="2 years", cast=str)
+    ROLLUP_REFRESH_CRON: str = decouple.config("ROLLUP_REFRESH_CRON", default="15 * * * *", cast=str)
+    INGEST_LOOKBACK_DAYS: int = decouple.config("INGEST_LOOKBACK_DAYS", default=1, cast=int)
+    INGEST_CONCURRENCY: int = decouple.config("INGEST_CONCURRENCY", default=10, cast=int)
+    INGEST_EMBEDDED: bool = decouple.config("INGEST_EMBEDDED", default=True, cast=bool)
+    INGEST_LEASE_TTL_MS: int = decouple.config("INGEST_LEASE_TTL_MS", default=15000, cast=int)
+    POLYGON_BASE_URL: str = decouple.config("POLYGON_BASE_URL", default="https://api.polygon.io", cast=str)
+    POLYGON_REQUESTS_PER_MINUTE: float = decouple.config("POLYGON_REQUESTS_PER_MINUTE", default=5, cast=float)
+    POLYGON_RATE_LIMIT_BURST: float = decouple.config("POLYGON_RATE_LIMIT_BURST", default=1, cast=float)
+    POLYGON_MAX_RETRIES: int = decouple.config("POLYGON_MAX_RETRIES", default=5, cast=int)
+    POLYGON_BACKOFF_BASE: float = decouple.config("POLYGON_BACKOFF_BASE", default=1.0, cast=float)
+    POLYGON_BACKOFF_MAX: float = decouple.config("POLYGON_BACKOFF_MAX", default=60.0, cast=float)
+    POLYGON_HTTP2: bool = decouple.config("POLYGON_HTTP2", default=True, cast=bool)
+    POLYGON_TIMEOUT: float = decouple.config("POLYGON_TIMEOUT", default=10.0, cast=float)
+    POLYGON_MAX_CONNECTIONS: int = decouple.config("POLYGON_MAX_CONNECTIONS", default=20, cast=int)
+    POLYGON_MAX_KEEPALIVE_CONNECTIONS: int = decouple.config("POLYGON_MAX_KEEPALIVE_CONNECTIONS", default=20, cast=int)
+    POLYGON_KEEPALIVE_EXPIRY: float = decouple.config("POLYGON_KEEPALIVE_EXPIRY", default=30.0, cast=float)
 
     class Config(BaseConfig):
         case_sensitive: bool = True
         env_file: str = f"{str(ROOT_DIR)}/.env"
         validate_assignment: bool = True
 
+    @property
+    def market_tickers(self) -> list[str]:
+        return [ticker.strip() for ticker in self.MARKET_TICKERS.split(",") if ticker.strip()]
+
     @property
     def set_backend_app_attributes(self) -> dict[str, str | bool | None]:
         return {
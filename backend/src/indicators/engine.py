@@ -0,0 +1,319 @@
+"""
+Technical indicators over OHLCV arrays with resumable state.
+
+Every indicator keeps the little state its recursion needs (last EMA values, the rolling window, running
+sums), so a series computed once over the full history is extended by new bars in O(1) per bar instead of
+being recomputed. Rolling-window indicators are computed with NumPy over the whole chunk at once; the
+EMA-based ones are inherently sequential and walk the chunk in one pass.
+"""
+
+import copy
+import dataclasses
+import math
+import typing
+
+import numpy
+
+INDICATOR_DEFAULTS: dict[str, tuple[float, ...]] = {
+    "sma": (20,),
+    "ema": (20,),
+    "rsi": (14,),
+    "macd": (12, 26, 9),
+    "bbands": (20, 2),
+    "vwap": (),
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class IndicatorSpec:
+    name: str
+    params: tuple[float, ...]
+
+    @classmethod
+    def parse(cls, spec: str) -> "IndicatorSpec":
+        """
+        Parse `name[:param[:param...]]`, e.g. `sma:50` or `macd:12:26:9`; omitted params take the defaults.
+        """
+        name, *raw_params = spec.strip().lower().split(":")
+        if name not in INDICATOR_DEFAULTS:
+            raise ValueError(f"Unknown indicator `{name}`, expected one of: {', '.join(INDICATOR_DEFAULTS)}")
+        defaults = INDICATOR_DEFAULTS[name]
+        if len(raw_params) > len(defaults):
+            raise ValueError(f"`{name}` takes at most {len(defaults)} parameters")
+        try:
+            params = tuple(float(param) for param in raw_params) + defaults[len(raw_params):]
+        except ValueError:
+            raise ValueError(f"Parameters of `{spec}` must be numbers")
+        # Every parameter but the Bollinger width is a bar count
+        if any(param <= 0 for param in params) or any(
+            param != int(param) for param in (params[:1] if name == "bbands" else params)
+        ):
+            raise ValueError(f"Parameters of `{spec}` must be positive bar counts")
+        return cls(name=name, params=params)
+
+    @property
+    def key(self) -> str:
+        return ":".join([self.name, *(f"{param:g}" for param in self.params)])
+
+    @property
+    def outputs(self) -> list[str]:
+        if self.name == "macd":
+            return [self.key, f"{self.key}:signal", f"{self.key}:histogram"]
+        if self.name == "bbands":
+            return [f"{self.key}:upper", f"{self.key}:middle", f"{self.key}:lower"]
+        return [self.key]
+
+
+@dataclasses.dataclass
+class OhlcvArrays:
+    high: numpy.ndarray
+    low: numpy.ndarray
+    close: numpy.ndarray
+    volume: numpy.ndarray
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    @classmethod
+    def from_rows(cls, rows: typing.Sequence[dict[str, typing.Any]]) -> "OhlcvArrays":
+        def column(field: str) -> numpy.ndarray:
+            return numpy.fromiter((float(row[field]) for row in rows), dtype=numpy.float64, count=len(rows))
+
+        return cls(
+            high=column("high_price"), low=column("low_price"), close=column("close_price"), volume=column("volume")
+        )
+
+
+def _rolling_window(history: list[float], new: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    The closes a rolling window over `new` needs (the carried-over tail plus `new`), and for each new bar
+    the index in that array where its window ends.
+    """
+    values = numpy.concatenate([numpy.asarray(history, dtype=numpy.float64), new])
+    return values, numpy.arange(len(history), len(values))
+
+
+def _rolling_sums(values: numpy.ndarray, ends: numpy.ndarray, period: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Sum over the `period` values ending at each of `ends`, and whether the window is full there.
+    """
+    cumulative = numpy.concatenate([[0.0], numpy.cumsum(values)])
+    starts = numpy.maximum(ends + 1 - period, 0)
+    return cumulative[ends + 1] - cumulative[starts], ends + 1 >= period
+
+
+class IndicatorState:
+    spec: IndicatorSpec
+
+    def extend(self, bars: OhlcvArrays) -> dict[str, numpy.ndarray]:
+        """
+        Values for `bars`, which directly follow the bars seen so far, advancing the state past them.
+        """
+        raise NotImplementedError
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        return {key: value for key, value in vars(self).items() if key != "spec"}
+
+    @classmethod
+    def from_dict(cls, spec: IndicatorSpec, data: dict[str, typing.Any]) -> "IndicatorState":
+        state = cls(spec)
+        vars(state).update(data)
+        return state
+
+
+class EMA:
+    """
+    Exponential moving average seeded with the first value; NaN until `period` values have been seen.
+    """
+
+    def __init__(self, period: int, alpha: float | None = None):
+        self.period = period
+        self.alpha = 2 / (period + 1) if alpha is None else alpha
+        # Only read once `count` is positive; 0.0 rather than NaN so the state round-trips through JSON
+        self.value = 0.0
+        self.count = 0
+
+    def update(self, value: float) -> float:
+        self.value = value if self.count == 0 else self.value + self.alpha * (value - self.value)
+        self.count += 1
+        return self.value if self.count >= self.period else math.nan
+
+
+class SMAState(IndicatorState):
+    def __init__(self, spec: IndicatorSpec):
+        self.spec = spec
+        self.window: list[float] = []
+
+    def extend(self, bars: OhlcvArrays) -> dict[str, numpy.ndarray]:
+        period = int(self.spec.params[0])
+        values, ends = _rolling_window(self.window, bars.close)
+        sums, full = _rolling_sums(values, ends, period)
+        self.window = values[-(period - 1):].tolist() if period > 1 else []
+        return {self.spec.key: numpy.where(full, sums / period, numpy.nan)}
+
+
+class BollingerState(IndicatorState):
+    def __init__(self, spec: IndicatorSpec):
+        self.spec = spec
+        self.window: list[float] = []
+
+    def extend(self, bars: OhlcvArrays) -> dict[str, numpy.ndarray]:
+        period, width = int(self.spec.params[0]), self.spec.params[1]
+        values, ends = _rolling_window(self.window, bars.close)
+        # Deviations from the window's first value keep the sum-of-squares variance numerically stable
+        shift = values[0] if len(values) else 0.0
+        sums, full = _rolling_sums(values - shift, ends, period)
+        squares, _ = _rolling_sums((values - shift) ** 2, ends, period)
+        mean = sums / period
+        deviation = numpy.sqrt(numpy.maximum(squares / period - mean ** 2, 0.0))
+        middle = mean + shift
+        self.window = values[-(period - 1):].tolist() if period > 1 else []
+        upper, lower = middle + width * deviation, middle - width * deviation
+        return dict(zip(self.spec.outputs, (numpy.where(full, band, numpy.nan) for band in (upper, middle, lower))))
+
+
+class VWAPState(IndicatorState):
+    """
+    VWAP anchored at the first bar of the series: cumulative typical price × volume over cumulative volume.
+    """
+
+    def __init__(self, spec: IndicatorSpec):
+        self.spec = spec
+        self.price_volume = 0.0
+        self.volume = 0.0
+
+    def extend(self, bars: OhlcvArrays) -> dict[str, numpy.ndarray]:
+        typical = (bars.high + bars.low + bars.close) / 3
+        price_volume = self.price_volume + numpy.cumsum(typical * bars.volume)
+        volume = self.volume + numpy.cumsum(bars.volume)
+        if len(bars):
+            self.price_volume, self.volume = float(price_volume[-1]), float(volume[-1])
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            return {self.spec.key: numpy.where(volume > 0, price_volume / volume, numpy.nan)}
+
+
+class EMAState(IndicatorState):
+    def __init__(self, spec: IndicatorSpec):
+        self.spec = spec
+        self.ema = EMA(int(spec.params[0]))
+
+    def extend(self, bars: OhlcvArrays) -> dict[str, numpy.ndarray]:
+        return {self.spec.key: numpy.array([self.ema.update(close) for close in bars.close.tolist()])}
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        return {"ema": vars(self.ema)}
+
+    @classmethod
+    def from_dict(cls, spec: IndicatorSpec, data: dict[str, typing.Any]) -> "EMAState":
+        state = cls(spec)
+        vars(state.ema).update(data["ema"])
+        return state
+
+
+class RSIState(IndicatorState):
+    """
+    Wilder's RSI: average gain and loss seeded with the plain mean of the first `period` changes.
+    """
+
+    def __init__(self, spec: IndicatorSpec):
+        self.spec = spec
+        self.previous_close: float | None = None
+        self.changes = 0
+        self.average_gain = 0.0
+        self.average_loss = 0.0
+
+    def _update(self, close: float) -> float:
+        period = int(self.spec.params[0])
+        if self.previous_close is None:
+            self.previous_close = close
+            return math.nan
+
+        change, self.previous_close = close - self.previous_close, close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self.changes += 1
+        # The first `period` changes accumulate a plain mean, later ones use Wilder's smoothing
+        weight = min(self.changes, period)
+        self.average_gain += (gain - self.average_gain) / weight
+        self.average_loss += (loss - self.average_loss) / weight
+        if self.changes < period:
+            return math.nan
+        if self.average_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + self.average_gain / self.average_loss)
+
+    def extend(self, bars: OhlcvArrays) -> dict[str, numpy.ndarray]:
+        return {self.spec.key: numpy.array([self._update(close) for close in bars.close.tolist()])}
+
+
+class MACDState(IndicatorState):
+    def __init__(self, spec: IndicatorSpec):
+        self.spec = spec
+        fast, slow, signal = (int(param) for param in spec.params)
+        self.fast, self.slow, self.signal = EMA(fast), EMA(slow), EMA(signal)
+
+    def _update(self, close: float) -> tuple[float, float, float]:
+        fast, slow = self.fast.update(close), self.slow.update(close)
+        if math.isnan(fast) or math.isnan(slow):
+            return math.nan, math.nan, math.nan
+        macd = fast - slow
+        signal = self.signal.update(macd)
+        return macd, signal, macd - signal
+
+    def extend(self, bars: OhlcvArrays) -> dict[str, numpy.ndarray]:
+        rows = [self._update(close) for close in bars.close.tolist()]
+        columns = numpy.array(rows).reshape(len(rows), 3).T
+        return dict(zip(self.spec.outputs, columns))
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        return {name: vars(getattr(self, name)) for name in ("fast", "slow", "signal")}
+
+    @classmethod
+    def from_dict(cls, spec: IndicatorSpec, data: dict[str, typing.Any]) -> "MACDState":
+        state = cls(spec)
+        for name in ("fast", "slow", "signal"):
+            vars(getattr(state, name)).update(data[name])
+        return state
+
+
+INDICATOR_STATES: dict[str, type[IndicatorState]] = {
+    "sma": SMAState,
+    "ema": EMAState,
+    "rsi": RSIState,
+    "macd": MACDState,
+    "bbands": BollingerState,
+    "vwap": VWAPState,
+}
+
+
+class IndicatorEngine:
+    """
+    The states of a set of indicators over one series. `extend` advances them; `preview` computes values
+    for bars that may still change (the bucket still forming) without committing them to the state.
+    """
+
+    def __init__(self, specs: typing.Sequence[IndicatorSpec], states: dict[str, IndicatorState] | None = None):
+        self.specs = list(specs)
+        self.states = states or {spec.key: INDICATOR_STATES[spec.name](spec) for spec in self.specs}
+
+    @property
+    def outputs(self) -> list[str]:
+        return [output for spec in self.specs for output in spec.outputs]
+
+    def extend(self, bars: OhlcvArrays) -> dict[str, numpy.ndarray]:
+        values: dict[str, numpy.ndarray] = {}
+        for state in self.states.values():
+            values.update(state.extend(bars))
+        return values
+
+    def preview(self, bars: OhlcvArrays) -> dict[str, numpy.ndarray]:
+        return IndicatorEngine(self.specs, copy.deepcopy(self.states)).extend(bars)
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        return {key: state.to_dict() for key, state in self.states.items()}
+
+    @classmethod
+    def from_dict(cls, specs: typing.Sequence[IndicatorSpec], data: dict[str, typing.Any]) -> "IndicatorEngine":
+        return cls(
+            specs,
+            {spec.key: INDICATOR_STATES[spec.name].from_dict(spec, data[spec.key]) for spec in specs},
+        )
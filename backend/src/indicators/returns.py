@@ -0,0 +1,60 @@
+"""
+Log returns and their covariance and correlation across a universe of tickers.
+
+Closes arrive as one `(buckets, tickers)` matrix with NaN wherever a ticker has no bar. Returns are not
+forward-filled across such gaps; every pair of tickers is instead measured over the buckets both have a
+return in (pairwise-complete), which keeps a single late listing or halted symbol from emptying the whole
+matrix. All pairs are computed at once with a handful of `(tickers, tickers)` matrix products, so memory
+is O(buckets * tickers + tickers²) whatever the universe size.
+"""
+
+import dataclasses
+
+import numpy
+
+
+@dataclasses.dataclass
+class ReturnMoments:
+    covariance: numpy.ndarray
+    correlation: numpy.ndarray
+    observations: numpy.ndarray
+
+
+def log_returns(closes: numpy.ndarray) -> numpy.ndarray:
+    """
+    Bucket-to-bucket log returns of an oldest-first `(buckets, tickers)` close matrix, one row shorter.
+    Non-positive closes are treated as missing.
+    """
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        log_closes = numpy.log(numpy.where(closes > 0, closes, numpy.nan))
+    return numpy.diff(log_closes, axis=0)
+
+
+def pairwise_moments(returns: numpy.ndarray, min_periods: int = 2) -> ReturnMoments:
+    """
+    Sample covariance and Pearson correlation of every pair of columns of `returns` over the rows both are
+    present in. Pairs with fewer than `min_periods` common rows, and correlations of a constant series,
+    are NaN.
+    """
+    present = ~numpy.isnan(returns)
+    # Centering first changes no moment but keeps the sums below well conditioned
+    means = numpy.nansum(returns, axis=0) / numpy.maximum(present.sum(axis=0), 1)
+    values = numpy.where(present, returns - means, 0.0)
+    mask = present.astype(values.dtype)
+
+    # Entry (i, j) of each product only sums over rows where both i and j are present
+    counts = mask.T @ mask
+    sums = values.T @ mask
+    squares = (values * values).T @ mask
+    products = values.T @ values
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        cross = products - sums * sums.T / counts
+        spread = squares - sums * sums / counts
+        covariance = cross / (counts - 1)
+        correlation = numpy.clip(cross / numpy.sqrt(spread * spread.T), -1.0, 1.0)
+
+    too_few = counts < max(min_periods, 2)
+    covariance[too_few] = numpy.nan
+    correlation[too_few] = numpy.nan
+    return ReturnMoments(covariance=covariance, correlation=correlation, observations=counts.astype(numpy.int64))
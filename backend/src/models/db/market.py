@@ -1,35 +1,56 @@
 import datetime
+import typing
 
 import sqlalchemy
-from sqlalchemy.orm import Mapped as SQLAlchemyMapped, mapped_column as sqlalchemy_mapped_column
-from sqlalchemy.sql import functions as sqlalchemy_functions
+from sqlalchemy.orm import (
+    Mapped as SQLAlchemyMapped,
+    mapped_column as sqlalchemy_mapped_column,
+    query_expression as sqlalchemy_query_expression,
+)
 
 from src.repository.table import Base
 
+# Plain `(ticker, timestamp, open, high, low, close, volume)` row used by the bulk write path
+MarketBar = typing.Tuple[str, datetime.datetime, float, float, float, float, int]
+MARKET_BAR_COLUMNS: typing.Tuple[str, ...] = (
+    "ticker",
+    "timestamp",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+    "volume",
+)
+
+
+class Symbol(Base):
+    __tablename__ = "symbols"
+
+    # Ids are assigned once per ticker and never reused, so they can be cached for the life of a process
+    id: SQLAlchemyMapped[int] = sqlalchemy_mapped_column(sqlalchemy.Integer, sqlalchemy.Identity(), primary_key=True)
+    ticker: SQLAlchemyMapped[str] = sqlalchemy_mapped_column(sqlalchemy.String(length=10), nullable=False, unique=True)
+
 
 class MarketData(Base):
     __tablename__ = "market_data"
 
-    id: SQLAlchemyMapped[int] = sqlalchemy_mapped_column(primary_key=True, autoincrement="auto")
-    ticker: SQLAlchemyMapped[str] = sqlalchemy_mapped_column(sqlalchemy.String(length=10), nullable=False)
+    # Natural key of a bar; re-ingested bars are upserted against it. A hypertable's primary key has to contain
+    # its partitioning column, and this one is all the table needs: no surrogate id, no second unique index.
+    symbol_id: SQLAlchemyMapped[int] = sqlalchemy_mapped_column(
+        sqlalchemy.ForeignKey("symbols.id"), primary_key=True, nullable=False
+    )
     timestamp: SQLAlchemyMapped[datetime.datetime] = sqlalchemy_mapped_column(
-        sqlalchemy.DateTime(timezone=True), nullable=False
+        sqlalchemy.DateTime(timezone=True), primary_key=True, nullable=False
     )
     open_price: SQLAlchemyMapped[float] = sqlalchemy_mapped_column(sqlalchemy.Float, nullable=False)
     high_price: SQLAlchemyMapped[float] = sqlalchemy_mapped_column(sqlalchemy.Float, nullable=False)
     low_price: SQLAlchemyMapped[float] = sqlalchemy_mapped_column(sqlalchemy.Float, nullable=False)
     close_price: SQLAlchemyMapped[float] = sqlalchemy_mapped_column(sqlalchemy.Float, nullable=False)
     volume: SQLAlchemyMapped[int] = sqlalchemy_mapped_column(sqlalchemy.BigInteger, nullable=False)
-    created_at: SQLAlchemyMapped[datetime.datetime] = sqlalchemy_mapped_column(
-        sqlalchemy.DateTime(timezone=True), nullable=False, server_default=sqlalchemy_functions.now()
-    )
+    # Not stored: filled in by the query that loads the bar (`with_expression`) or by whoever builds it
+    ticker: SQLAlchemyMapped[str | None] = sqlalchemy_query_expression()
+
 
-    __table_args__ = (
-        sqlalchemy.Index('idx_market_data_ticker_timestamp', 'ticker', 'timestamp'),
-        # TimescaleDB hypertable configuration
-        {'timescaledb_hypertable': {
-            'time_column_name': 'timestamp',
-            'chunk_time_interval': '1 day',
-            'if_not_exists': True
-        }}
-    ) 
\ No newline at end of file
+# Cross-ticker scans over a time range, e.g. continuous aggregate refreshes. The table is turned into a hypertable,
+# chunked by `timestamp`, by the initial migration.
+sqlalchemy.Index("idx_market_data_timestamp", MarketData.timestamp.desc())
@@ -1 +1,4 @@
+# Every model has to be imported here, so `Base.metadata` is complete for Alembic
+from src.models.db.account import Account  # noqa: F401
+from src.models.db.market import MarketData, Symbol  # noqa: F401
 from src.repository.table import Base
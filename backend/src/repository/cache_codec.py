@@ -0,0 +1,121 @@
+import abc
+import dataclasses
+import zlib
+
+import loguru
+
+# Compressed payloads start with a NUL byte, which no JSON document does, followed by the id of the codec
+# that wrote them. Payloads below the threshold are stored as-is, so they stay readable (and spliceable)
+# and entries written before compression was enabled keep working.
+COMPRESSED_MARKER = b"\x00"
+
+
+class CacheCodec(abc.ABC):
+    """
+    A compression scheme for cached payloads, constructed with a compression `level`. `codec_id` is written
+    in front of every payload it produces, so it must stay stable once data is cached with it.
+    """
+
+    name: str
+    codec_id: int
+
+    def __init__(self, level: int):
+        self.level = level
+
+    @abc.abstractmethod
+    def compress(self, payload: bytes) -> bytes: ...
+
+    @abc.abstractmethod
+    def decompress(self, payload: bytes) -> bytes: ...
+
+
+class ZlibCodec(CacheCodec):
+    name = "zlib"
+    codec_id = 1
+
+    def compress(self, payload: bytes) -> bytes:
+        return zlib.compress(payload, self.level)
+
+    def decompress(self, payload: bytes) -> bytes:
+        return zlib.decompress(payload)
+
+
+CACHE_CODECS: dict[str, type[CacheCodec]] = {codec.name: codec for codec in (ZlibCodec,)}
+
+
+@dataclasses.dataclass
+class CacheCodecMetrics:
+    writes: int = 0
+    compressed_writes: int = 0
+    raw_bytes: int = 0
+    stored_bytes: int = 0
+    decode_errors: int = 0
+
+    @property
+    def compression_ratio(self) -> float:
+        return round(self.raw_bytes / self.stored_bytes, 3) if self.stored_bytes else 1.0
+
+    def snapshot(self) -> dict[str, int | float]:
+        return {**dataclasses.asdict(self), "compression_ratio": self.compression_ratio}
+
+
+class CachePayloadCodec:
+    """
+    Compresses byte payloads of at least `threshold` bytes on the way into Redis and restores them on the way
+    out. Reads recognise every registered codec, so changing the configured one does not orphan cached data.
+    """
+
+    def __init__(self, codec: CacheCodec | None, threshold: int):
+        self.codec = codec
+        self.threshold = threshold
+        self.metrics = CacheCodecMetrics()
+        # The level only matters when compressing
+        self._decoders: dict[int, CacheCodec] = {
+            codec_class.codec_id: codec_class(level=0) for codec_class in CACHE_CODECS.values()
+        }
+        if codec is not None:
+            self._decoders[codec.codec_id] = codec
+
+    @classmethod
+    def from_name(cls, name: str, threshold: int, level: int) -> "CachePayloadCodec":
+        if name == "none":
+            return cls(codec=None, threshold=threshold)
+        if name not in CACHE_CODECS:
+            raise ValueError(
+                f"Unknown cache codec `{name}` (REDIS_CACHE_CODEC), expected one of: none, {', '.join(CACHE_CODECS)}"
+            )
+        return cls(codec=CACHE_CODECS[name](level=level), threshold=threshold)
+
+    def snapshot(self) -> dict[str, str | int | float]:
+        return {"codec": self.codec.name if self.codec else "none", **self.metrics.snapshot()}
+
+    def encode(self, payload: bytes) -> bytes:
+        stored = payload
+        if self.codec is not None and len(payload) >= self.threshold:
+            compressed = COMPRESSED_MARKER + bytes([self.codec.codec_id]) + self.codec.compress(payload)
+            # Incompressible payloads are kept as they are rather than paying for decompression on every read
+            if len(compressed) < len(payload):
+                stored = compressed
+                self.metrics.compressed_writes += 1
+
+        self.metrics.writes += 1
+        self.metrics.raw_bytes += len(payload)
+        self.metrics.stored_bytes += len(stored)
+        return stored
+
+    def decode(self, stored: bytes | None) -> bytes | None:
+        """
+        The payload `encode` was given. An entry that cannot be restored (truncated, corrupt or written by a
+        codec this process does not know) is logged and read as a cache miss.
+        """
+        if not stored or not stored.startswith(COMPRESSED_MARKER):
+            return stored
+        decoder = self._decoders.get(stored[1]) if len(stored) > 1 else None
+        try:
+            if decoder is None:
+                raise ValueError(f"unknown codec id {stored[1:2]!r}")
+            return decoder.decompress(stored[2:])
+        except Exception as e:
+            self.metrics.decode_errors += 1
+            loguru.logger.warning(f"Unreadable cache payload dropped as a miss: {str(e)}")
+            return None
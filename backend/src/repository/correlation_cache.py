@@ -0,0 +1,138 @@
+import contextlib
+import datetime
+import hashlib
+import typing
+
+import numpy
+
+from src.config.manager import settings
+from src.indicators.returns import log_returns, pairwise_moments
+from src.repository.crud.market import MarketDataCRUDRepository
+from src.repository.market_cache import as_utc, EMPTY_CACHED_BODY, range_cache_key
+from src.repository.redis import RedisClient
+from src.repository.single_flight import SingleFlight
+from src.repository.timescale import OhlcvInterval
+from src.utilities.formatters.json_formatter import format_into_json_bytes
+
+# Markets are closed most of the calendar: `window` bars are looked for within this many times their span
+LOOKBACK_SPANS = 3
+MONTH = datetime.timedelta(days=31)
+
+
+def correlation_cache_key(
+    tickers: typing.Sequence[str], interval: OhlcvInterval, window: int, end_time: datetime.datetime
+) -> str:
+    # The universe is hashed: hundreds of tickers make a poor Redis key
+    universe = hashlib.sha1(",".join(tickers).encode()).hexdigest()
+    return range_cache_key(f"correlation:{interval.name}:{window}", universe, interval.duration or MONTH, end_time)
+
+
+async def load_close_matrix(
+    market_repo: MarketDataCRUDRepository,
+    tickers: typing.Sequence[str],
+    interval: OhlcvInterval,
+    window: int,
+    end_time: datetime.datetime,
+) -> tuple[list[datetime.datetime], numpy.ndarray]:
+    """
+    The last `window` buckets of `interval` up to `end_time` any of `tickers` has a bar in, oldest first, and
+    their closes as a `(buckets, tickers)` matrix with NaN for missing bars. Rows are written straight into
+    the preallocated matrix as they stream in, and the cursor is closed once `window` buckets are filled.
+    """
+    columns = {ticker: column for column, ticker in enumerate(tickers)}
+    closes = numpy.full((window, len(tickers)), numpy.nan)
+    buckets: list[datetime.datetime] = []
+
+    batches = market_repo.stream_closes(
+        tickers=list(tickers),
+        interval=interval,
+        start_time=end_time - LOOKBACK_SPANS * window * (interval.duration or MONTH),
+        end_time=end_time,
+        batch_size=settings.MARKET_STREAM_BATCH_SIZE,
+    )
+    filled = False
+    async with contextlib.aclosing(batches):
+        async for batch in batches:
+            for row in batch:
+                if not buckets or row["bucket"] != buckets[-1]:
+                    filled = len(buckets) == window
+                    if filled:
+                        break
+                    buckets.append(row["bucket"])
+                closes[len(buckets) - 1, columns[row["ticker"]]] = row["close_price"]
+            if filled:
+                break
+
+    return buckets[::-1], closes[: len(buckets)][::-1]
+
+
+class ReturnCorrelationCache:
+    """
+    Log-return covariance and correlation matrices of a ticker universe over its last `window` returns,
+    cached in Redis as the finished response body per universe, interval, window and bucket of `end_time`.
+    """
+
+    def __init__(
+        self,
+        redis_client: RedisClient,
+        market_repo: MarketDataCRUDRepository,
+        single_flight: SingleFlight | None = None,
+    ):
+        self.redis_client = redis_client
+        self.market_repo = market_repo
+        self.single_flight = single_flight
+
+    async def get_correlation(
+        self,
+        tickers: typing.Sequence[str],
+        interval: OhlcvInterval,
+        window: int,
+        end_time: datetime.datetime | None = None,
+    ) -> bytes | None:
+        """
+        Response body for `tickers` in sorted order, or None when none of them has bars in the range.
+        """
+        universe = sorted(set(tickers))
+        end = as_utc(end_time) if end_time else datetime.datetime.now(tz=datetime.timezone.utc)
+        key = correlation_cache_key(universe, interval, window, end)
+
+        body = await self.redis_client.get_bytes(key)
+        if body is None and self.single_flight is None:
+            body = await self._compute(key=key, tickers=universe, interval=interval, window=window, end_time=end)
+        elif body is None:
+            body = await self.single_flight.do(
+                key=key,
+                load=lambda: self._compute(key=key, tickers=universe, interval=interval, window=window, end_time=end),
+                read_cached=lambda: self.redis_client.get_bytes(key),
+            )
+        return body or None
+
+    async def _compute(
+        self, key: str, tickers: list[str], interval: OhlcvInterval, window: int, end_time: datetime.datetime
+    ) -> bytes:
+        # `window` returns take one more close
+        buckets, closes = await load_close_matrix(
+            self.market_repo, tickers=tickers, interval=interval, window=window + 1, end_time=end_time
+        )
+        listed = ~numpy.isnan(closes).all(axis=0)
+        if not listed.any():
+            # Remembered briefly, so repeated requests for an unlisted universe are coalesced and served cached
+            await self.redis_client.set(key, EMPTY_CACHED_BODY, expire=settings.MARKET_CACHE_EMPTY_TTL)
+            return EMPTY_CACHED_BODY
+
+        moments = pairwise_moments(log_returns(closes[:, listed]))
+        body = format_into_json_bytes({
+            "tickers": [ticker for ticker, present in zip(tickers, listed) if present],
+            "missing": [ticker for ticker, present in zip(tickers, listed) if not present],
+            "interval": interval.name,
+            "window": window,
+            "start": buckets[0].isoformat(),
+            "end": buckets[-1].isoformat(),
+            "returns": len(buckets) - 1,
+            # NaN (too few common returns) is written as null
+            "covariance": moments.covariance.tolist(),
+            "correlation": moments.correlation.tolist(),
+            "observations": moments.observations.tolist(),
+        })
+        await self.redis_client.set(key, body, expire=settings.MARKET_CORRELATION_TTL)
+        return body
@@ -1,10 +1,18 @@
 import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Iterable
 
-from sqlalchemy import select, text, bindparam, String, DateTime
+from sqlalchemy import select, text, tuple_, bindparam, func, literal, Integer, String, DateTime, TextClause
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.orm import with_expression
 
-from src.models.db.market import MarketData
+from src.models.db.market import MARKET_BAR_COLUMNS, MarketBar, MarketData
 from src.repository.crud.base import BaseCRUDRepository
+from src.repository.symbols import symbol_cache
+from src.repository.timescale import OHLCV_INTERVALS, OhlcvInterval
+
+MARKET_DATA_STAGING_TABLE = "market_data_staging"
+# Stored columns of a bar: `MARKET_BAR_COLUMNS` with the ticker replaced by its symbol id
+MARKET_DATA_COLUMNS: tuple[str, ...] = ("symbol_id", *MARKET_BAR_COLUMNS[1:])
 
 
 class MarketDataCRUDRepository(BaseCRUDRepository):
@@ -21,106 +29,400 @@ class MarketDataCRUDRepository(BaseCRUDRepository):
             await self.async_session.refresh(market_data)
         return market_data_list
 
+    async def copy_market_bars(self, market_bars: Iterable[MarketBar]) -> int:
+        """
+        Stream plain bar tuples with asyncpg's binary COPY into a transaction-scoped staging table and merge
+        them into `market_data` on `(symbol_id, timestamp)`, giving new tickers an id on the way. Returns the
+        number of rows inserted or changed.
+        """
+        await self.async_session.execute(text(f"""
+            CREATE TEMPORARY TABLE IF NOT EXISTS {MARKET_DATA_STAGING_TABLE} (
+                ticker VARCHAR(10) NOT NULL,
+                timestamp TIMESTAMPTZ NOT NULL,
+                open_price DOUBLE PRECISION NOT NULL,
+                high_price DOUBLE PRECISION NOT NULL,
+                low_price DOUBLE PRECISION NOT NULL,
+                close_price DOUBLE PRECISION NOT NULL,
+                volume BIGINT NOT NULL
+            ) ON COMMIT DROP
+        """))
+
+        connection = await self.async_session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            MARKET_DATA_STAGING_TABLE,
+            records=market_bars,
+            columns=MARKET_BAR_COLUMNS,
+        )
+
+        # Tickers seen for the first time get their id, the same way as in `CREATE_MISSING_SYMBOLS`
+        await self.async_session.execute(text(f"""
+            INSERT INTO symbols (ticker)
+            SELECT DISTINCT ticker FROM {MARKET_DATA_STAGING_TABLE} AS staging
+            WHERE NOT EXISTS (SELECT 1 FROM symbols WHERE symbols.ticker = staging.ticker)
+            ON CONFLICT (ticker) DO NOTHING
+        """))
+
+        # DISTINCT ON: a single INSERT .. ON CONFLICT DO UPDATE must not touch the same key twice
+        columns = ", ".join(MARKET_DATA_COLUMNS)
+        result = await self.async_session.execute(text(f"""
+            INSERT INTO market_data ({columns})
+            SELECT DISTINCT ON (symbols.id, staging.timestamp) symbols.id, {", ".join(MARKET_BAR_COLUMNS[1:])}
+            FROM {MARKET_DATA_STAGING_TABLE} AS staging
+            JOIN symbols ON symbols.ticker = staging.ticker
+            ORDER BY symbols.id, staging.timestamp
+            ON CONFLICT (symbol_id, timestamp) DO UPDATE SET
+                open_price = EXCLUDED.open_price,
+                high_price = EXCLUDED.high_price,
+                low_price = EXCLUDED.low_price,
+                close_price = EXCLUDED.close_price,
+                volume = EXCLUDED.volume
+            WHERE (market_data.open_price, market_data.high_price, market_data.low_price,
+                   market_data.close_price, market_data.volume)
+                IS DISTINCT FROM
+                  (EXCLUDED.open_price, EXCLUDED.high_price, EXCLUDED.low_price,
+                   EXCLUDED.close_price, EXCLUDED.volume)
+        """))
+        await self.async_session.commit()
+        return result.rowcount
+
+    async def insert_market_bars(self, market_bars: Iterable[MarketBar], batch_size: int = 4000) -> int:
+        """
+        Multi-row INSERT .. ON CONFLICT fallback for drivers without COPY support; one statement per
+        `batch_size` bars keeps every statement below PostgreSQL's 32767 bind parameter limit.
+        """
+        upserted = 0
+        batch: Dict[tuple, MarketBar] = {}
+        for market_bar in market_bars:
+            # Later bars win, mirroring the DISTINCT ON of the COPY path
+            batch[(market_bar[0], market_bar[1])] = market_bar
+            if len(batch) == batch_size:
+                upserted += await self._upsert_market_bar_batch(list(batch.values()))
+                batch = {}
+        if batch:
+            upserted += await self._upsert_market_bar_batch(list(batch.values()))
+
+        await self.async_session.commit()
+        return upserted
+
+    async def _upsert_market_bar_batch(self, batch: List[MarketBar]) -> int:
+        symbol_ids = await symbol_cache.get_ids(
+            self.async_session, (market_bar[0] for market_bar in batch), create=True
+        )
+        stmt = postgresql_insert(MarketData).values([
+            dict(zip(MARKET_DATA_COLUMNS, (symbol_ids[market_bar[0]], *market_bar[1:]))) for market_bar in batch
+        ])
+        updated_columns = {column: stmt.excluded[column] for column in MARKET_DATA_COLUMNS[2:]}
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MarketData.symbol_id, MarketData.timestamp],
+            set_=updated_columns,
+            where=tuple_(*(MarketData.__table__.c[column] for column in updated_columns)).is_distinct_from(
+                tuple_(*updated_columns.values())
+            ),
+        )
+        result = await self.async_session.execute(stmt)
+        return result.rowcount
+
+    async def get_latest_timestamps(self, tickers: List[str]) -> Dict[str, datetime.datetime]:
+        """
+        Ingestion high-water mark: the newest stored bar per ticker, one index seek per ticker in one query.
+        Tickers without any stored bar are left out.
+        """
+        query = text("""
+            SELECT symbols.ticker, latest.timestamp
+            FROM symbols
+            CROSS JOIN LATERAL (
+                SELECT timestamp FROM market_data
+                WHERE market_data.symbol_id = symbols.id
+                ORDER BY timestamp DESC
+                LIMIT 1
+            ) AS latest
+            WHERE symbols.ticker = ANY(CAST(:tickers AS VARCHAR[]))
+        """)
+        result = await self.async_session.execute(query, {"tickers": tickers})
+        return {row.ticker: row.timestamp for row in result.fetchall()}
+
+    async def get_first_timestamp(self, ticker: str) -> Optional[datetime.datetime]:
+        """
+        Timestamp of the oldest stored bar of `ticker`, `None` if it has none or is unknown.
+        """
+        symbol_id = await symbol_cache.get_id(self.async_session, ticker)
+        if symbol_id is None:
+            return None
+        return await self.async_session.scalar(
+            select(func.min(MarketData.timestamp)).where(MarketData.symbol_id == symbol_id)
+        )
+
     async def get_market_data(
         self,
         ticker: str,
         start_time: Optional[datetime.datetime] = None,
         end_time: Optional[datetime.datetime] = None,
-        limit: int = 100
+        limit: Optional[int] = 100
     ) -> List[MarketData]:
-        query = select(MarketData).where(MarketData.ticker == ticker)
+        symbol_id = await symbol_cache.get_id(self.async_session, ticker)
+        if symbol_id is None:
+            return []
+        query = (
+            select(MarketData)
+            .options(with_expression(MarketData.ticker, literal(ticker, String)))
+            .where(MarketData.symbol_id == symbol_id)
+        )
         
         if start_time:
             query = query.where(MarketData.timestamp >= start_time)
         if end_time:
             query = query.where(MarketData.timestamp <= end_time)
             
-        query = query.order_by(MarketData.timestamp.desc()).limit(limit)
-        
+        query = query.order_by(MarketData.timestamp.desc())
+        if limit is not None:
+            query = query.limit(limit)
+
         result = await self.async_session.execute(query)
         return result.scalars().all()
 
+    async def stream_market_data(
+        self,
+        ticker: str,
+        start_time: Optional[datetime.datetime] = None,
+        end_time: Optional[datetime.datetime] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Bars of `ticker` newest first, `batch_size` at a time from a server-side cursor, so memory stays flat
+        however wide the range is. Plain column rows, nothing is added to the session's identity map.
+        """
+        symbol_id = await symbol_cache.get_id(self.async_session, ticker)
+        if symbol_id is None:
+            return
+        query = select(
+            literal(ticker, String).label("ticker"),
+            *(MarketData.__table__.c[column] for column in MARKET_BAR_COLUMNS[1:])
+        ).where(MarketData.symbol_id == symbol_id)
+        if start_time:
+            query = query.where(MarketData.timestamp >= start_time)
+        if end_time:
+            query = query.where(MarketData.timestamp <= end_time)
+        query = query.order_by(MarketData.timestamp.desc()).execution_options(yield_per=batch_size)
+
+        result = await self.async_session.stream(query)
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
     async def get_latest_market_data(self, ticker: str) -> Optional[MarketData]:
+        symbol_id = await symbol_cache.get_id(self.async_session, ticker)
+        if symbol_id is None:
+            return None
         query = text("""
-            SELECT * FROM market_data 
-            WHERE ticker = :ticker 
-            ORDER BY timestamp DESC 
+            SELECT
+                CAST(:ticker AS VARCHAR) AS ticker, timestamp, open_price, high_price, low_price, close_price, volume
+            FROM market_data
+            WHERE symbol_id = :symbol_id
+            ORDER BY timestamp DESC
             LIMIT 1
         """)
-        result = await self.async_session.execute(query, {"ticker": ticker})
+        result = await self.async_session.execute(query, {"ticker": ticker, "symbol_id": symbol_id})
         row = result.first()
         if row:
             return MarketData(**row._mapping)
         return None
 
-    async def get_daily_aggregates(
+    @staticmethod
+    def _ohlcv_source(interval: OhlcvInterval) -> tuple[str, str, bool]:
+        """
+        Relation and time column bars of `interval` are read from, and whether they still have to be rolled up
+        into buckets of `interval`: only when no continuous aggregate materializes it as is.
+        """
+        source = interval.rollup_source
+        if source is not None and source.bucket_duration == interval.duration:
+            return source.view_name, "bucket", False
+        return (source.view_name, "bucket", True) if source else ("market_data", "timestamp", True)
+
+    @staticmethod
+    def _ohlcv_query(interval: OhlcvInterval) -> TextClause:
+        """
+        Bars of `interval` newest first. An interval a continuous aggregate already materializes is read as
+        is; any other is rolled up from the coarsest aggregate that tiles it, and from raw bars only when none
+        does. `start_time` and `end_time` select whole buckets: the first one is not cut at `start_time`.
+        """
+        relation, time_column, rolled_up = MarketDataCRUDRepository._ohlcv_source(interval)
+        if not rolled_up:
+            query = f"""
+                SELECT
+                    bucket,
+                    open_price,
+                    high_price,
+                    low_price,
+                    close_price,
+                    volume
+                FROM {relation}
+                WHERE symbol_id = :symbol_id
+                AND (:start_time IS NULL OR bucket >= time_bucket(INTERVAL '{interval.bucket_width}', :start_time))
+                AND (:end_time IS NULL OR bucket <= :end_time)
+                ORDER BY bucket DESC
+            """
+        else:
+            width = f"INTERVAL '{interval.bucket_width}'"
+            query = f"""
+                SELECT
+                    time_bucket({width}, {time_column}) AS bucket,
+                    first(open_price, {time_column}) AS open_price,
+                    max(high_price) AS high_price,
+                    min(low_price) AS low_price,
+                    last(close_price, {time_column}) AS close_price,
+                    sum(volume) AS volume
+                FROM {relation}
+                WHERE symbol_id = :symbol_id
+                AND (:start_time IS NULL OR {time_column} >= time_bucket({width}, :start_time))
+                AND (:end_time IS NULL OR {time_column} < time_bucket({width}, :end_time) + {width})
+                GROUP BY 1
+                ORDER BY 1 DESC
+            """
+
+        return text(query).bindparams(
+            bindparam("symbol_id", type_=Integer),
+            bindparam("start_time", type_=DateTime),
+            bindparam("end_time", type_=DateTime)
+        )
+
+    async def get_ohlcv(
         self,
         ticker: str,
+        interval: OhlcvInterval,
         start_time: Optional[datetime.datetime] = None,
         end_time: Optional[datetime.datetime] = None
     ) -> List[Dict[str, Any]]:
-        query = text("""
-            SELECT 
-                time_bucket('1 day', timestamp) as bucket,
-                first(open_price, timestamp) as open_price,
-                max(high_price) as high_price,
-                min(low_price) as low_price,
-                last(close_price, timestamp) as close_price,
-                sum(volume) as volume
-            FROM market_data
-            WHERE ticker = :ticker
-            AND (:start_time IS NULL OR timestamp >= :start_time)
-            AND (:end_time IS NULL OR timestamp <= :end_time)
-            GROUP BY bucket
-            ORDER BY bucket DESC
-        """).bindparams(
-            bindparam("ticker", type_=String),
-            bindparam("start_time", type_=DateTime),
-            bindparam("end_time", type_=DateTime)
-        )
-        
+        symbol_id = await symbol_cache.get_id(self.async_session, ticker)
+        if symbol_id is None:
+            return []
         result = await self.async_session.execute(
-            query,
+            self._ohlcv_query(interval),
             {
-                "ticker": ticker,
+                "symbol_id": symbol_id,
                 "start_time": start_time,
                 "end_time": end_time
             }
         )
-        return [dict(row._mapping) for row in result]
+        return [dict(row._mapping) for row in result.fetchall()]
 
-    async def get_hourly_aggregates(
+    async def stream_ohlcv(
         self,
         ticker: str,
+        interval: OhlcvInterval,
         start_time: Optional[datetime.datetime] = None,
-        end_time: Optional[datetime.datetime] = None
-    ) -> List[Dict[str, Any]]:
-        query = text("""
-            SELECT 
-                time_bucket('1 hour', timestamp) as bucket,
-                first(open_price, timestamp) as open_price,
-                max(high_price) as high_price,
-                min(low_price) as low_price,
-                last(close_price, timestamp) as close_price,
-                sum(volume) as volume
-            FROM market_data
-            WHERE ticker = :ticker
-            AND (:start_time IS NULL OR timestamp >= :start_time)
-            AND (:end_time IS NULL OR timestamp <= :end_time)
-            GROUP BY bucket
-            ORDER BY bucket DESC
-        """).bindparams(
-            bindparam("ticker", type_=String),
+        end_time: Optional[datetime.datetime] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Same bars as `get_ohlcv`, `batch_size` at a time from a server-side cursor.
+        """
+        symbol_id = await symbol_cache.get_id(self.async_session, ticker)
+        if symbol_id is None:
+            return
+        result = await self.async_session.stream(
+            self._ohlcv_query(interval).execution_options(yield_per=batch_size),
+            {"symbol_id": symbol_id, "start_time": start_time, "end_time": end_time}
+        )
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+    @staticmethod
+    def _closes_query(interval: OhlcvInterval) -> TextClause:
+        """
+        Close of every symbol in `:symbol_ids` per bucket of `interval` within `[start_time, end_time]`, newest
+        bucket first, read from the same source as `_ohlcv_query`. Rows carry the ticker, joined back from
+        `symbols` once the ids have filtered the source.
+        """
+        relation, time_column, rolled_up = MarketDataCRUDRepository._ohlcv_source(interval)
+        width = f"INTERVAL '{interval.bucket_width}'"
+        if not rolled_up:
+            query = f"""
+                SELECT symbols.ticker, source.bucket, source.close_price
+                FROM {relation} AS source
+                JOIN symbols ON symbols.id = source.symbol_id
+                WHERE source.symbol_id = ANY(CAST(:symbol_ids AS INTEGER[]))
+                AND source.bucket >= time_bucket({width}, :start_time)
+                AND source.bucket <= :end_time
+                ORDER BY source.bucket DESC
+            """
+        else:
+            query = f"""
+                SELECT
+                    symbols.ticker,
+                    time_bucket({width}, source.{time_column}) AS bucket,
+                    last(source.close_price, source.{time_column}) AS close_price
+                FROM {relation} AS source
+                JOIN symbols ON symbols.id = source.symbol_id
+                WHERE source.symbol_id = ANY(CAST(:symbol_ids AS INTEGER[]))
+                AND source.{time_column} >= time_bucket({width}, :start_time)
+                AND source.{time_column} < time_bucket({width}, :end_time) + {width}
+                GROUP BY 1, 2
+                ORDER BY 2 DESC
+            """
+
+        return text(query).bindparams(
             bindparam("start_time", type_=DateTime),
             bindparam("end_time", type_=DateTime)
         )
-        
-        result = await self.async_session.execute(
-            query,
-            {
-                "ticker": ticker,
-                "start_time": start_time,
-                "end_time": end_time
-            }
+
+    async def stream_closes(
+        self,
+        tickers: List[str],
+        interval: OhlcvInterval,
+        start_time: datetime.datetime,
+        end_time: datetime.datetime,
+        batch_size: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Closes of many tickers aligned on the buckets of `interval` in one statement, newest bucket first and
+        `batch_size` rows at a time from a server-side cursor, so a caller that has enough can stop early.
+        """
+        symbol_ids = await symbol_cache.get_ids(self.async_session, tickers)
+        if not symbol_ids:
+            return
+        result = await self.async_session.stream(
+            self._closes_query(interval).execution_options(yield_per=batch_size),
+            {"symbol_ids": list(symbol_ids.values()), "start_time": start_time, "end_time": end_time}
+        )
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+    async def get_latest_market_data_bulk(self, tickers: List[str]) -> List[MarketData]:
+        """
+        Latest bar of every ticker in one statement: a LATERAL seek per ticker on the `(symbol_id, timestamp)`
+        primary key, so the cost grows with the watchlist, not with the table.
+        """
+        query = text("""
+            SELECT symbols.ticker, latest.*
+            FROM symbols
+            CROSS JOIN LATERAL (
+                SELECT timestamp, open_price, high_price, low_price, close_price, volume
+                FROM market_data
+                WHERE market_data.symbol_id = symbols.id
+                ORDER BY timestamp DESC
+                LIMIT 1
+            ) AS latest
+            WHERE symbols.ticker = ANY(CAST(:tickers AS VARCHAR[]))
+        """)
+        result = await self.async_session.execute(query, {"tickers": tickers})
+        return [MarketData(**row._mapping) for row in result.fetchall()]
+
+    async def get_daily_aggregates(
+        self,
+        ticker: str,
+        start_time: Optional[datetime.datetime] = None,
+        end_time: Optional[datetime.datetime] = None
+    ) -> List[Dict[str, Any]]:
+        return await self.get_ohlcv(
+            ticker=ticker, interval=OHLCV_INTERVALS["1d"], start_time=start_time, end_time=end_time
+        )
+
+    async def get_hourly_aggregates(
+        self,
+        ticker: str,
+        start_time: Optional[datetime.datetime] = None,
+        end_time: Optional[datetime.datetime] = None
+    ) -> List[Dict[str, Any]]:
+        return await self.get_ohlcv(
+            ticker=ticker, interval=OHLCV_INTERVALS["1h"], start_time=start_time, end_time=end_time
         )
-        return [dict(row._mapping) for row in result]
\ No newline at end of file
@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import (
     AsyncSession as SQLAlchemyAsyncSession,
     create_async_engine as create_sqlalchemy_async_engine,
 )
-from sqlalchemy.pool import Pool as SQLAlchemyPool, QueuePool as SQLAlchemyQueuePool
+from sqlalchemy.pool import AsyncAdaptedQueuePool as SQLAlchemyAsyncAdaptedQueuePool, Pool as SQLAlchemyPool
 
 from src.config.manager import settings
 
@@ -20,10 +20,12 @@ class AsyncDatabase:
             echo=settings.IS_DB_ECHO_LOG,
             pool_size=settings.DB_POOL_SIZE,
             max_overflow=settings.DB_POOL_OVERFLOW,
-            poolclass=SQLAlchemyQueuePool,
+            poolclass=SQLAlchemyAsyncAdaptedQueuePool,
             connect_args={"server_settings": {"application_name": "investlink_timescale"}}
         )
-        self.async_session: SQLAlchemyAsyncSession = SQLAlchemyAsyncSession(bind=self.async_engine)
+        self.async_session_factory: sqlalchemy_async_sessionmaker[SQLAlchemyAsyncSession] = (
+            sqlalchemy_async_sessionmaker(bind=self.async_engine, expire_on_commit=settings.IS_DB_EXPIRE_ON_COMMIT)
+        )
         self.pool: SQLAlchemyPool = self.async_engine.pool
 
     @property
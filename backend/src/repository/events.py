@@ -1,14 +1,21 @@
+import asyncio
+
 import fastapi
 import loguru
-from sqlalchemy import event, text
+from sqlalchemy import event
 from sqlalchemy.dialects.postgresql.asyncpg import AsyncAdapt_asyncpg_connection
-from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSessionTransaction
+from sqlalchemy.ext.asyncio import AsyncSessionTransaction
 from sqlalchemy.pool.base import _ConnectionRecord
 
+from src.config.manager import settings
 from src.repository.database import async_db
+from src.repository.local_cache import LocalCache
+from src.repository.market_broadcast import MarketBroadcaster
+from src.repository.market_cache import listen_for_market_data_invalidations
 from src.repository.redis import RedisClient
-from src.repository.table import Base
-from src.scheduler import start_scheduler
+from src.repository.schema import verify_schema_version
+from src.repository.single_flight import SingleFlight
+from src.scheduler.runner import create_ingest_lease, run_ingester
 
 
 @event.listens_for(target=async_db.async_engine.sync_engine, identifier="connect")
@@ -27,30 +34,32 @@ def inspect_db_server_on_close(
     loguru.logger.info(f"Closed Connection Record ---\n {connection_record}")
 
 
-async def initialize_db_tables(connection: AsyncConnection) -> None:
-    loguru.logger.info("Database Table Creation --- Initializing . . .")
-
-    # Enable TimescaleDB extension
-    await connection.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb CASCADE;"))
-    
-    await connection.run_sync(Base.metadata.drop_all)
-    await connection.run_sync(Base.metadata.create_all)
-
-    loguru.logger.info("Database Table Creation --- Successfully Initialized!")
-
-
 async def initialize_db_connection(backend_app: fastapi.FastAPI) -> None:
     loguru.logger.info("Database Connection --- Establishing . . .")
 
     backend_app.state.db = async_db
-    backend_app.state.redis = RedisClient()
-
-    async with backend_app.state.db.async_engine.begin() as connection:
-        await initialize_db_tables(connection=connection)
-
-    # Start the scheduler
-    start_scheduler()
-    loguru.logger.info("Market data scheduler started")
+    backend_app.state.redis = RedisClient(
+        local_cache=LocalCache(max_entries=settings.LOCAL_CACHE_MAX_ENTRIES, ttl=settings.LOCAL_CACHE_TTL)
+    )
+    backend_app.state.single_flight = SingleFlight(redis_client=backend_app.state.redis)
+    backend_app.state.invalidation_listener = asyncio.create_task(
+        listen_for_market_data_invalidations(backend_app.state.redis)
+    )
+    backend_app.state.market_broadcaster = MarketBroadcaster(
+        redis_client=backend_app.state.redis, queue_size=settings.MARKET_PUSH_QUEUE_SIZE
+    )
+    backend_app.state.market_broadcast_listener = asyncio.create_task(backend_app.state.market_broadcaster.run())
+
+    async with backend_app.state.db.async_engine.connect() as connection:
+        revision = await verify_schema_version(connection=connection)
+    loguru.logger.info(f"Database Schema --- at revision {revision}")
+
+    # Every worker competes for the ingest lease and only its holder ingests; with a dedicated runner
+    # process deployed, workers stay out of ingestion altogether
+    if settings.INGEST_EMBEDDED:
+        backend_app.state.ingest_lease = create_ingest_lease(backend_app.state.redis)
+        backend_app.state.ingester = asyncio.create_task(run_ingester(backend_app.state.ingest_lease))
+        loguru.logger.info("Market data ingester started")
 
     loguru.logger.info("Database Connection --- Successfully Established!")
 
@@ -58,6 +67,12 @@ async def initialize_db_connection(backend_app: fastapi.FastAPI) -> None:
 async def dispose_db_connection(backend_app: fastapi.FastAPI) -> None:
     loguru.logger.info("Database Connection --- Disposing . . .")
 
+    backend_app.state.invalidation_listener.cancel()
+    backend_app.state.market_broadcast_listener.cancel()
+    if settings.INGEST_EMBEDDED:
+        # Awaited, so the lease is released before the Redis client closes
+        backend_app.state.ingester.cancel()
+        await asyncio.gather(backend_app.state.ingester, return_exceptions=True)
     await backend_app.state.db.async_engine.dispose()
     await backend_app.state.redis.close()
 
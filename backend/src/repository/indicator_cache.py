@@ -0,0 +1,84 @@
+import datetime
+import typing
+
+from src.config.manager import settings
+from src.indicators.engine import IndicatorEngine, IndicatorSpec, OhlcvArrays
+from src.repository.crud.market import MarketDataCRUDRepository
+from src.repository.redis import RedisClient
+from src.repository.timescale import OhlcvInterval
+from src.utilities.formatters.json_formatter import format_into_json_bytes, parse_json_bytes
+
+
+def indicator_cache_key(ticker: str, interval: OhlcvInterval, specs: typing.Sequence[IndicatorSpec]) -> str:
+    return f"indicators:{ticker}:{interval.name}:{','.join(spec.key for spec in specs)}"
+
+
+def indicator_keys_key(ticker: str) -> str:
+    return f"indicators:{ticker}:keys"
+
+
+async def invalidate_indicator_series(redis_client: RedisClient, ticker: str) -> int:
+    """
+    Drop every cached indicator series of `ticker`; needed when bars are written into its past (backfills),
+    which the incremental states cannot take back.
+    """
+    keys = await redis_client.smembers(indicator_keys_key(ticker))
+    return await redis_client.delete(*keys, indicator_keys_key(ticker)) if keys else 0
+
+
+class IndicatorSeriesCache:
+    """
+    Indicator series per ticker, interval and indicator set, cached in Redis together with the engine state
+    after the last closed bucket. A request only reads the buckets after that one: closed buckets advance
+    the state and are appended, while the bucket still forming is previewed and never stored, so its later
+    revisions are picked up.
+    """
+
+    def __init__(self, redis_client: RedisClient, market_repo: MarketDataCRUDRepository):
+        self.redis_client = redis_client
+        self.market_repo = market_repo
+
+    async def get_indicators(
+        self,
+        ticker: str,
+        interval: OhlcvInterval,
+        specs: typing.Sequence[IndicatorSpec],
+        now: datetime.datetime | None = None,
+    ) -> tuple[list[str], dict[str, list[float | None]]]:
+        now = now or datetime.datetime.now(tz=datetime.timezone.utc)
+        key = indicator_cache_key(ticker, interval, specs)
+
+        cached = await self.redis_client.get_bytes(key)
+        if cached is not None:
+            series = parse_json_bytes(cached)
+            engine = IndicatorEngine.from_dict(specs, series["states"])
+            timestamps, values = series["timestamps"], series["values"]
+            start_time = interval.next_bucket(datetime.datetime.fromisoformat(timestamps[-1])) if timestamps else None
+        else:
+            engine = IndicatorEngine(specs)
+            timestamps, values = [], {output: [] for output in engine.outputs}
+            start_time = None
+
+        data = await self.market_repo.get_ohlcv(ticker=ticker, interval=interval, start_time=start_time)
+        rows = data[::-1]
+        closed = [row for row in rows if interval.next_bucket(row["bucket"]) <= now]
+        forming = rows[len(closed):]
+
+        if closed or cached is None:
+            for output, column in engine.extend(OhlcvArrays.from_rows(closed)).items():
+                values[output].extend(column.tolist())
+            timestamps.extend(row["bucket"].isoformat() for row in closed)
+            await self.redis_client.set(
+                key,
+                format_into_json_bytes({"timestamps": timestamps, "values": values, "states": engine.to_dict()}),
+                expire=settings.INDICATOR_CACHE_TTL,
+            )
+            await self.redis_client.sadd(indicator_keys_key(ticker), key)
+
+        if not forming:
+            return timestamps, values
+        preview = engine.preview(OhlcvArrays.from_rows(forming))
+        return (
+            timestamps + [row["bucket"].isoformat() for row in forming],
+            {output: values[output] + preview[output].tolist() for output in engine.outputs},
+        )
@@ -0,0 +1,94 @@
+import collections
+import dataclasses
+import time
+
+
+@dataclasses.dataclass
+class LocalCacheMetrics:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    def snapshot(self) -> dict[str, int]:
+        return dataclasses.asdict(self)
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU of cached payloads, each kept for at most `ttl` seconds. It sits in front of Redis
+    in every worker, so hot keys are served without a round trip; the short TTL bounds staleness when an
+    invalidation broadcast is missed. Keys are also indexed by each of their `:`-separated parts, so a
+    ticker's entries are found without scanning the whole cache.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.metrics = LocalCacheMetrics()
+        self._entries: collections.OrderedDict[str, tuple[float, bytes]] = collections.OrderedDict()
+        self._keys_by_part: dict[str, set[str]] = collections.defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.metrics.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.metrics.expirations += 1
+            self.metrics.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.metrics.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if key not in self._entries:
+            for part in key.split(":"):
+                self._keys_by_part[part].add(key)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.metrics.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_ticker(self, ticker: str) -> int:
+        """
+        Drop every entry whose `:`-separated key mentions `ticker`, which covers each market cache key scheme.
+        """
+        stale = list(self._keys_by_part.get(ticker, ()))
+        self.delete(*stale)
+        self.metrics.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        self.metrics.invalidations += len(self._entries)
+        self._entries.clear()
+        self._keys_by_part.clear()
+
+    def _remove(self, key: str) -> None:
+        del self._entries[key]
+        for part in key.split(":"):
+            keys = self._keys_by_part[part]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_part[part]
+
+    def snapshot(self) -> dict[str, int | float]:
+        return {"entries": len(self), "max_entries": self.max_entries, "ttl": self.ttl, **self.metrics.snapshot()}
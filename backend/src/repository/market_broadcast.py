@@ -0,0 +1,121 @@
+import asyncio
+import dataclasses
+import typing
+
+import loguru
+
+from src.models.db.market import MARKET_BAR_COLUMNS, MarketBar
+from src.repository.redis import RedisClient
+from src.utilities.formatters.json_formatter import format_into_json_bytes
+
+BAR_CHANNEL_PREFIX = "market_data:bars:"
+
+
+def bar_channel(ticker: str) -> str:
+    return f"{BAR_CHANNEL_PREFIX}{ticker}"
+
+
+async def publish_market_bars(redis_client: RedisClient, ticker: str, bars: typing.Sequence[MarketBar]) -> int:
+    """
+    Publish freshly ingested bars of `ticker`, encoded once here so workers forward the bytes untouched.
+    """
+    if not bars:
+        return 0
+    message = format_into_json_bytes(
+        {"ticker": ticker, "bars": [dict(zip(MARKET_BAR_COLUMNS[1:], bar[1:])) for bar in bars]}
+    )
+    return await redis_client.publish(bar_channel(ticker), message)
+
+
+@dataclasses.dataclass
+class MarketBroadcastMetrics:
+    subscribers: int = 0
+    received: int = 0
+    delivered: int = 0
+    dropped: int = 0
+
+    def snapshot(self) -> dict[str, int]:
+        return dataclasses.asdict(self)
+
+
+class MarketSubscription:
+    """
+    One connected client: the tickers it follows and a bounded queue of messages waiting to be sent.
+    """
+
+    def __init__(self, tickers: typing.Iterable[str], queue_size: int):
+        self.tickers = frozenset(tickers)
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=queue_size)
+
+    def offer(self, message: bytes) -> bool:
+        """
+        Queue `message` without ever blocking the fan-out. A full queue means the client reads slower than
+        bars arrive; its oldest message goes, as a newer bar supersedes it anyway. Returns False on a drop.
+        """
+        dropped = False
+        if self.queue.full():
+            self.queue.get_nowait()
+            dropped = True
+        self.queue.put_nowait(message)
+        return not dropped
+
+    async def get(self) -> bytes:
+        return await self.queue.get()
+
+
+class MarketBroadcaster:
+    """
+    Fans bars published by the scheduler out to the WebSocket/SSE clients of this worker. A single Redis
+    subscription per worker serves every client, so the number of connections costs neither Redis
+    subscriptions nor database queries.
+    """
+
+    def __init__(self, redis_client: RedisClient, queue_size: int):
+        self.redis_client = redis_client
+        self.queue_size = queue_size
+        self.metrics = MarketBroadcastMetrics()
+        self._subscriptions: dict[str, set[MarketSubscription]] = {}
+
+    def subscribe(self, tickers: typing.Iterable[str]) -> MarketSubscription:
+        subscription = MarketSubscription(tickers=tickers, queue_size=self.queue_size)
+        for ticker in subscription.tickers:
+            self._subscriptions.setdefault(ticker, set()).add(subscription)
+        self.metrics.subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: MarketSubscription) -> None:
+        for ticker in subscription.tickers:
+            subscribers = self._subscriptions.get(ticker)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[ticker]
+        self.metrics.subscribers -= 1
+
+    def dispatch(self, channel: str, message: bytes) -> None:
+        self.metrics.received += 1
+        for subscription in self._subscriptions.get(channel.removeprefix(BAR_CHANNEL_PREFIX), ()):
+            if subscription.offer(message):
+                self.metrics.delivered += 1
+            else:
+                self.metrics.dropped += 1
+
+    async def run(self) -> None:
+        """
+        Forward published bars to local subscribers until cancelled, resubscribing when Redis drops the
+        connection.
+        """
+        while True:
+            pubsub = self.redis_client.pubsub(raw=True)
+            try:
+                await pubsub.psubscribe(f"{BAR_CHANNEL_PREFIX}*")
+                async for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        self.dispatch(message["channel"].decode(), message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                loguru.logger.warning(f"Market bar subscription lost: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
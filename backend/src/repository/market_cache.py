@@ -0,0 +1,271 @@
+import asyncio
+import datetime
+import typing
+
+import loguru
+
+from src.config.manager import settings
+from src.models.db.market import MarketData
+from src.repository.crud.market import MarketDataCRUDRepository
+from src.repository.redis import RedisClient
+from src.repository.single_flight import SingleFlight
+from src.utilities.formatters.json_formatter import format_into_json_bytes, parse_json_bytes
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+SEGMENT = datetime.timedelta(hours=settings.MARKET_CACHE_SEGMENT_HOURS)
+INVALIDATION_CHANNEL = "market_data:invalidate"
+# Cached for `MARKET_CACHE_EMPTY_TTL` in place of a response body when a query has no data
+EMPTY_CACHED_BODY = b""
+
+
+def as_utc(moment: datetime.datetime) -> datetime.datetime:
+    # Naive query parameters are taken as UTC, like the `timestamptz` column they are compared with
+    return moment.replace(tzinfo=datetime.timezone.utc) if moment.tzinfo is None else moment
+
+
+def align_to_segment(moment: datetime.datetime) -> datetime.datetime:
+    return EPOCH + ((as_utc(moment) - EPOCH) // SEGMENT) * SEGMENT
+
+
+def latest_cache_key(ticker: str) -> str:
+    return f"market_data:latest:{ticker}"
+
+
+def first_bar_key(ticker: str) -> str:
+    return f"market_data:{ticker}:first_bar"
+
+
+def segment_key(ticker: str, segment_start: datetime.datetime) -> str:
+    return f"market_data:{ticker}:segment:{int(segment_start.timestamp())}"
+
+
+def range_cache_key(prefix: str, ticker: str, bucket: datetime.timedelta, *bounds: datetime.datetime | None) -> str:
+    """
+    Cache key of a ranged query with every bound aligned to `bucket`, so equivalent requests share one entry
+    and different ranges never collide.
+    """
+    aligned = [
+        "-" if bound is None else str(int((EPOCH + ((as_utc(bound) - EPOCH) // bucket) * bucket).timestamp()))
+        for bound in bounds
+    ]
+    return ":".join([prefix, ticker, *aligned])
+
+
+def serialize_market_data(market_data: MarketData) -> dict[str, typing.Any]:
+    return {
+        "ticker": market_data.ticker,
+        "timestamp": market_data.timestamp.isoformat(),
+        "open_price": market_data.open_price,
+        "high_price": market_data.high_price,
+        "low_price": market_data.low_price,
+        "close_price": market_data.close_price,
+        "volume": market_data.volume,
+    }
+
+
+async def invalidate_market_data_segments(
+    redis_client: RedisClient, ticker: str, start: datetime.datetime, end: datetime.datetime
+) -> int:
+    """
+    Drop every cached segment of `ticker` overlapping `[start, end]`, and its first-bar watermark; called
+    wherever bars are written.
+    """
+    keys = [first_bar_key(ticker)]
+    segment_start = align_to_segment(start)
+    while segment_start <= as_utc(end):
+        keys.append(segment_key(ticker, segment_start))
+        segment_start += SEGMENT
+    return await redis_client.delete(*keys)
+
+
+async def publish_market_data_invalidation(redis_client: RedisClient, ticker: str) -> int:
+    """
+    Tell every worker to drop its in-process copies of `ticker`'s cached data; sent after new bars are written.
+    """
+    return await redis_client.publish(INVALIDATION_CHANNEL, ticker)
+
+
+async def listen_for_market_data_invalidations(redis_client: RedisClient) -> None:
+    """
+    Apply invalidation broadcasts to `redis_client`'s local cache until cancelled. While the subscription is
+    down the local cache is emptied, as broadcasts sent in the meantime are lost.
+    """
+    local_cache = redis_client.local_cache
+    if local_cache is None:
+        return
+
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    local_cache.invalidate_ticker(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            loguru.logger.warning(f"Market data invalidation subscription lost: {str(e)}")
+            local_cache.clear()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
+
+
+class MarketDataRangeCache:
+    """
+    Serves `/market/{ticker}` range queries from fixed, aligned time segments cached in Redis. Each segment
+    holds every bar of one ticker inside it, so any overlapping `(start_time, end_time, limit)` is answered
+    by filtering cached segments, and only the missing ones are read from the database in one query. Walks
+    stop at the ticker's oldest stored bar, so segments before it are never read or written.
+    """
+
+    def __init__(
+        self,
+        redis_client: RedisClient,
+        market_repo: MarketDataCRUDRepository,
+        single_flight: SingleFlight | None = None,
+    ):
+        self.redis_client = redis_client
+        self.market_repo = market_repo
+        self.single_flight = single_flight
+
+    async def get_market_data(
+        self,
+        ticker: str,
+        start_time: datetime.datetime | None = None,
+        end_time: datetime.datetime | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, typing.Any]]:
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        start = as_utc(start_time) if start_time else None
+        end = min(as_utc(end_time), now) if end_time else now
+        if start is not None and start > end:
+            return []
+
+        first_bar = await self._get_first_bar(ticker)
+        if first_bar is None:
+            return []
+        floor = first_bar if start is None else max(start, first_bar)
+        if floor > end:
+            return []
+
+        rows: list[dict[str, typing.Any]] = []
+        segment_start = align_to_segment(end)
+        walked = 0
+        while segment_start + SEGMENT > floor:
+            if walked >= settings.MARKET_CACHE_MAX_SEGMENTS:
+                # Sparse or open-ended ranges past the walk-back budget go straight to the database
+                market_data = await self.market_repo.get_market_data(
+                    ticker=ticker, start_time=start_time, end_time=end_time, limit=limit
+                )
+                return [serialize_market_data(item) for item in market_data]
+
+            batch = [segment_start - i * SEGMENT for i in range(settings.MARKET_CACHE_SEGMENT_BATCH)]
+            batch = [batch_start for batch_start in batch if batch_start + SEGMENT > floor]
+            segments = await self._load_segments(ticker=ticker, segment_starts=batch, now=now)
+
+            for batch_start in batch:
+                for row in segments[batch_start]:
+                    timestamp = as_utc(datetime.datetime.fromisoformat(row["timestamp"]))
+                    if timestamp > end or (start is not None and timestamp < start):
+                        continue
+                    rows.append(row)
+                    if len(rows) == limit:
+                        return rows
+
+            walked += len(batch)
+            segment_start = batch[-1] - SEGMENT
+
+        return rows
+
+    async def _get_first_bar(self, ticker: str) -> datetime.datetime | None:
+        """
+        Oldest stored bar of `ticker`, cached until bars are written; a ticker without any is remembered for
+        `MARKET_CACHE_EMPTY_TTL` only, so it shows up soon once ingested.
+        """
+        key = first_bar_key(ticker)
+        cached = await self.redis_client.get_bytes(key)
+        if cached is not None:
+            first_bar = parse_json_bytes(cached)
+            return None if first_bar is None else datetime.datetime.fromisoformat(first_bar)
+
+        timestamp = await self.market_repo.get_first_timestamp(ticker=ticker)
+        first_bar = None if timestamp is None else as_utc(timestamp)
+        await self.redis_client.set(
+            key,
+            format_into_json_bytes(None if first_bar is None else first_bar.isoformat()),
+            expire=settings.MARKET_CACHE_SEGMENT_TTL if first_bar is not None else settings.MARKET_CACHE_EMPTY_TTL,
+        )
+        return first_bar
+
+    async def _load_segments(
+        self, ticker: str, segment_starts: list[datetime.datetime], now: datetime.datetime
+    ) -> dict[datetime.datetime, list[dict[str, typing.Any]]]:
+        """
+        Segments keyed by start, each with its bars newest first. Misses are filled with one database query
+        over the span they cover and written back, empty segments included; concurrent fills of the same
+        segments are coalesced.
+        """
+        keys = [segment_key(ticker, segment_start) for segment_start in segment_starts]
+        cached = await self.redis_client.mget_bytes(keys)
+        segments = {
+            segment_start: parse_json_bytes(payload)
+            for segment_start, payload in zip(segment_starts, cached)
+            if payload is not None
+        }
+        missing = [segment_start for segment_start in segment_starts if segment_start not in segments]
+        if not missing:
+            return segments
+
+        if self.single_flight is None:
+            loaded = await self._fill_segments(ticker=ticker, segment_starts=missing, now=now)
+        else:
+            loaded = await self.single_flight.do(
+                key=f"market_data:{ticker}:fill:{int(missing[0].timestamp())}:{int(missing[-1].timestamp())}",
+                load=lambda: self._fill_segments(ticker=ticker, segment_starts=missing, now=now),
+                read_cached=lambda: self._read_segments(ticker=ticker, segment_starts=missing),
+            )
+        segments.update(loaded)
+        return segments
+
+    async def _read_segments(
+        self, ticker: str, segment_starts: list[datetime.datetime]
+    ) -> dict[datetime.datetime, list[dict[str, typing.Any]]] | None:
+        keys = [segment_key(ticker, segment_start) for segment_start in segment_starts]
+        cached = await self.redis_client.mget_bytes(keys)
+        segments = {}
+        for segment_start, payload in zip(segment_starts, cached):
+            if payload is None:
+                return None
+            segments[segment_start] = parse_json_bytes(payload)
+        return segments
+
+    async def _fill_segments(
+        self, ticker: str, segment_starts: list[datetime.datetime], now: datetime.datetime
+    ) -> dict[datetime.datetime, list[dict[str, typing.Any]]]:
+        span_start, span_end = min(segment_starts), max(segment_starts) + SEGMENT
+        market_data = await self.market_repo.get_market_data(
+            ticker=ticker,
+            start_time=span_start,
+            end_time=span_end - datetime.timedelta(microseconds=1),
+            limit=None,
+        )
+        loaded: dict[datetime.datetime, list[dict[str, typing.Any]]] = {
+            segment_start: [] for segment_start in segment_starts
+        }
+        for item in market_data:
+            segment_start = align_to_segment(item.timestamp)
+            if segment_start in loaded:
+                loaded[segment_start].append(serialize_market_data(item))
+
+        # The segment still receiving bars only lives briefly; closed ones until the scheduler invalidates them
+        closed: dict[str, bytes] = {}
+        still_open: dict[str, bytes] = {}
+        for segment_start, segment_rows in loaded.items():
+            target = closed if segment_start + SEGMENT <= now else still_open
+            target[segment_key(ticker, segment_start)] = format_into_json_bytes(segment_rows)
+        if closed:
+            await self.redis_client.set_many(closed, expire=settings.MARKET_CACHE_SEGMENT_TTL)
+        if still_open:
+            await self.redis_client.set_many(still_open, expire=settings.MARKET_CACHE_OPEN_SEGMENT_TTL)
+        return loaded
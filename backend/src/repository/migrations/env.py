@@ -0,0 +1,58 @@
+import asyncio
+
+from alembic import context
+from sqlalchemy import Connection, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.config.manager import settings
+from src.repository.base import Base
+from src.repository.database import async_db
+from src.repository.schema import get_current_revision, get_head_revision
+from src.repository.timescale import apply_market_data_storage_policies
+
+# Held for the whole upgrade, so containers started together do not migrate the schema concurrently
+MIGRATION_LOCK_ID = 4_911_007
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    context.configure(url=async_db.set_async_db_uri, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    engine = create_async_engine(async_db.set_async_db_uri, poolclass=NullPool)
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT pg_advisory_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+            await connection.commit()
+            try:
+                await connection.run_sync(do_run_migrations)
+                # Deployment settings rather than schema, so they are re-applied on every upgrade; they are
+                # written against the latest schema and left alone after a downgrade
+                if await get_current_revision(connection) == get_head_revision():
+                    await apply_market_data_storage_policies(
+                        connection=connection,
+                        compress_after=settings.MARKET_DATA_COMPRESS_AFTER,
+                        drop_after=settings.MARKET_DATA_RETENTION,
+                    )
+                await connection.commit()
+            finally:
+                await connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+    finally:
+        await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
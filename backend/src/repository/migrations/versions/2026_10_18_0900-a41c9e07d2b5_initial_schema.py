@@ -0,0 +1,104 @@
+"""
+Initial schema: accounts, the `market_data` hypertable and its continuous aggregates
+
+Revision ID: a41c9e07d2b5
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+"""
+
+import typing
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "a41c9e07d2b5"
+down_revision: str | None = None
+branch_labels: str | typing.Sequence[str] | None = None
+depends_on: str | typing.Sequence[str] | None = None
+
+# (view, bucket width, refresh start offset, refresh end offset, refresh schedule)
+CONTINUOUS_AGGREGATES = (
+    ("market_data_hourly", "1 hour", "3 days", "1 hour", "30 minutes"),
+    ("market_data_daily", "1 day", "1 month", "1 day", "1 hour"),
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS timescaledb CASCADE")
+
+    op.create_table(
+        "account",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("username", sa.String(length=64), nullable=False, unique=True),
+        sa.Column("email", sa.String(length=64), nullable=False, unique=True),
+        sa.Column("_hashed_password", sa.String(length=1024), nullable=True),
+        sa.Column("_hash_salt", sa.String(length=1024), nullable=True),
+        sa.Column("is_verified", sa.Boolean, nullable=False),
+        sa.Column("is_active", sa.Boolean, nullable=False),
+        sa.Column("is_logged_in", sa.Boolean, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+    op.create_table(
+        "market_data",
+        sa.Column("id", sa.Integer, autoincrement=True, nullable=False),
+        sa.Column("ticker", sa.String(length=10), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("open_price", sa.Float, nullable=False),
+        sa.Column("high_price", sa.Float, nullable=False),
+        sa.Column("low_price", sa.Float, nullable=False),
+        sa.Column("close_price", sa.Float, nullable=False),
+        sa.Column("volume", sa.BigInteger, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("id", "timestamp"),
+    )
+    # Range queries skip the chunks outside their time bounds; the indexes, built per chunk, serve the lookups
+    # within the remaining ones. Default indexes are off so that all of them are declared here.
+    op.execute(
+        """
+        SELECT create_hypertable(
+            'market_data', 'timestamp',
+            chunk_time_interval => INTERVAL '1 day',
+            create_default_indexes => FALSE
+        )
+        """
+    )
+    op.create_index("idx_market_data_ticker_timestamp", "market_data", ["ticker", "timestamp"], unique=True)
+    op.create_index("idx_market_data_timestamp", "market_data", [sa.text("timestamp DESC")])
+
+    for view_name, bucket_width, start_offset, end_offset, schedule_interval in CONTINUOUS_AGGREGATES:
+        op.execute(
+            f"""
+            CREATE MATERIALIZED VIEW {view_name}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT
+                ticker,
+                time_bucket(INTERVAL '{bucket_width}', timestamp) AS bucket,
+                first(open_price, timestamp) AS open_price,
+                max(high_price) AS high_price,
+                min(low_price) AS low_price,
+                last(close_price, timestamp) AS close_price,
+                sum(volume) AS volume
+            FROM market_data
+            GROUP BY ticker, bucket
+            WITH NO DATA
+            """
+        )
+        op.execute(
+            f"""
+            SELECT add_continuous_aggregate_policy(
+                '{view_name}',
+                start_offset => INTERVAL '{start_offset}',
+                end_offset => INTERVAL '{end_offset}',
+                schedule_interval => INTERVAL '{schedule_interval}'
+            )
+            """
+        )
+
+
+def downgrade() -> None:
+    for view_name, *_ in reversed(CONTINUOUS_AGGREGATES):
+        op.execute(f"DROP MATERIALIZED VIEW {view_name}")
+    op.drop_table("market_data")
+    op.drop_table("account")
@@ -0,0 +1,159 @@
+"""
+Compact `market_data` layout: bars keyed by `(symbol_id, timestamp)` against a `symbols` table
+
+Revision ID: 7d3e5b1f9c24
+Revises: a41c9e07d2b5
+Create Date: 2026-10-18 10:00:00.000000
+
+Drops the surrogate `id` with its primary key index, the `VARCHAR(10)` ticker repeated on every bar and
+`created_at`. Bars are copied into a new hypertable rather than altered in place, which also works for
+compressed chunks; the continuous aggregates depend on the old columns, so they are rebuilt and
+rematerialized. Both directions rewrite the whole table.
+"""
+
+import typing
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "7d3e5b1f9c24"
+down_revision: str | None = "a41c9e07d2b5"
+branch_labels: str | typing.Sequence[str] | None = None
+depends_on: str | typing.Sequence[str] | None = None
+
+# (view, bucket width, refresh start offset, refresh end offset, refresh schedule)
+CONTINUOUS_AGGREGATES = (
+    ("market_data_hourly", "1 hour", "3 days", "1 hour", "30 minutes"),
+    ("market_data_daily", "1 day", "1 month", "1 day", "1 hour"),
+)
+BAR_COLUMNS = "timestamp, open_price, high_price, low_price, close_price, volume"
+
+
+def create_hypertable(table: str) -> None:
+    op.execute(
+        f"""
+        SELECT create_hypertable(
+            '{table}', 'timestamp',
+            chunk_time_interval => INTERVAL '1 day',
+            create_default_indexes => FALSE
+        )
+        """
+    )
+
+
+def drop_continuous_aggregates() -> None:
+    for view_name, *_ in reversed(CONTINUOUS_AGGREGATES):
+        op.execute(f"DROP MATERIALIZED VIEW {view_name}")
+
+
+def create_continuous_aggregates(key_column: str) -> None:
+    for view_name, bucket_width, start_offset, end_offset, schedule_interval in CONTINUOUS_AGGREGATES:
+        op.execute(
+            f"""
+            CREATE MATERIALIZED VIEW {view_name}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT
+                {key_column},
+                time_bucket(INTERVAL '{bucket_width}', timestamp) AS bucket,
+                first(open_price, timestamp) AS open_price,
+                max(high_price) AS high_price,
+                min(low_price) AS low_price,
+                last(close_price, timestamp) AS close_price,
+                sum(volume) AS volume
+            FROM market_data
+            GROUP BY {key_column}, bucket
+            WITH NO DATA
+            """
+        )
+        op.execute(
+            f"""
+            SELECT add_continuous_aggregate_policy(
+                '{view_name}',
+                start_offset => INTERVAL '{start_offset}',
+                end_offset => INTERVAL '{end_offset}',
+                schedule_interval => INTERVAL '{schedule_interval}'
+            )
+            """
+        )
+
+    # The policies only refresh their recent window, and everything older would drop out of the real-time
+    # views once they have run; a refresh cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for view_name, _, _, end_offset, _ in CONTINUOUS_AGGREGATES:
+            op.execute(f"CALL refresh_continuous_aggregate('{view_name}', NULL, now() - INTERVAL '{end_offset}')")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "symbols",
+        sa.Column("id", sa.Integer, sa.Identity(), primary_key=True),
+        sa.Column("ticker", sa.String(length=10), nullable=False, unique=True),
+    )
+    op.execute("INSERT INTO symbols (ticker) SELECT DISTINCT ticker FROM market_data ORDER BY ticker")
+
+    drop_continuous_aggregates()
+
+    op.create_table(
+        "market_data_compact",
+        sa.Column("symbol_id", sa.Integer, nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("open_price", sa.Float, nullable=False),
+        sa.Column("high_price", sa.Float, nullable=False),
+        sa.Column("low_price", sa.Float, nullable=False),
+        sa.Column("close_price", sa.Float, nullable=False),
+        sa.Column("volume", sa.BigInteger, nullable=False),
+    )
+    create_hypertable("market_data_compact")
+    op.execute(
+        f"""
+        INSERT INTO market_data_compact (symbol_id, {BAR_COLUMNS})
+        SELECT symbols.id, {BAR_COLUMNS}
+        FROM market_data
+        JOIN symbols USING (ticker)
+        """
+    )
+    op.drop_table("market_data")
+    op.rename_table("market_data_compact", "market_data")
+
+    # Constraints and indexes after the copy, so they are built in one pass instead of row by row
+    op.create_primary_key("market_data_pkey", "market_data", ["symbol_id", "timestamp"])
+    op.create_foreign_key("market_data_symbol_id_fkey", "market_data", "symbols", ["symbol_id"], ["id"])
+    op.create_index("idx_market_data_timestamp", "market_data", [sa.text("timestamp DESC")])
+
+    create_continuous_aggregates(key_column="symbol_id")
+
+
+def downgrade() -> None:
+    drop_continuous_aggregates()
+
+    op.create_table(
+        "market_data_wide",
+        sa.Column("id", sa.Integer, sa.Identity(), nullable=False),
+        sa.Column("ticker", sa.String(length=10), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("open_price", sa.Float, nullable=False),
+        sa.Column("high_price", sa.Float, nullable=False),
+        sa.Column("low_price", sa.Float, nullable=False),
+        sa.Column("close_price", sa.Float, nullable=False),
+        sa.Column("volume", sa.BigInteger, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    create_hypertable("market_data_wide")
+    op.execute(
+        f"""
+        INSERT INTO market_data_wide (ticker, {BAR_COLUMNS})
+        SELECT symbols.ticker, {BAR_COLUMNS}
+        FROM market_data
+        JOIN symbols ON symbols.id = market_data.symbol_id
+        ORDER BY market_data.timestamp
+        """
+    )
+    op.drop_table("market_data")
+    op.rename_table("market_data_wide", "market_data")
+    op.drop_table("symbols")
+
+    op.create_primary_key("market_data_pkey", "market_data", ["id", "timestamp"])
+    op.create_index("idx_market_data_ticker_timestamp", "market_data", ["ticker", "timestamp"], unique=True)
+    op.create_index("idx_market_data_timestamp", "market_data", [sa.text("timestamp DESC")])
+
+    create_continuous_aggregates(key_column="ticker")
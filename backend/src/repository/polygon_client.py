@@ -1,13 +1,212 @@
+import asyncio
+import dataclasses
+import datetime
+import email.utils
+import random
+import time
+import typing
+
 import httpx
+import loguru
+
 from src.config.manager import settings
 
-BASE_URL = "https://api.polygon.io/v2/aggs/ticker"
+AGGREGATES_PATH = "/v2/aggs/ticker"
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclasses.dataclass
+class PolygonClientMetrics:
+    requests: int = 0
+    pages: int = 0
+    throttled: int = 0
+    throttled_seconds: float = 0.0
+    retries: int = 0
+    failures: int = 0
+
+    def snapshot(self) -> dict[str, int | float]:
+        return dataclasses.asdict(self)
+
+
+class TokenBucket:
+    """
+    Client-side view of the provider's per-minute quota: `rate` tokens per second refill a bucket of
+    `capacity` tokens and every request takes one, sleeping until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """
+        Take one token and return how many seconds the caller had to wait for it.
+        """
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+
+                delay = (1 - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+def parse_retry_after(value: str) -> float | None:
+    """
+    Seconds to wait from a `Retry-After` header, given either as delay-seconds or as an HTTP-date.
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return (retry_at - datetime.datetime.now(tz=datetime.timezone.utc)).total_seconds()
+
+
+class PolygonClient:
+    """
+    One long-lived `httpx.AsyncClient` shared by every ingest task, so TCP/TLS connections are kept alive
+    and (with HTTP/2) multiplexed instead of being re-established for each request. Requests go through
+    a token bucket sized to the provider quota and are retried with jittered exponential backoff on
+    429/5xx and transport errors.
+    """
+
+    def __init__(
+        self,
+        base_url: str = settings.POLYGON_BASE_URL,
+        api_key: str = settings.POLYGON_API_KEY,
+        requests_per_minute: float = settings.POLYGON_REQUESTS_PER_MINUTE,
+        burst: float = settings.POLYGON_RATE_LIMIT_BURST,
+        max_retries: int = settings.POLYGON_MAX_RETRIES,
+        backoff_base: float = settings.POLYGON_BACKOFF_BASE,
+        backoff_max: float = settings.POLYGON_BACKOFF_MAX,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics = PolygonClientMetrics()
+        # A non-positive quota means the plan is unlimited
+        self.rate_limiter: TokenBucket | None = (
+            TokenBucket(rate=requests_per_minute / 60, capacity=burst) if requests_per_minute > 0 else None
+        )
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so the connection pool binds to the event loop that actually uses it
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=settings.POLYGON_HTTP2,
+                timeout=settings.POLYGON_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.POLYGON_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.POLYGON_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.POLYGON_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._client
+
+    def backoff_delay(self, attempt: int, response: httpx.Response | None = None) -> float:
+        if response is not None and "Retry-After" in response.headers:
+            retry_after = parse_retry_after(response.headers["Retry-After"])
+            if retry_after is not None:
+                # Capped, so a misbehaving server cannot park the ingest tasks for arbitrarily long
+                return min(self.backoff_max, max(0.0, retry_after))
+        # Full jitter: spreads retries of concurrent tasks instead of having them hit the quota in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def _throttle(self) -> None:
+        if self.rate_limiter is None:
+            return
+        waited = await self.rate_limiter.acquire()
+        if waited:
+            self.metrics.throttled += 1
+            self.metrics.throttled_seconds += waited
+
+    async def request(self, url: str, params: dict[str, typing.Any] | None = None) -> dict[str, typing.Any]:
+        # Merged rather than passed as `params=`, which would replace the cursor query of a `next_url`
+        request_url = httpx.URL(url).copy_merge_params({**(params or {}), "apiKey": self.api_key})
+        attempt = 0
+        while True:
+            await self._throttle()
+            self.metrics.requests += 1
+            response: httpx.Response | None = None
+            try:
+                response = await self.client.get(request_url)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()
+                error: Exception = httpx.HTTPStatusError(
+                    f"Retryable status {response.status_code} for {url}",
+                    request=response.request,
+                    response=response,
+                )
+            except httpx.TransportError as e:
+                error = e
+
+            if attempt >= self.max_retries:
+                self.metrics.failures += 1
+                raise error
+
+            delay = self.backoff_delay(attempt=attempt, response=response)
+            attempt += 1
+            self.metrics.retries += 1
+            loguru.logger.warning(
+                f"Polygon request failed ({error}), retry {attempt}/{self.max_retries} in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+
+    async def iter_aggregate_pages(
+        self, ticker: str, multiplier: int, timespan: str, _from: str, to: str
+    ) -> typing.AsyncGenerator[list[dict], None]:
+        """
+        Yield the `results` of every page of an aggregates range, following `next_url` until it runs out.
+        """
+        url: str | None = f"{self.base_url}{AGGREGATES_PATH}/{ticker}/range/{multiplier}/{timespan}/{_from}/{to}"
+        params: dict[str, typing.Any] | None = {"adjusted": "true", "sort": "asc", "limit": 50000}
+        while url:
+            data = await self.request(url, params=params)
+            self.metrics.pages += 1
+            results = data.get("results", [])
+            if results:
+                yield results
+            # `next_url` already carries the cursor and the original query, only the key has to be re-added
+            url, params = data.get("next_url"), None
+
+    async def fetch_aggregates(self, ticker: str, multiplier: int, timespan: str, _from: str, to: str) -> list[dict]:
+        results: list[dict] = []
+        async for page in self.iter_aggregate_pages(
+            ticker=ticker, multiplier=multiplier, timespan=timespan, _from=_from, to=to
+        ):
+            results.extend(page)
+        return results
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+polygon_client = PolygonClient()
+
 
-async def fetch_aggregates(ticker: str, multiplier: int, timespan: str, _from: str, to: str):
-    url = f"{BASE_URL}/{ticker}/range/{multiplier}/{timespan}/{_from}/{to}"
-    params = {"apiKey": settings.POLYGON_API_KEY}
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(url, params=params)
-        r.raise_for_status()
-        data = r.json()
-    return data["results"]
+async def fetch_aggregates(ticker: str, multiplier: int, timespan: str, _from: str, to: str) -> list[dict]:
+    return await polygon_client.fetch_aggregates(
+        ticker=ticker, multiplier=multiplier, timespan=timespan, _from=_from, to=to
+    )
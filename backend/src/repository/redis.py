@@ -1,13 +1,42 @@
+import dataclasses
+import typing
 from decimal import Decimal
 
 import redis.asyncio as redis
 from redis.asyncio.connection import ConnectionPool
 
 from src.config.manager import settings
+from src.repository.cache_codec import CachePayloadCodec
+from src.repository.local_cache import LocalCache
+
+# Delete a key only while it still holds the caller's token, so an expired lock taken over by someone else
+# is never released by its previous owner
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+# Extend a lock's expiry only while it still holds the caller's token, for owners that hold it for long
+RENEW_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+@dataclasses.dataclass
+class RedisCacheMetrics:
+    hits: int = 0
+    misses: int = 0
+
+    def snapshot(self) -> dict[str, int]:
+        return dataclasses.asdict(self)
 
 
 class RedisClient:
-    def __init__(self):
+    def __init__(self, local_cache: LocalCache | None = None):
         self.pool = ConnectionPool(
             host=settings.REDIS_HOST,
             port=settings.REDIS_PORT,
@@ -17,6 +46,27 @@ class RedisClient:
             decode_responses=True
         )
         self.client = redis.Redis(connection_pool=self.pool)
+        # Same server without response decoding, for pre-encoded payloads that are passed through untouched
+        self.raw_pool = ConnectionPool(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            max_connections=settings.REDIS_POOL_SIZE,
+            socket_timeout=settings.REDIS_POOL_TIMEOUT,
+            decode_responses=False
+        )
+        self.raw_client = redis.Redis(connection_pool=self.raw_pool)
+        # Byte payloads go through the codec, text values are stored as they are
+        self.payload_codec = CachePayloadCodec.from_name(
+            settings.REDIS_CACHE_CODEC,
+            threshold=settings.REDIS_CACHE_COMPRESSION_THRESHOLD,
+            level=settings.REDIS_CACHE_COMPRESSION_LEVEL
+        )
+        self._release_lock = self.client.register_script(RELEASE_LOCK_SCRIPT)
+        self._renew_lock = self.client.register_script(RENEW_LOCK_SCRIPT)
+        # Optional in-process tier in front of the byte payloads, see `get_bytes`/`mget_bytes`
+        self.local_cache = local_cache
+        self.metrics = RedisCacheMetrics()
 
     @classmethod
     def convert_decimals(cls, obj):
@@ -31,11 +81,64 @@ class RedisClient:
     async def get(self, key: str) -> str | None:
         return await self.client.get(key)
 
-    async def set(self, key: str, value: str, expire: int | None = None) -> bool:
+    async def get_bytes(self, key: str) -> bytes | None:
+        if self.local_cache is not None:
+            value = self.local_cache.get(key)
+            if value is not None:
+                return value
+
+        value = self.payload_codec.decode(await self.raw_client.get(key))
+        self._count_lookups([value])
+        if value is not None and self.local_cache is not None:
+            self.local_cache.set(key, value)
+        return value
+
+    async def set(self, key: str, value: str | bytes, expire: int | None = None) -> bool:
+        if isinstance(value, bytes):
+            if self.local_cache is not None:
+                self.local_cache.set(key, value, ttl=expire)
+            value = self.payload_codec.encode(value)
+        elif self.local_cache is not None:
+            # Text values are not kept locally, but must not leave an earlier byte payload of the key behind
+            self.local_cache.delete(key)
         return await self.client.set(key, value, ex=expire)
 
-    async def delete(self, key: str) -> int:
-        return await self.client.delete(key)
+    async def mget(self, keys: typing.Sequence[str]) -> typing.List[str | None]:
+        return await self.client.mget(keys)
+
+    async def mget_bytes(self, keys: typing.Sequence[str]) -> typing.List[bytes | None]:
+        if self.local_cache is None:
+            values = [self.payload_codec.decode(payload) for payload in await self.raw_client.mget(keys)]
+            self._count_lookups(values)
+            return values
+
+        values = [self.local_cache.get(key) for key in keys]
+        missing = [index for index, value in enumerate(values) if value is None]
+        if missing:
+            fetched = await self.raw_client.mget([keys[index] for index in missing])
+            for index, payload in zip(missing, fetched):
+                values[index] = self.payload_codec.decode(payload)
+                if values[index] is not None:
+                    self.local_cache.set(keys[index], values[index])
+            self._count_lookups([values[index] for index in missing])
+        return values
+
+    async def set_many(self, mapping: typing.Mapping[str, str | bytes], expire: int | None = None) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                if isinstance(value, bytes):
+                    if self.local_cache is not None:
+                        self.local_cache.set(key, value, ttl=expire)
+                    value = self.payload_codec.encode(value)
+                elif self.local_cache is not None:
+                    self.local_cache.delete(key)
+                pipe.set(key, value, ex=expire)
+            await pipe.execute()
+
+    async def delete(self, *keys: str) -> int:
+        if self.local_cache is not None:
+            self.local_cache.delete(*keys)
+        return await self.client.delete(*keys)
 
     async def exists(self, key: str) -> bool:
         return bool(await self.client.exists(key))
@@ -46,8 +149,48 @@ class RedisClient:
     async def ttl(self, key: str) -> int:
         return await self.client.ttl(key)
 
+    async def acquire_lock(self, key: str, token: str, expire_ms: int) -> bool:
+        return bool(await self.client.set(key, token, nx=True, px=expire_ms))
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        return bool(await self._release_lock(keys=[key], args=[token]))
+
+    async def renew_lock(self, key: str, token: str, expire_ms: int) -> bool:
+        return bool(await self._renew_lock(keys=[key], args=[token, expire_ms]))
+
+    async def hset(self, key: str, field: str, value: str | bytes) -> int:
+        return await self.client.hset(key, field, value)
+
+    async def hget(self, key: str, field: str) -> str | None:
+        return await self.client.hget(key, field)
+
+    async def hgetall(self, key: str) -> typing.Dict[str, str]:
+        return await self.client.hgetall(key)
+
+    async def sadd(self, key: str, *members: str) -> int:
+        return await self.client.sadd(key, *members)
+
+    async def smembers(self, key: str) -> typing.Set[str]:
+        return await self.client.smembers(key)
+
+    async def publish(self, channel: str, message: str | bytes) -> int:
+        return await self.client.publish(channel, message)
+
+    def pubsub(self, raw: bool = False) -> redis.client.PubSub:
+        # `raw` subscriptions receive message payloads as bytes, undecoded
+        return (self.raw_client if raw else self.client).pubsub(ignore_subscribe_messages=True)
+
+    async def evicted_keys(self) -> int:
+        return (await self.client.info("stats")).get("evicted_keys", 0)
+
+    def _count_lookups(self, values: typing.Sequence[bytes | None]) -> None:
+        found = sum(value is not None for value in values)
+        self.metrics.hits += found
+        self.metrics.misses += len(values) - found
+
     async def close(self) -> None:
         await self.client.aclose()
+        await self.raw_client.aclose()
 
 # For tests, bcz it breaks down by creating separate instance
 redis_client = RedisClient()
\ No newline at end of file
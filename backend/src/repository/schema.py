@@ -0,0 +1,31 @@
+import pathlib
+
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.utilities.exceptions.database import SchemaOutdated
+
+MIGRATIONS_DIRECTORY = pathlib.Path(__file__).parent / "migrations"
+
+
+def get_head_revision() -> str | None:
+    return ScriptDirectory(str(MIGRATIONS_DIRECTORY)).get_current_head()
+
+
+async def get_current_revision(connection: AsyncConnection) -> str | None:
+    return await connection.run_sync(
+        lambda sync_connection: MigrationContext.configure(sync_connection).get_current_revision()
+    )
+
+
+async def verify_schema_version(connection: AsyncConnection) -> str | None:
+    """
+    Check that the database is migrated to the latest revision. The schema is created and changed only by
+    `alembic upgrade head` (run by `entrypoint.sh`), never by the app.
+    """
+    head = get_head_revision()
+    current = await get_current_revision(connection)
+    if current != head:
+        raise SchemaOutdated(f"Database schema is at revision {current}, expected {head}; run `alembic upgrade head`")
+    return current
@@ -0,0 +1,108 @@
+import asyncio
+import dataclasses
+import time
+import typing
+import uuid
+
+from src.config.manager import settings
+from src.repository.redis import RedisClient
+
+T = typing.TypeVar("T")
+
+
+@dataclasses.dataclass
+class SingleFlightMetrics:
+    leaders: int = 0
+    collapsed_local: int = 0
+    collapsed_remote: int = 0
+    lock_timeouts: int = 0
+
+    @property
+    def collapsed(self) -> int:
+        return self.collapsed_local + self.collapsed_remote
+
+    def snapshot(self) -> dict[str, int]:
+        return {**dataclasses.asdict(self), "collapsed": self.collapsed}
+
+
+class SingleFlight:
+    """
+    Collapses concurrent cache misses for the same key into one load.
+
+    Inside a worker, followers await the leader's future. Across uvicorn workers, the leader holds a short
+    Redis lock while it loads; workers that fail to take it poll the cache until the value appears, and
+    only load themselves once the lock is gone without a cached value (e.g. the leader failed).
+    """
+
+    def __init__(
+        self,
+        redis_client: RedisClient,
+        lock_ttl_ms: int = settings.SINGLE_FLIGHT_LOCK_TTL_MS,
+        poll_interval_ms: int = settings.SINGLE_FLIGHT_POLL_INTERVAL_MS,
+    ):
+        self.redis_client = redis_client
+        self.lock_ttl_ms = lock_ttl_ms
+        self.poll_interval = poll_interval_ms / 1000
+        self.metrics = SingleFlightMetrics()
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def do(
+        self,
+        key: str,
+        load: typing.Callable[[], typing.Awaitable[T]],
+        read_cached: typing.Callable[[], typing.Awaitable[T | None]],
+    ) -> T:
+        """
+        Return `load()`'s result, running it at most once per `key` at a time. `load` is expected to write the
+        cache that `read_cached` reads, which is how waiters in other workers pick the result up.
+        """
+        if key in self._in_flight:
+            self.metrics.collapsed_local += 1
+            return await asyncio.shield(self._in_flight[key])
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self._do_across_workers(key=key, load=load, read_cached=read_cached)
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._in_flight[key]
+
+    async def _do_across_workers(
+        self,
+        key: str,
+        load: typing.Callable[[], typing.Awaitable[T]],
+        read_cached: typing.Callable[[], typing.Awaitable[T | None]],
+    ) -> T:
+        lock_key = f"single_flight:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_ttl_ms / 1000
+
+        while not await self.redis_client.acquire_lock(lock_key, token, expire_ms=self.lock_ttl_ms):
+            await asyncio.sleep(self.poll_interval)
+            cached = await read_cached()
+            if cached is not None:
+                self.metrics.collapsed_remote += 1
+                return cached
+            if time.monotonic() >= deadline:
+                # The holder is stuck or gone; loading without the lock beats waiting on it forever
+                self.metrics.lock_timeouts += 1
+                return await load()
+
+        try:
+            # Another worker may have filled the cache between our miss and taking the lock
+            cached = await read_cached()
+            if cached is not None:
+                self.metrics.collapsed_remote += 1
+                return cached
+            self.metrics.leaders += 1
+            return await load()
+        finally:
+            await self.redis_client.release_lock(lock_key, token)
@@ -0,0 +1,64 @@
+import typing
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.db.market import Symbol
+
+# NOT EXISTS first: ON CONFLICT alone would draw an identity value for every ticker that already has an id
+CREATE_MISSING_SYMBOLS = text("""
+    INSERT INTO symbols (ticker)
+    SELECT t.ticker FROM unnest(CAST(:tickers AS VARCHAR[])) AS t(ticker)
+    WHERE NOT EXISTS (SELECT 1 FROM symbols WHERE symbols.ticker = t.ticker)
+    ON CONFLICT (ticker) DO NOTHING
+    RETURNING ticker, id
+""")
+
+
+class SymbolCache:
+    """
+    In-process dictionary between tickers and the `symbols.id` that `market_data` stores instead of them. Ids
+    never change once assigned, so entries are kept for the life of the process and the database is only asked
+    about tickers not seen yet; queries then filter on a plain id parameter, which TimescaleDB pushes down into
+    chunk and continuous aggregate scans.
+    """
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.tickers: dict[int, str] = {}
+
+    def remember(self, symbols: typing.Iterable[tuple[str, int]]) -> None:
+        for ticker, symbol_id in symbols:
+            self.ids[ticker] = symbol_id
+            self.tickers[symbol_id] = ticker
+
+    def clear(self) -> None:
+        self.ids.clear()
+        self.tickers.clear()
+
+    async def get_ids(
+        self, async_session: AsyncSession, tickers: typing.Iterable[str], create: bool = False
+    ) -> dict[str, int]:
+        """
+        Ids of `tickers`. Tickers without one are left out, unless `create` assigns them one in the session's
+        transaction; those are not cached before it commits, as a rollback takes them with it.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        missing = [ticker for ticker in tickers if ticker not in self.ids]
+        created: dict[str, int] = {}
+        if missing and create:
+            result = await async_session.execute(CREATE_MISSING_SYMBOLS, {"tickers": missing})
+            created = {ticker: symbol_id for ticker, symbol_id in result.all()}
+            missing = [ticker for ticker in missing if ticker not in created]
+        if missing:
+            result = await async_session.execute(select(Symbol.ticker, Symbol.id).where(Symbol.ticker.in_(missing)))
+            self.remember(result.all())
+
+        ids = {ticker: self.ids.get(ticker, created.get(ticker)) for ticker in tickers}
+        return {ticker: symbol_id for ticker, symbol_id in ids.items() if symbol_id is not None}
+
+    async def get_id(self, async_session: AsyncSession, ticker: str) -> int | None:
+        return (await self.get_ids(async_session, [ticker])).get(ticker)
+
+
+symbol_cache: SymbolCache = SymbolCache()
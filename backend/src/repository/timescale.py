@@ -0,0 +1,168 @@
+import dataclasses
+import datetime
+import typing
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+MARKET_DATA_TABLE = "market_data"
+
+
+@dataclasses.dataclass(frozen=True)
+class ContinuousAggregate:
+    """
+    A TimescaleDB continuous aggregate over `market_data` together with its refresh policy, as created by the
+    migrations.
+    """
+
+    view_name: str
+    bucket_width: str
+    bucket_duration: datetime.timedelta
+    start_offset: str
+    end_offset: str
+    schedule_interval: str
+
+
+MARKET_DATA_HOURLY = ContinuousAggregate(
+    view_name="market_data_hourly",
+    bucket_width="1 hour",
+    bucket_duration=datetime.timedelta(hours=1),
+    start_offset="3 days",
+    end_offset="1 hour",
+    schedule_interval="30 minutes",
+)
+MARKET_DATA_DAILY = ContinuousAggregate(
+    view_name="market_data_daily",
+    bucket_width="1 day",
+    bucket_duration=datetime.timedelta(days=1),
+    start_offset="1 month",
+    end_offset="1 day",
+    schedule_interval="1 hour",
+)
+CONTINUOUS_AGGREGATES: tuple[ContinuousAggregate, ...] = (MARKET_DATA_HOURLY, MARKET_DATA_DAILY)
+
+OhlcvIntervalName = typing.Literal["1m", "5m", "15m", "1h", "4h", "1d", "1w", "1mo"]
+
+
+@dataclasses.dataclass(frozen=True)
+class OhlcvInterval:
+    """
+    A bar interval served by the OHLCV endpoint. `duration` is None for calendar months, which have no fixed
+    length but are always whole days.
+    """
+
+    name: str
+    bucket_width: str
+    duration: datetime.timedelta | None
+
+    def is_divisible_by(self, width: datetime.timedelta) -> bool:
+        if self.duration is None:
+            return datetime.timedelta(days=1) % width == datetime.timedelta(0)
+        return self.duration >= width and self.duration % width == datetime.timedelta(0)
+
+    def next_bucket(self, bucket: datetime.datetime) -> datetime.datetime:
+        if self.duration is not None:
+            return bucket + self.duration
+        # Month buckets start on the 1st, so day 28 + 4 days always lands in the next month
+        return (bucket.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+    @property
+    def rollup_source(self) -> ContinuousAggregate | None:
+        """
+        The coarsest materialized rollup whose buckets tile this interval exactly, or None when only the raw
+        bars do; coarse intervals over long ranges then read a few rows per bucket instead of every bar.
+        """
+        sources = [aggregate for aggregate in CONTINUOUS_AGGREGATES if self.is_divisible_by(aggregate.bucket_duration)]
+        return max(sources, key=lambda aggregate: aggregate.bucket_duration, default=None)
+
+
+OHLCV_INTERVALS: dict[str, OhlcvInterval] = {
+    interval.name: interval
+    for interval in (
+        OhlcvInterval(name="1m", bucket_width="1 minute", duration=datetime.timedelta(minutes=1)),
+        OhlcvInterval(name="5m", bucket_width="5 minutes", duration=datetime.timedelta(minutes=5)),
+        OhlcvInterval(name="15m", bucket_width="15 minutes", duration=datetime.timedelta(minutes=15)),
+        OhlcvInterval(name="1h", bucket_width="1 hour", duration=datetime.timedelta(hours=1)),
+        OhlcvInterval(name="4h", bucket_width="4 hours", duration=datetime.timedelta(hours=4)),
+        OhlcvInterval(name="1d", bucket_width="1 day", duration=datetime.timedelta(days=1)),
+        OhlcvInterval(name="1w", bucket_width="1 week", duration=datetime.timedelta(weeks=1)),
+        OhlcvInterval(name="1mo", bucket_width="1 month", duration=None),
+    )
+}
+
+
+async def enable_market_data_compression(connection: AsyncConnection) -> None:
+    """
+    Turn on native compression of `market_data`: each compressed batch holds one ticker's bars in time order,
+    so per-ticker range scans decompress only their own segments and the sorted columns delta-encode well.
+    Compression settings cannot be changed once chunks are compressed, so an enabled table is left alone.
+    """
+    enabled = await connection.execute(
+        text("SELECT compression_enabled FROM timescaledb_information.hypertables WHERE hypertable_name = :table"),
+        {"table": MARKET_DATA_TABLE},
+    )
+    if enabled.scalar():
+        return
+    await connection.execute(
+        text(
+            f"""
+            ALTER TABLE {MARKET_DATA_TABLE} SET (
+                timescaledb.compress,
+                timescaledb.compress_segmentby = 'symbol_id',
+                timescaledb.compress_orderby = 'timestamp DESC'
+            )
+            """
+        )
+    )
+
+
+async def apply_market_data_storage_policies(
+    connection: AsyncConnection, compress_after: str | None, drop_after: str | None
+) -> None:
+    """
+    (Re)create the compression and retention policies of `market_data` from the given Postgres intervals;
+    None or an empty interval removes the policy. Policies are replaced rather than kept, so changed
+    thresholds take effect on the next start.
+    """
+    if drop_after:
+        # Refreshing an aggregate over dropped raw chunks would empty its buckets there
+        for aggregate in CONTINUOUS_AGGREGATES:
+            refresh_reaches_dropped = await connection.execute(
+                text(f"SELECT INTERVAL '{drop_after}' <= INTERVAL '{aggregate.start_offset}'")
+            )
+            if refresh_reaches_dropped.scalar():
+                raise ValueError(
+                    f"Raw bars must be kept for longer than the {aggregate.start_offset} "
+                    f"`{aggregate.view_name}` refreshes"
+                )
+
+    await connection.execute(text(f"SELECT remove_compression_policy('{MARKET_DATA_TABLE}', if_exists => TRUE)"))
+    if compress_after:
+        await enable_market_data_compression(connection=connection)
+        await connection.execute(
+            text(
+                f"SELECT add_compression_policy('{MARKET_DATA_TABLE}', compress_after => INTERVAL '{compress_after}')"
+            )
+        )
+
+    await connection.execute(text(f"SELECT remove_retention_policy('{MARKET_DATA_TABLE}', if_exists => TRUE)"))
+    if drop_after:
+        await connection.execute(
+            text(f"SELECT add_retention_policy('{MARKET_DATA_TABLE}', drop_after => INTERVAL '{drop_after}')")
+        )
+
+
+async def refresh_continuous_aggregates(connection: AsyncConnection) -> None:
+    # Materializes the same window the refresh policy does, on demand; `connection` must be in autocommit
+    for aggregate in CONTINUOUS_AGGREGATES:
+        await connection.execute(
+            text(
+                f"""
+                CALL refresh_continuous_aggregate(
+                    '{aggregate.view_name}',
+                    now() - INTERVAL '{aggregate.start_offset}',
+                    now() - INTERVAL '{aggregate.end_offset}'
+                )
+                """
+            )
+        )
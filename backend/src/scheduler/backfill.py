@@ -0,0 +1,190 @@
+"""
+Historical backfill of `market_data` from Polygon.
+
+    python -m src.scheduler.backfill --tickers AAPL MSFT --start 2020-01-01 --end 2024-12-31
+
+The range is split into per-ticker chunks aligned to fixed `chunk_days` windows, chunks run concurrently
+through the shared rate-limited Polygon client and are written with the COPY upsert path. Every finished
+chunk is checkpointed in Redis, so re-running an interrupted backfill skips what is already stored.
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import datetime
+import typing
+
+import loguru
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+from src.repository.crud.market import MarketDataCRUDRepository
+from src.repository.indicator_cache import invalidate_indicator_series
+from src.repository.market_cache import invalidate_market_data_segments, publish_market_data_invalidation
+from src.repository.polygon_client import polygon_client, PolygonClient
+from src.repository.redis import RedisClient
+from src.scheduler.tasks import process_market_data
+
+CHUNK_EPOCH = datetime.date(1970, 1, 1)
+
+
+@dataclasses.dataclass(frozen=True)
+class BackfillChunk:
+    ticker: str
+    start: datetime.date
+    end: datetime.date
+
+    @property
+    def checkpoint_member(self) -> str:
+        return f"{self.ticker}:{self.start.isoformat()}:{self.end.isoformat()}"
+
+
+def utc_today() -> datetime.date:
+    return datetime.datetime.now(tz=datetime.timezone.utc).date()
+
+
+def checkpoint_key(multiplier: int, timespan: str) -> str:
+    return f"backfill:checkpoint:{multiplier}:{timespan}"
+
+
+def plan_backfill_chunks(
+    tickers: typing.Sequence[str], start: datetime.date, end: datetime.date, chunk_days: int
+) -> list[BackfillChunk]:
+    """
+    Split `[start, end]` (both inclusive) into windows aligned to multiples of `chunk_days` since 1970-01-01,
+    so overlapping backfills share chunk boundaries and therefore checkpoints.
+    """
+    chunks = []
+    for ticker in tickers:
+        chunk_start = start
+        while chunk_start <= end:
+            window = (chunk_start - CHUNK_EPOCH).days // chunk_days
+            window_end = CHUNK_EPOCH + datetime.timedelta(days=(window + 1) * chunk_days - 1)
+            chunk_end = min(window_end, end)
+            chunks.append(BackfillChunk(ticker=ticker, start=chunk_start, end=chunk_end))
+            chunk_start = chunk_end + datetime.timedelta(days=1)
+    return chunks
+
+
+async def backfill_chunk(
+    async_session_factory: async_sessionmaker[AsyncSession],
+    client: PolygonClient,
+    chunk: BackfillChunk,
+    multiplier: int,
+    timespan: str,
+) -> int:
+    stored = 0
+    async with async_session_factory() as async_session:
+        market_repo = MarketDataCRUDRepository(async_session)
+        # Written page by page, so memory stays flat no matter how long the chunk is
+        async for page in client.iter_aggregate_pages(
+            ticker=chunk.ticker,
+            multiplier=multiplier,
+            timespan=timespan,
+            _from=chunk.start.isoformat(),
+            to=chunk.end.isoformat(),
+        ):
+            stored += await market_repo.copy_market_bars(process_market_data(page, chunk.ticker))
+    return stored
+
+
+async def run_backfill(
+    async_session_factory: async_sessionmaker[AsyncSession],
+    redis_client: RedisClient,
+    tickers: typing.Sequence[str],
+    start: datetime.date,
+    end: datetime.date,
+    multiplier: int = 1,
+    timespan: str = "hour",
+    chunk_days: int = 30,
+    concurrency: int = 4,
+    client: PolygonClient = polygon_client,
+) -> int:
+    """
+    Backfill every ticker over `[start, end]` and return the number of rows written. Chunks that fail are
+    logged and left unchecked, so the next run picks them up again; so are chunks reaching into the current
+    (UTC) day, whose bars are not complete yet.
+    """
+    key = checkpoint_key(multiplier=multiplier, timespan=timespan)
+    completed = await redis_client.smembers(key)
+    chunks = plan_backfill_chunks(tickers=tickers, start=start, end=end, chunk_days=chunk_days)
+    pending = [chunk for chunk in chunks if chunk.checkpoint_member not in completed]
+    loguru.logger.info(f"Backfill --- {len(pending)} of {len(chunks)} chunks pending")
+
+    today = utc_today()
+    semaphore = asyncio.Semaphore(concurrency)
+    progress = {"done": len(chunks) - len(pending), "rows": 0}
+
+    async def run_chunk(chunk: BackfillChunk) -> None:
+        async with semaphore:
+            try:
+                stored = await backfill_chunk(
+                    async_session_factory=async_session_factory,
+                    client=client,
+                    chunk=chunk,
+                    multiplier=multiplier,
+                    timespan=timespan,
+                )
+            except Exception as e:
+                loguru.logger.error(f"Backfill --- chunk {chunk.checkpoint_member} failed: {str(e)}")
+                return
+
+            if stored:
+                await invalidate_market_data_segments(
+                    redis_client,
+                    ticker=chunk.ticker,
+                    start=datetime.datetime.combine(chunk.start, datetime.time(), tzinfo=datetime.timezone.utc),
+                    end=datetime.datetime.combine(chunk.end, datetime.time.max, tzinfo=datetime.timezone.utc),
+                )
+                await invalidate_indicator_series(redis_client, ticker=chunk.ticker)
+                await publish_market_data_invalidation(redis_client, ticker=chunk.ticker)
+            if chunk.end < today:
+                await redis_client.sadd(key, chunk.checkpoint_member)
+            progress["done"] += 1
+            progress["rows"] += stored
+            loguru.logger.info(
+                f"Backfill --- {chunk.checkpoint_member}: {stored} rows ({progress['done']}/{len(chunks)} chunks)"
+            )
+
+    await asyncio.gather(*(run_chunk(chunk) for chunk in pending))
+    return progress["rows"]
+
+
+def parse_args(argv: typing.Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", nargs="+", required=True)
+    parser.add_argument("--start", type=datetime.date.fromisoformat, required=True)
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=datetime.date.today())
+    parser.add_argument("--multiplier", type=int, default=1)
+    # `market_data` holds one bar resolution, which has to match what the scheduler ingests
+    parser.add_argument("--timespan", choices=["minute", "hour", "day"], default="hour")
+    parser.add_argument("--chunk-days", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=4)
+    return parser.parse_args(argv)
+
+
+async def main(argv: typing.Sequence[str] | None = None) -> None:
+    from src.repository.database import async_db
+
+    args = parse_args(argv)
+    redis_client = RedisClient()
+    try:
+        rows = await run_backfill(
+            async_session_factory=async_sessionmaker(async_db.async_engine, expire_on_commit=False),
+            redis_client=redis_client,
+            tickers=[ticker.upper() for ticker in args.tickers],
+            start=args.start,
+            end=args.end,
+            multiplier=args.multiplier,
+            timespan=args.timespan,
+            chunk_days=args.chunk_days,
+            concurrency=args.concurrency,
+        )
+        loguru.logger.info(f"Backfill --- finished, {rows} rows written")
+    finally:
+        await polygon_client.close()
+        await redis_client.close()
+        await async_db.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,280 @@
+"""
+A small async job scheduler for the background work of the ingest leader.
+
+Every job fires on its own interval or cron schedule, anchored to the schedule rather than to when its last
+run finished, so a slow run does not push later ones back. A run may be delayed by random jitter, is
+cancelled past its timeout, and either skips or runs alongside a previous run still in progress. Fires
+missed while the process was down, not leading or stalled are either coalesced into one run as soon as
+possible (`catch_up`) or dropped. Each job keeps run metrics, which are also written to Redis together
+with its last scheduled time, so they can be read from any process and survive leadership changes.
+"""
+
+import asyncio
+import dataclasses
+import datetime
+import random
+import time
+import typing
+
+import loguru
+
+from src.repository.redis import RedisClient
+from src.utilities.formatters.json_formatter import format_into_json_bytes, parse_json_bytes
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+JOB_STATE_KEY = "scheduler:jobs"
+# Upper bound on the missed fires counted when catching up, e.g. after a long outage of a minutely job
+MAX_MISSED_FIRES = 10_000
+
+OverlapPolicy = typing.Literal["skip", "allow"]
+
+
+def utc_now() -> datetime.datetime:
+    return datetime.datetime.now(tz=datetime.timezone.utc)
+
+
+class Schedule(typing.Protocol):
+    def next_after(self, moment: datetime.datetime) -> datetime.datetime: ...
+
+
+@dataclasses.dataclass(frozen=True)
+class IntervalSchedule:
+    """
+    Every `seconds`, aligned to multiples of it since the Unix epoch, so all processes agree on fire times.
+    """
+
+    seconds: float
+
+    def next_after(self, moment: datetime.datetime) -> datetime.datetime:
+        period = datetime.timedelta(seconds=self.seconds)
+        return EPOCH + ((moment - EPOCH) // period + 1) * period
+
+
+def parse_cron_field(field: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in field.split(","):
+        spread, _, raw_step = part.partition("/")
+        step = int(raw_step) if raw_step else 1
+        if spread == "*":
+            first, last = low, high
+        elif "-" in spread:
+            first, last = (int(bound) for bound in spread.split("-", 1))
+        else:
+            first = int(spread)
+            last = high if raw_step else first
+        if not low <= first <= last <= high or step < 1:
+            raise ValueError(f"Cron field `{field}` is out of range {low}-{high}")
+        values.update(range(first, last + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """
+    Five-field cron expression (`minute hour day-of-month month day-of-week`, evaluated in UTC) with `*`,
+    values, ranges, lists and `/step`. Day-of-week runs from 0 (Sunday) to 6, 7 is Sunday as well.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression `{expression}` must have 5 fields")
+        self.expression = expression
+        minutes, hours, days, months, weekdays = fields
+        self.minutes = parse_cron_field(minutes, 0, 59)
+        self.hours = parse_cron_field(hours, 0, 23)
+        self.days = parse_cron_field(days, 1, 31)
+        self.months = parse_cron_field(months, 1, 12)
+        self.weekdays = frozenset(day % 7 for day in parse_cron_field(weekdays, 0, 7))
+        # Like cron, a restricted day-of-month and day-of-week match when either does
+        self.by_day, self.by_weekday = days != "*", weekdays != "*"
+
+    def _day_matches(self, moment: datetime.datetime) -> bool:
+        day_matches = moment.day in self.days
+        weekday_matches = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.by_day and self.by_weekday:
+            return day_matches or weekday_matches
+        return day_matches and weekday_matches
+
+    def next_after(self, moment: datetime.datetime) -> datetime.datetime:
+        candidate = moment.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        horizon = candidate.year + 8
+        while candidate.year <= horizon:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1) + datetime.timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + datetime.timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += datetime.timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression `{self.expression}` never fires")
+
+
+@dataclasses.dataclass
+class Job:
+    name: str
+    run: typing.Callable[[], typing.Awaitable[None]]
+    schedule: Schedule
+    jitter_seconds: float = 0.0
+    timeout_seconds: float | None = None
+    overlap: OverlapPolicy = "skip"
+    catch_up: bool = True
+
+
+@dataclasses.dataclass
+class JobMetrics:
+    runs: int = 0
+    successes: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    skipped_overlaps: int = 0
+    missed_runs: int = 0
+    last_duration: float | None = None
+    max_duration: float = 0.0
+    total_duration: float = 0.0
+    # How late the last run started against its scheduled time, jitter included
+    last_lag: float | None = None
+    max_lag: float = 0.0
+    last_started_at: str | None = None
+    last_error: str | None = None
+
+    @property
+    def mean_duration(self) -> float | None:
+        finished = self.successes + self.failures
+        return self.total_duration / finished if finished else None
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {**dataclasses.asdict(self), "mean_duration": self.mean_duration}
+
+
+class JobScheduler:
+    def __init__(self, redis_client: RedisClient | None = None):
+        self.redis_client = redis_client
+        self.jobs: dict[str, Job] = {}
+        self.metrics: dict[str, JobMetrics] = {}
+        self._running: dict[str, set[asyncio.Task]] = {}
+
+    def register(self, job: Job) -> None:
+        if job.name in self.jobs:
+            raise ValueError(f"Job `{job.name}` is already registered")
+        self.jobs[job.name] = job
+        self.metrics[job.name] = JobMetrics()
+        self._running[job.name] = set()
+
+    def snapshot(self) -> dict[str, dict[str, typing.Any]]:
+        return {name: metrics.snapshot() for name, metrics in self.metrics.items()}
+
+    async def run(self) -> None:
+        """
+        Run every registered job on its schedule until cancelled, which also cancels runs in progress.
+        """
+        loops = [asyncio.create_task(self._run_job(job)) for job in self.jobs.values()]
+        try:
+            await asyncio.gather(*loops)
+        finally:
+            tasks = [*loops, *(task for running in self._running.values() for task in running)]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_job(self, job: Job) -> None:
+        last_scheduled_at = await self._load_last_scheduled_at(job) if job.catch_up else None
+        due = job.schedule.next_after(last_scheduled_at or utc_now())
+        while True:
+            due = self._skip_missed(job, due)
+            delay = (due - utc_now()).total_seconds() + random.uniform(0, job.jitter_seconds)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._launch(job, scheduled_at=due)
+            due = job.schedule.next_after(due)
+
+    def _skip_missed(self, job: Job, due: datetime.datetime) -> datetime.datetime:
+        """
+        Next fire to wait for. Fires already in the past are missed: with `catch_up` the latest of them is
+        kept to run right away, otherwise all are dropped.
+        """
+        now = utc_now()
+        if due > now:
+            return due
+
+        latest, missed = due, 1
+        following = job.schedule.next_after(latest)
+        while following <= now and missed < MAX_MISSED_FIRES:
+            latest, missed = following, missed + 1
+            following = job.schedule.next_after(following)
+
+        metrics = self.metrics[job.name]
+        if job.catch_up:
+            metrics.missed_runs += missed - 1
+            loguru.logger.info(f"Job `{job.name}` --- catching up, {missed} missed runs coalesced into one")
+            return latest
+        metrics.missed_runs += missed
+        loguru.logger.info(f"Job `{job.name}` --- {missed} missed runs dropped")
+        return following
+
+    def _launch(self, job: Job, scheduled_at: datetime.datetime) -> None:
+        running = self._running[job.name]
+        if running and job.overlap == "skip":
+            self.metrics[job.name].skipped_overlaps += 1
+            loguru.logger.warning(f"Job `{job.name}` --- previous run still in progress, skipping")
+            return
+        task = asyncio.create_task(self._execute(job, scheduled_at=scheduled_at))
+        running.add(task)
+        task.add_done_callback(running.discard)
+
+    async def _execute(self, job: Job, scheduled_at: datetime.datetime) -> None:
+        metrics = self.metrics[job.name]
+        started_at = utc_now()
+        metrics.runs += 1
+        metrics.last_lag = (started_at - scheduled_at).total_seconds()
+        metrics.max_lag = max(metrics.max_lag, metrics.last_lag)
+        metrics.last_started_at = started_at.isoformat()
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(job.run(), timeout=job.timeout_seconds)
+            metrics.successes += 1
+            metrics.last_error = None
+        except asyncio.TimeoutError:
+            metrics.failures += 1
+            metrics.timeouts += 1
+            metrics.last_error = f"Timed out after {job.timeout_seconds}s"
+            loguru.logger.error(f"Job `{job.name}` --- {metrics.last_error}")
+        except Exception as e:
+            metrics.failures += 1
+            metrics.last_error = str(e)
+            loguru.logger.error(f"Job `{job.name}` --- failed: {str(e)}")
+        finally:
+            metrics.last_duration = time.monotonic() - started
+            metrics.max_duration = max(metrics.max_duration, metrics.last_duration)
+            metrics.total_duration += metrics.last_duration
+            await self._save_state(job, scheduled_at=scheduled_at)
+
+    async def _load_last_scheduled_at(self, job: Job) -> datetime.datetime | None:
+        if self.redis_client is None:
+            return None
+        try:
+            state = await self.redis_client.hget(JOB_STATE_KEY, job.name)
+        except Exception as e:
+            loguru.logger.warning(f"Job `{job.name}` --- could not read its last run: {str(e)}")
+            return None
+        return datetime.datetime.fromisoformat(parse_json_bytes(state)["last_scheduled_at"]) if state else None
+
+    async def _save_state(self, job: Job, scheduled_at: datetime.datetime) -> None:
+        if self.redis_client is None:
+            return
+        state = {"last_scheduled_at": scheduled_at.isoformat(), "metrics": self.metrics[job.name].snapshot()}
+        try:
+            await asyncio.shield(self.redis_client.hset(JOB_STATE_KEY, job.name, format_into_json_bytes(state)))
+        except Exception as e:
+            loguru.logger.warning(f"Job `{job.name}` --- could not save its state: {str(e)}")
+
+
+async def read_job_states(redis_client: RedisClient) -> dict[str, typing.Any]:
+    """
+    Last scheduled time and metrics of every job, as saved by whichever process ran it last.
+    """
+    states = await redis_client.hgetall(JOB_STATE_KEY)
+    return {name: parse_json_bytes(state) for name, state in states.items()}
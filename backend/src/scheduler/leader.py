@@ -0,0 +1,102 @@
+import asyncio
+import dataclasses
+import time
+import typing
+import uuid
+
+import loguru
+
+from src.repository.redis import RedisClient
+
+
+@dataclasses.dataclass
+class LeaderLeaseMetrics:
+    acquisitions: int = 0
+    renewals: int = 0
+    losses: int = 0
+
+    def snapshot(self) -> dict[str, int]:
+        return dataclasses.asdict(self)
+
+
+class LeaderLease:
+    """
+    Leader election on one Redis key: whoever sets it first holds the lease for `ttl_ms` and keeps renewing
+    it every third of that, everybody else retries at the same pace. A leader that exits releases the key,
+    so a follower takes over within one retry; one that dies without doing so is replaced once the lease
+    expires. A leader that cannot renew steps down before its lease can have expired, so two leaders
+    never run at once.
+    """
+
+    def __init__(self, redis_client: RedisClient, key: str, ttl_ms: int):
+        self.redis_client = redis_client
+        self.key = key
+        self.ttl_ms = ttl_ms
+        self.interval = ttl_ms / 3000
+        self.token = uuid.uuid4().hex
+        self.metrics = LeaderLeaseMetrics()
+        self.is_leader = False
+
+    async def run(self, work: typing.Callable[[], typing.Awaitable[None]]) -> None:
+        """
+        Run `work` whenever this instance holds the lease, and cancel it as soon as the lease is lost, until
+        cancelled itself.
+        """
+        while True:
+            attempted_at = time.monotonic()
+            try:
+                acquired = await self.redis_client.acquire_lock(self.key, self.token, expire_ms=self.ttl_ms)
+            except Exception as e:
+                loguru.logger.warning(f"Leader lease `{self.key}` --- acquire failed: {str(e)}")
+                acquired = False
+
+            if not acquired:
+                await asyncio.sleep(self.interval)
+                continue
+
+            self.metrics.acquisitions += 1
+            self.is_leader = True
+            loguru.logger.info(f"Leader lease `{self.key}` --- acquired")
+            try:
+                await self._lead(work, renewed_at=attempted_at)
+            finally:
+                self.is_leader = False
+                await self._release()
+            # Work that stopped or failed is started again by whoever takes the lease next
+            await asyncio.sleep(self.interval)
+
+    async def _lead(self, work: typing.Callable[[], typing.Awaitable[None]], renewed_at: float) -> None:
+        # `renewed_at` is taken before each request, so the lease is never assumed to last longer than it does
+        task = asyncio.create_task(work())
+        try:
+            while not task.done():
+                await asyncio.wait({task}, timeout=self.interval)
+                if task.done():
+                    break
+                attempted_at = time.monotonic()
+                try:
+                    if not await self.redis_client.renew_lock(self.key, self.token, expire_ms=self.ttl_ms):
+                        self.metrics.losses += 1
+                        loguru.logger.warning(f"Leader lease `{self.key}` --- lost to another instance")
+                        return
+                    self.metrics.renewals += 1
+                    renewed_at = attempted_at
+                except Exception as e:
+                    # Redis may still hold the lease for us, but past its TTL we can no longer assume so
+                    if time.monotonic() - renewed_at + self.interval >= self.ttl_ms / 1000:
+                        self.metrics.losses += 1
+                        loguru.logger.warning(f"Leader lease `{self.key}` --- renew failed, stepping down: {str(e)}")
+                        return
+            if not task.cancelled() and task.exception() is not None:
+                loguru.logger.error(f"Leader lease `{self.key}` --- work failed: {str(task.exception())}")
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    async def _release(self) -> None:
+        try:
+            await asyncio.shield(self.redis_client.release_lock(self.key, self.token))
+            loguru.logger.info(f"Leader lease `{self.key}` --- released")
+        except Exception as e:
+            loguru.logger.warning(f"Leader lease `{self.key}` --- release failed: {str(e)}")
@@ -0,0 +1,52 @@
+"""
+Market data ingestion runner.
+
+    python -m src.scheduler.runner
+
+Runs the background jobs of `src.scheduler.tasks` (ingest, cache warm, rollup refresh) under a Redis leader
+lease, so exactly one ingester is active per deployment however many copies are started. It runs either as
+this dedicated process (with `INGEST_EMBEDDED=false` on the web workers), or embedded in every web worker,
+which then elect one of themselves.
+"""
+
+import asyncio
+import signal
+
+import loguru
+
+from src.config.manager import settings
+from src.repository.polygon_client import polygon_client
+from src.repository.redis import RedisClient, redis_client
+from src.scheduler.leader import LeaderLease
+from src.scheduler.tasks import run_scheduler
+
+INGEST_LEASE_KEY = "ingest:leader"
+
+
+def create_ingest_lease(redis_client: RedisClient) -> LeaderLease:
+    return LeaderLease(redis_client=redis_client, key=INGEST_LEASE_KEY, ttl_ms=settings.INGEST_LEASE_TTL_MS)
+
+
+async def run_ingester(lease: LeaderLease) -> None:
+    """
+    Ingest while `lease` is held, until cancelled.
+    """
+    await lease.run(run_scheduler)
+
+
+async def main() -> None:
+    # Stopped by the orchestrator with SIGTERM: cancelling releases the lease, so a standby takes over at once
+    task = asyncio.current_task()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+
+    try:
+        await run_ingester(create_ingest_lease(redis_client))
+    except asyncio.CancelledError:
+        loguru.logger.info("Ingestion runner --- stopped")
+    finally:
+        await polygon_client.close()
+        await redis_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,92 +1,179 @@
 import asyncio
 import datetime
-import json
 from typing import Any, List
 
 import loguru
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 
 from src.config.manager import settings
-from src.models.db.market import MarketData
+from src.models.db.market import MarketBar
 from src.repository.crud.market import MarketDataCRUDRepository
-from src.repository.polygon_client import fetch_aggregates
+from src.repository.market_broadcast import publish_market_bars
+from src.repository.market_cache import (
+    invalidate_market_data_segments,
+    latest_cache_key,
+    publish_market_data_invalidation,
+    serialize_market_data,
+)
+from src.repository.polygon_client import fetch_aggregates, polygon_client
 from src.repository.redis import redis_client
+from src.repository.timescale import refresh_continuous_aggregates
+from src.scheduler.jobs import CronSchedule, IntervalSchedule, Job, JobScheduler
+from src.utilities.formatters.json_formatter import format_into_json_bytes
+
+
+def to_unix_milliseconds(moment: datetime.datetime) -> str:
+    # Polygon accepts either a `YYYY-MM-DD` date or a Unix millisecond timestamp as range bounds
+    return str(int(moment.timestamp() * 1000))
+
+
+def process_market_data(data: List[dict], ticker: str) -> List[MarketBar]:
+    return [
+        (
+            ticker,
+            datetime.datetime.fromtimestamp(item['t'] / 1000, tz=datetime.timezone.utc),
+            item['o'],
+            item['h'],
+            item['l'],
+            item['c'],
+            int(item['v'])
+        )
+        for item in data
+    ]
+
+
+async def ingest_ticker(
+    async_session_factory: async_sessionmaker[AsyncSession],
+    ticker: str,
+    since: datetime.datetime,
+    until: datetime.datetime,
+) -> None:
+    # Every ticker gets its own session: an AsyncSession must not be shared between concurrent tasks
+    async with async_session_factory() as async_session:
+        try:
+            # The watermark bar itself is fetched again: it may still have been forming on the last run
+            data = await fetch_aggregates(
+                ticker=ticker,
+                multiplier=1,
+                timespan="hour",
+                _from=to_unix_milliseconds(since),
+                to=to_unix_milliseconds(until)
+            )
+
+            market_repo = MarketDataCRUDRepository(async_session)
+            bars = process_market_data(data, ticker)
+            stored = await market_repo.copy_market_bars(bars)
+            if stored:
+                await invalidate_market_data_segments(redis_client, ticker=ticker, start=since, end=until)
+
+            cache_key = f"frequent_ticker:{ticker}"
+            if await redis_client.exists(cache_key):
+                latest_data = await market_repo.get_latest_market_data(ticker)
+                if latest_data:
+                    await redis_client.set(
+                        key=latest_cache_key(ticker),
+                        value=format_into_json_bytes(serialize_market_data(latest_data)),
+                        expire=settings.MARKET_SNAPSHOT_TTL
+                    )
+
+            if stored:
+                # Only after the snapshot is rewritten, so workers do not re-read the old one
+                await publish_market_data_invalidation(redis_client, ticker=ticker)
+                # Pushed from memory: subscribers get the bars without anyone querying them back
+                await publish_market_bars(redis_client, ticker=ticker, bars=bars)
+
+            loguru.logger.info(f"Successfully fetched and stored {stored} bars for {ticker}")
+
+        except Exception as e:
+            await async_session.rollback()
+            loguru.logger.error(f"Error fetching data for {ticker}: {str(e)}")
+
+
+async def update_market_data(async_session_factory: async_sessionmaker[AsyncSession]) -> None:
+    # Failures of single tickers are logged in `ingest_ticker`, anything else fails the job run
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    default_since = now - datetime.timedelta(days=settings.INGEST_LOOKBACK_DAYS)
+
+    tickers = settings.market_tickers
+
+    async with async_session_factory() as async_session:
+        watermarks = await MarketDataCRUDRepository(async_session).get_latest_timestamps(tickers)
 
+    semaphore = asyncio.Semaphore(settings.INGEST_CONCURRENCY)
 
-async def process_market_data(data: List[dict], ticker: str) -> List[MarketData]:
-    market_data_list = []
-    for item in data:
-        market_data = MarketData(
-            ticker=ticker,
-            timestamp=datetime.datetime.fromtimestamp(item['t'] / 1000, tz=datetime.timezone.utc),
-            open_price=item['o'],
-            high_price=item['h'],
-            low_price=item['l'],
-            close_price=item['c'],
-            volume=item['v']
+    async def ingest_with_limit(ticker: str) -> None:
+        async with semaphore:
+            await ingest_ticker(
+                async_session_factory=async_session_factory,
+                ticker=ticker,
+                since=watermarks.get(ticker, default_since),
+                until=now,
+            )
+
+    await asyncio.gather(*(ingest_with_limit(ticker) for ticker in tickers))
+    loguru.logger.info(f"Polygon client metrics: {polygon_client.metrics.snapshot()}")
+
+
+async def warm_market_snapshots(async_session_factory: async_sessionmaker[AsyncSession]) -> None:
+    """
+    Keep the latest-bar snapshot of every watchlist ticker in Redis, so `/market` never reads them from
+    the database itself.
+    """
+    async with async_session_factory() as async_session:
+        latest_data = await MarketDataCRUDRepository(async_session).get_latest_market_data_bulk(
+            settings.market_tickers
+        )
+    if latest_data:
+        await redis_client.set_many(
+            {
+                latest_cache_key(item.ticker): format_into_json_bytes(serialize_market_data(item))
+                for item in latest_data
+            },
+            expire=settings.MARKET_SNAPSHOT_TTL
         )
-        market_data_list.append(market_data)
-    return market_data_list
 
 
-async def update_market_data(async_session: AsyncSession) -> None:
-    try:
-        now = datetime.datetime.now()
-        to_date = now.strftime("%Y-%m-%d")
-        from_date = (now - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
-
-        tickers = ["AAPL", "MSFT", "GOOGL", "AMZN", "META"]
-
-        market_repo = MarketDataCRUDRepository(async_session)
-
-        for ticker in tickers:
-            try:
-                data = await fetch_aggregates(
-                    ticker=ticker,
-                    multiplier=1,
-                    timespan="hour",
-                    _from=from_date,
-                    to=to_date
-                )
-
-                market_data_list = await process_market_data(data, ticker)
-                await market_repo.create_market_data_bulk(market_data_list)
-
-                cache_key = f"frequent_ticker:{ticker}"
-                if await redis_client.exists(cache_key):
-                    latest_data = await market_repo.get_latest_market_data(ticker)
-                    if latest_data:
-                        await redis_client.set(
-                            key=f"market_data:{ticker}",
-                            value=json.dumps({
-                                "ticker": latest_data.ticker,
-                                "timestamp": latest_data.timestamp.isoformat(),
-                                "open_price": latest_data.open_price,
-                                "high_price": latest_data.high_price,
-                                "low_price": latest_data.low_price,
-                                "close_price": latest_data.close_price,
-                                "volume": latest_data.volume
-                            }),
-                            expire=300
-                        )
-
-                loguru.logger.info(f"Successfully fetched and stored data for {ticker}")
-
-            except Exception as e:
-                loguru.logger.error(f"Error fetching data for {ticker}: {str(e)}")
-                continue
-
-    except Exception as e:
-        loguru.logger.error(f"Error in update_market_data task: {str(e)}")
+async def refresh_rollups(engine: AsyncEngine) -> None:
+    # `refresh_continuous_aggregate` cannot run inside a transaction block
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await refresh_continuous_aggregates(connection)
+
+
+def create_job_scheduler(engine: AsyncEngine, async_session_factory: async_sessionmaker[AsyncSession]) -> JobScheduler:
+    job_scheduler = JobScheduler(redis_client=redis_client)
+    job_scheduler.register(Job(
+        name="ingest",
+        run=lambda: update_market_data(async_session_factory),
+        schedule=IntervalSchedule(seconds=settings.UPDATE_INTERVAL_MINUTES * 60),
+        jitter_seconds=settings.INGEST_JITTER_SECONDS,
+        timeout_seconds=settings.INGEST_TIMEOUT_SECONDS,
+    ))
+    job_scheduler.register(Job(
+        name="cache_warm",
+        run=lambda: warm_market_snapshots(async_session_factory),
+        schedule=IntervalSchedule(seconds=settings.CACHE_WARM_INTERVAL_SECONDS),
+        timeout_seconds=settings.CACHE_WARM_INTERVAL_SECONDS,
+        # A snapshot is only worth having fresh, there is nothing to catch up on
+        catch_up=False,
+    ))
+    job_scheduler.register(Job(
+        name="rollup_refresh",
+        run=lambda: refresh_rollups(engine),
+        schedule=CronSchedule(settings.ROLLUP_REFRESH_CRON),
+        jitter_seconds=settings.INGEST_JITTER_SECONDS,
+    ))
+    return job_scheduler
 
 
 async def run_scheduler() -> None:
     from src.repository.database import async_db
 
+    # Sized for the ingest fan-out so concurrent tickers do not queue on the connection pool
     engine = create_async_engine(
         str(async_db.postgres_uri).replace("postgresql://", "postgresql+asyncpg://"),
         echo=settings.IS_DB_ECHO_LOG,
-        pool_size=settings.DB_POOL_SIZE,
+        pool_size=max(settings.DB_POOL_SIZE, settings.INGEST_CONCURRENCY),
         max_overflow=settings.DB_POOL_OVERFLOW,
     )
     async_session_factory = async_sessionmaker(
@@ -96,11 +183,8 @@ async def run_scheduler() -> None:
         autoflush=False
     )
 
-    while True:
-        try:
-            async with async_session_factory() as session:
-                await update_market_data(session)
-            await asyncio.sleep(settings.UPDATE_INTERVAL_MINUTES * 60)
-        except Exception as e:
-            loguru.logger.error(f"Error in scheduler: {str(e)}")
-            await asyncio.sleep(300)
\ No newline at end of file
+    try:
+        await create_job_scheduler(engine, async_session_factory).run()
+    finally:
+        # Cancelled when leadership moves elsewhere: the pool must not outlive it
+        await engine.dispose()
@@ -8,3 +8,9 @@ class EntityAlreadyExists(Exception):
     """
     Throw an exception when the data already exist in the database.
     """
+
+
+class SchemaOutdated(Exception):
+    """
+    Throw an exception when the database schema is not at the latest migration.
+    """
@@ -0,0 +1,33 @@
+import base64
+import binascii
+import datetime
+
+from src.utilities.formatters.json_formatter import format_into_json_bytes, parse_json_bytes
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def encode_cursor(ticker: str, timestamp: datetime.datetime | str) -> str:
+    """
+    Opaque keyset cursor for the bar `(ticker, timestamp)`; the next page starts right after it.
+    """
+    if isinstance(timestamp, str):
+        timestamp = datetime.datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+    payload = format_into_json_bytes([ticker, (timestamp - EPOCH) // MICROSECOND])
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, datetime.datetime]:
+    """
+    Inverse of `encode_cursor`; raises `ValueError` for anything that is not a cursor it produced.
+    """
+    try:
+        ticker, epoch_us = parse_json_bytes(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError(f"Malformed cursor `{cursor}`") from e
+    if not isinstance(ticker, str) or not isinstance(epoch_us, int):
+        raise ValueError(f"Malformed cursor `{cursor}`")
+    return ticker, EPOCH + epoch_us * MICROSECOND
@@ -0,0 +1,19 @@
+import decimal
+import typing
+
+import orjson
+
+
+def _encode_fallback(obj: typing.Any) -> typing.Any:
+    # `numeric` aggregates come back from asyncpg as Decimal, which orjson does not encode natively
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def format_into_json_bytes(obj: typing.Any) -> bytes:
+    return orjson.dumps(obj, default=_encode_fallback)
+
+
+def parse_json_bytes(payload: bytes | str) -> typing.Any:
+    return orjson.loads(payload)
@@ -0,0 +1,120 @@
+import datetime
+import typing
+
+import pyarrow
+
+from src.utilities.formatters.json_formatter import format_into_json_bytes
+
+SeriesFormat = typing.Literal["rows", "columnar", "arrow"]
+
+StreamFormat = typing.Literal["ndjson", "json"]
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+PRICE_FIELDS = ("open_price", "high_price", "low_price", "close_price")
+
+
+def arrow_series_schema(
+    time_field: str, ticker: str, metadata: dict[str, typing.Any] | None = None
+) -> pyarrow.Schema:
+    return pyarrow.schema(
+        [
+            (time_field, pyarrow.timestamp("us", tz="UTC")),
+            *((field, pyarrow.float64()) for field in PRICE_FIELDS),
+            ("volume", pyarrow.int64()),
+        ],
+        metadata={
+            "ticker": ticker,
+            **{key: str(value) for key, value in (metadata or {}).items() if value is not None},
+        },
+    )
+
+
+def to_columns(rows: typing.Sequence[dict[str, typing.Any]], time_field: str) -> dict[str, list[typing.Any]]:
+    return {field: [row[field] for row in rows] for field in (time_field, *PRICE_FIELDS, "volume")}
+
+
+def format_into_arrow_ipc(
+    rows: typing.Sequence[dict[str, typing.Any]],
+    ticker: str,
+    time_field: str,
+    metadata: dict[str, typing.Any] | None = None,
+) -> bytes:
+    """
+    Encode OHLCV rows as an Arrow IPC stream with one record batch, the ticker and any other non-null
+    `metadata` kept in the schema metadata.
+    """
+    schema = arrow_series_schema(time_field=time_field, ticker=ticker, metadata=metadata)
+    columns = to_columns(rows, time_field=time_field)
+    arrays = [
+        pyarrow.array(
+            [value if isinstance(value, datetime.datetime) else datetime.datetime.fromisoformat(value)
+             for value in columns[time_field]],
+            type=schema.field(time_field).type,
+        ),
+        # Aggregates arrive as Decimal, which Arrow will not narrow to float64/int64 by itself
+        *(pyarrow.array([float(value) for value in columns[field]], type=pyarrow.float64()) for field in PRICE_FIELDS),
+        pyarrow.array([int(value) for value in columns["volume"]], type=pyarrow.int64()),
+    ]
+
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(pyarrow.record_batch(arrays, schema=schema))
+    return sink.getvalue().to_pybytes()
+
+
+def format_series(
+    rows: typing.Sequence[dict[str, typing.Any]],
+    ticker: str,
+    time_field: str,
+    series_format: SeriesFormat,
+    extra: dict[str, typing.Any] | None = None,
+) -> bytes:
+    """
+    Encode a series of one ticker: `rows` keeps the list of per-bar objects, `columnar` returns one array
+    per field and `arrow` an Arrow IPC stream, neither repeating the keys or the ticker on every bar.
+    `extra` fields (e.g. a paging cursor) go next to `data`, or into the schema metadata for Arrow.
+    """
+    if series_format == "arrow":
+        return format_into_arrow_ipc(rows, ticker=ticker, time_field=time_field, metadata=extra)
+    if series_format == "columnar":
+        return format_into_json_bytes(
+            {"ticker": ticker, "data": to_columns(rows, time_field=time_field), **(extra or {})}
+        )
+    return format_into_json_bytes({"data": rows, **(extra or {})})
+
+
+def series_media_type(series_format: SeriesFormat) -> str:
+    return ARROW_STREAM_MEDIA_TYPE if series_format == "arrow" else "application/json"
+
+
+async def iter_ndjson(batches: typing.AsyncIterable[list[dict[str, typing.Any]]]) -> typing.AsyncIterator[bytes]:
+    # One chunk per batch rather than per row keeps the number of writes to the socket low
+    async for batch in batches:
+        if batch:
+            yield b"".join(format_into_json_bytes(row) + b"\n" for row in batch)
+
+
+async def iter_json_document(
+    batches: typing.AsyncIterable[list[dict[str, typing.Any]]]
+) -> typing.AsyncIterator[bytes]:
+    """
+    Stream `{"data": [...]}` as chunks, for clients that want one JSON document rather than NDJSON.
+    """
+    yield b'{"data":['
+    separator = b""
+    async for batch in batches:
+        if batch:
+            yield separator + b",".join(format_into_json_bytes(row) for row in batch)
+            separator = b","
+    yield b"]}"
+
+
+def format_stream(
+    batches: typing.AsyncIterable[list[dict[str, typing.Any]]], stream_format: StreamFormat
+) -> typing.AsyncIterator[bytes]:
+    return iter_ndjson(batches) if stream_format == "ndjson" else iter_json_document(batches)
+
+
+def stream_media_type(stream_format: StreamFormat) -> str:
+    return NDJSON_MEDIA_TYPE if stream_format == "ndjson" else "application/json"
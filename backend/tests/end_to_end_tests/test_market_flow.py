@@ -4,13 +4,22 @@ from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.db.market import MarketData
+from src.repository.market_cache import align_to_segment, segment_key
 from src.repository.redis import RedisClient
+from src.repository.symbols import symbol_cache
+
+
+async def create_symbol(async_session: AsyncSession, ticker: str) -> int:
+    symbol_ids = await symbol_cache.get_ids(async_session, [ticker], create=True)
+    await async_session.commit()
+    return symbol_ids[ticker]
 
 
 @pytest.mark.asyncio
 async def test_market_data_flow(test_client: TestClient, async_session: AsyncSession, redis_client: RedisClient):
+    symbol_id = await create_symbol(async_session, "AAPL")
     market_data = MarketData(
-        ticker="AAPL",
+        symbol_id=symbol_id,
         timestamp=datetime.datetime.now(),
         open_price=150.0,
         high_price=155.0,
@@ -45,7 +54,8 @@ async def test_market_data_flow(test_client: TestClient, async_session: AsyncSes
     response = test_client.get("/market/AAPL")
     assert response.status_code == 200
 
-    cached_data = await redis_client.get("market_data:AAPL")
+    segment_start = align_to_segment(market_data.timestamp)
+    cached_data = await redis_client.get(segment_key("AAPL", segment_start))
     assert cached_data is not None
 
     response = test_client.get("/market")
@@ -57,13 +67,14 @@ async def test_market_data_flow(test_client: TestClient, async_session: AsyncSes
 
 @pytest.mark.asyncio
 async def test_market_data_time_range(test_client: TestClient, async_session: AsyncSession):
+    symbol_id = await create_symbol(async_session, "AAPL")
     now = datetime.datetime.now()
     yesterday = now - datetime.timedelta(days=1)
     last_week = now - datetime.timedelta(days=7)
 
     market_data = [
         MarketData(
-            ticker="AAPL",
+            symbol_id=symbol_id,
             timestamp=now,
             open_price=150.0,
             high_price=155.0,
@@ -72,7 +83,7 @@ async def test_market_data_time_range(test_client: TestClient, async_session: As
             volume=1000000
         ),
         MarketData(
-            ticker="AAPL",
+            symbol_id=symbol_id,
             timestamp=yesterday,
             open_price=145.0,
             high_price=149.0,
@@ -81,7 +92,7 @@ async def test_market_data_time_range(test_client: TestClient, async_session: As
             volume=900000
         ),
         MarketData(
-            ticker="AAPL",
+            symbol_id=symbol_id,
             timestamp=last_week,
             open_price=140.0,
             high_price=144.0,
@@ -104,10 +115,11 @@ async def test_market_data_time_range(test_client: TestClient, async_session: As
 
 @pytest.mark.asyncio
 async def test_market_data_aggregates(test_client: TestClient, async_session: AsyncSession):
+    symbol_id = await create_symbol(async_session, "AAPL")
     now = datetime.datetime.now()
     market_data = [
         MarketData(
-            ticker="AAPL",
+            symbol_id=symbol_id,
             timestamp=now - datetime.timedelta(hours=i),
             open_price=150.0 + i,
             high_price=155.0 + i,
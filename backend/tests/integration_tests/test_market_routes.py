@@ -1,19 +1,26 @@
 import datetime
 import json
+import pyarrow
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, MagicMock
 
 from src.api.routes.market import router
+from src.config.manager import settings
 from src.models.db.market import MarketData
 from src.repository.redis import RedisClient
+from src.repository.symbols import symbol_cache
 
 
 @pytest.fixture
 def mock_redis_client():
     client = AsyncMock(spec=RedisClient)
     client.get = AsyncMock(return_value=None)
+    client.get_bytes = AsyncMock(return_value=None)
+    client.mget = AsyncMock(side_effect=lambda keys: [None] * len(keys))
+    client.mget_bytes = AsyncMock(side_effect=lambda keys: [None] * len(keys))
     client.set = AsyncMock()
+    client.set_many = AsyncMock()
     client.convert_decimals = MagicMock(return_value=[{
         "ticker": "AAPL",
         "timestamp": "2024-03-20T10:00:00",
@@ -25,17 +32,27 @@ def mock_redis_client():
     }])
     return client
 
+@pytest.fixture(autouse=True)
+def known_symbols():
+    # The mocked session has no `symbols` table to resolve tickers from
+    symbol_cache.remember([("AAPL", 1), ("MSFT", 2)])
+    yield
+    symbol_cache.clear()
+
 
 @pytest.fixture
 def mock_session():
     session = AsyncMock()
+    # Oldest stored bar, where range cache walks stop
+    session.scalar = AsyncMock(return_value=datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc))
     return session
 
 
 @pytest.fixture
 def test_client(mock_session, mock_redis_client):
     from fastapi import FastAPI
-    from src.api.dependencies.session import get_async_session, get_redis_client
+    from src.api.dependencies.session import get_async_session, get_redis_client, get_single_flight
+    from src.repository.single_flight import SingleFlight
 
     app = FastAPI()
     app.include_router(router)
@@ -48,6 +65,7 @@ def test_client(mock_session, mock_redis_client):
 
     app.dependency_overrides[get_async_session] = override_get_session
     app.dependency_overrides[get_redis_client] = override_get_redis
+    app.dependency_overrides[get_single_flight] = lambda: SingleFlight(redis_client=mock_redis_client)
 
     return TestClient(app)
 
@@ -143,11 +161,252 @@ def test_get_all_market_data(test_client, mock_session, mock_redis_client):
         "close_price": 153.0,
         "volume": 1000000
     }
-    mock_session.execute = AsyncMock(return_value=MagicMock(first=MagicMock(return_value=MagicMock(_mapping=mock_data))))
+    mock_session.execute = AsyncMock(return_value=MagicMock(fetchall=MagicMock(return_value=[MagicMock(_mapping=mock_data)])))
 
     response = test_client.get("/market")
 
     assert response.status_code == 200
     data = response.json()
     assert "data" in data
-    assert "AAPL" in data["data"] 
\ No newline at end of file
+    assert "AAPL" in data["data"] 
+
+def test_get_all_market_data_for_requested_tickers(test_client, mock_session, mock_redis_client):
+    tickers = [f"T{i}" for i in range(500)]
+    cached = json.dumps({"ticker": "T0", "timestamp": "2024-03-20T10:00:00+00:00", "close_price": 1.0}).encode()
+    mock_redis_client.mget_bytes = AsyncMock(side_effect=lambda keys: [cached] + [None] * (len(keys) - 1))
+    mock_rows = [
+        MagicMock(_mapping={
+            "ticker": ticker,
+            "timestamp": datetime.datetime.now(),
+            "open_price": 150.0,
+            "high_price": 155.0,
+            "low_price": 148.0,
+            "close_price": 153.0,
+            "volume": 1000000
+        })
+        for ticker in tickers[1:]
+    ]
+    mock_session.execute = AsyncMock(return_value=MagicMock(fetchall=MagicMock(return_value=mock_rows)))
+
+    response = test_client.get("/market", params={"tickers": ",".join(tickers)})
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert list(data) == tickers
+    assert data["T0"]["close_price"] == 1.0
+    mock_redis_client.mget_bytes.assert_called_once()
+    mock_session.execute.assert_called_once()
+    assert mock_session.execute.call_args.args[1] == {"tickers": tickers[1:]}
+
+
+def test_get_hourly_market_data_served_from_cached_body(test_client, mock_session, mock_redis_client):
+    body = b'{"data":[{"ticker":"AAPL","hour":"2024-03-20T10:00:00+00:00","close_price":153.0}]}'
+    mock_redis_client.get_bytes = AsyncMock(return_value=body)
+    mock_session.execute = AsyncMock()
+
+    response = test_client.get("/market/AAPL/hourly")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == body
+    mock_session.execute.assert_not_called()
+
+
+def test_get_hourly_market_data_in_columnar_and_arrow_formats(test_client, mock_session, mock_redis_client):
+    ticker = "AAPL"
+    mock_data = [{
+        "bucket": datetime.datetime(2024, 3, 20, hour, tzinfo=datetime.timezone.utc),
+        "open_price": 150.0,
+        "high_price": 155.0,
+        "low_price": 148.0,
+        "close_price": 153.0 + hour,
+        "volume": 1000000
+    } for hour in range(3)]
+    mock_session.execute = AsyncMock(return_value=MagicMock(fetchall=MagicMock(return_value=[MagicMock(_mapping=data) for data in mock_data])))
+
+    columnar = test_client.get(f"/market/{ticker}/hourly", params={"format": "columnar"})
+    arrow = test_client.get(f"/market/{ticker}/hourly", params={"format": "arrow"})
+
+    assert columnar.status_code == 200
+    assert columnar.json()["ticker"] == ticker
+    assert columnar.json()["data"]["close_price"] == [153.0, 154.0, 155.0]
+    assert arrow.status_code == 200
+    assert arrow.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pyarrow.ipc.open_stream(arrow.content).read_all()
+    assert table.schema.metadata[b"ticker"] == ticker.encode()
+    assert table.column("close_price").to_pylist() == [153.0, 154.0, 155.0]
+    assert table.column("hour").type == pyarrow.timestamp("us", tz="UTC")
+    assert mock_redis_client.set.call_args_list[0].args[0].endswith(":columnar")
+
+
+def test_unknown_series_format_is_rejected(test_client):
+    response = test_client.get("/market/AAPL/hourly", params={"format": "xml"})
+
+    assert response.status_code == 422
+
+
+def test_stream_market_data_as_ndjson_and_json(test_client):
+    from src.api.dependencies.session import get_async_session_factory
+
+    bars = [{
+        "ticker": "AAPL",
+        "timestamp": datetime.datetime(2024, 3, 20, hour, tzinfo=datetime.timezone.utc),
+        "open_price": 150.0,
+        "high_price": 155.0,
+        "low_price": 148.0,
+        "close_price": 153.0,
+        "volume": 1000000
+    } for hour in range(5)]
+
+    async def partitions():
+        yield bars[:3]
+        yield bars[3:]
+
+    stream_session = AsyncMock()
+    stream_session.stream = AsyncMock(
+        return_value=MagicMock(mappings=MagicMock(return_value=MagicMock(partitions=partitions)))
+    )
+    session_context = MagicMock(
+        __aenter__=AsyncMock(return_value=stream_session),
+        __aexit__=AsyncMock(return_value=False),
+    )
+    test_client.app.dependency_overrides[get_async_session_factory] = lambda: MagicMock(return_value=session_context)
+
+    ndjson = test_client.get("/market/AAPL/stream")
+    document = test_client.get("/market/AAPL/stream", params={"format": "json"})
+
+    assert ndjson.status_code == 200
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [line["timestamp"] for line in lines] == [bar["timestamp"].isoformat() for bar in bars]
+    assert document.json()["data"] == lines
+    assert stream_session.stream.call_args.args[0].get_execution_options()["yield_per"] > 0
+    session_context.__aexit__.assert_called()
+
+
+def test_get_market_data_pages_with_cursor(test_client, mock_session):
+    ticker = "AAPL"
+    now = datetime.datetime.now(tz=datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    mock_data = [
+        MarketData(
+            ticker=ticker,
+            timestamp=now - datetime.timedelta(hours=hours),
+            open_price=150.0,
+            high_price=155.0,
+            low_price=148.0,
+            close_price=153.0,
+            volume=1000000
+        )
+        for hours in range(3)
+    ]
+    mock_session.execute = AsyncMock(return_value=MagicMock(scalars=MagicMock(return_value=MagicMock(all=MagicMock(return_value=mock_data)))))
+
+    # A bounded range keeps the walk inside the cached segments, the mocked query does not filter by time
+    params = {"limit": 2, "start_time": (now - datetime.timedelta(days=1)).isoformat()}
+    first = test_client.get(f"/market/{ticker}", params=params).json()
+    second = test_client.get(f"/market/{ticker}", params={**params, "cursor": first["next_cursor"]}).json()
+
+    assert [row["timestamp"] for row in first["data"]] == [bar.timestamp.isoformat() for bar in mock_data[:2]]
+    assert [row["timestamp"] for row in second["data"]] == [mock_data[2].timestamp.isoformat()]
+    assert second["next_cursor"] is None
+
+
+def test_get_market_data_rejects_foreign_or_malformed_cursor(test_client):
+    from src.utilities.formatters.cursor_formatter import encode_cursor
+
+    foreign = encode_cursor("MSFT", datetime.datetime.now(tz=datetime.timezone.utc))
+
+    assert test_client.get("/market/AAPL", params={"cursor": foreign}).status_code == 400
+    assert test_client.get("/market/AAPL", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_get_ohlcv_market_data(test_client, mock_session, mock_redis_client):
+    mock_data = [{
+        "bucket": datetime.datetime(2024, 3, 18, tzinfo=datetime.timezone.utc),
+        "open_price": 150.0,
+        "high_price": 155.0,
+        "low_price": 148.0,
+        "close_price": 153.0,
+        "volume": 5000000
+    }]
+    mock_session.execute = AsyncMock(return_value=MagicMock(fetchall=MagicMock(return_value=[MagicMock(_mapping=data) for data in mock_data])))
+
+    response = test_client.get("/market/AAPL/ohlcv", params={"interval": "1w"})
+
+    assert response.status_code == 200
+    assert response.json()["data"][0]["timestamp"] == "2024-03-18T00:00:00+00:00"
+    assert "FROM market_data_daily" in str(mock_session.execute.call_args.args[0])
+    assert mock_redis_client.set.call_args.args[0].startswith("market_data_ohlcv_1w:AAPL:")
+    assert test_client.get("/market/AAPL/ohlcv", params={"interval": "2h"}).status_code == 422
+
+
+def test_get_ohlcv_market_data_without_bars_is_cached_briefly(test_client, mock_session, mock_redis_client):
+    mock_session.execute = AsyncMock(return_value=MagicMock(fetchall=MagicMock(return_value=[])))
+
+    assert test_client.get("/market/NOPE/ohlcv", params={"interval": "1d"}).status_code == 404
+    key, body = mock_redis_client.set.call_args.args
+    assert body == b""
+    assert mock_redis_client.set.call_args.kwargs["expire"] == settings.MARKET_CACHE_EMPTY_TTL
+
+    mock_session.execute.reset_mock()
+    mock_redis_client.get_bytes = AsyncMock(return_value=b"")
+    assert test_client.get("/market/NOPE/ohlcv", params={"interval": "1d"}).status_code == 404
+    mock_redis_client.get_bytes.assert_called_once_with(key)
+    mock_session.execute.assert_not_called()
+
+
+def test_get_market_indicators(test_client, mock_session, mock_redis_client):
+    day = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    mock_data = [{
+        "bucket": day + datetime.timedelta(days=i),
+        "open_price": 100.0 + i,
+        "high_price": 100.0 + i,
+        "low_price": 100.0 + i,
+        "close_price": 100.0 + i,
+        "volume": 1000
+    } for i in range(10)][::-1]
+    mock_session.execute = AsyncMock(return_value=MagicMock(fetchall=MagicMock(return_value=[MagicMock(_mapping=data) for data in mock_data])))
+
+    response = test_client.get(
+        "/market/AAPL/indicators",
+        params={"indicators": "sma:3,rsi:3", "start_time": (day + datetime.timedelta(days=8)).isoformat()}
+    )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["timestamp"] == [(day + datetime.timedelta(days=i)).isoformat() for i in (8, 9)]
+    assert data["sma:3"] == [107.0, 108.0]
+    assert data["rsi:3"] == [100.0, 100.0]
+    assert test_client.get("/market/AAPL/indicators", params={"indicators": "nope"}).status_code == 400
+
+
+def test_get_market_correlation(test_client, mock_session):
+    day = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    closes = {"AAPL": [100.0, 101.0, 99.0, 102.0], "MSFT": [200.0, 202.0, 198.0, 204.0]}
+    rows = [
+        {"ticker": ticker, "bucket": day + datetime.timedelta(days=i), "close_price": column[i]}
+        for i in reversed(range(4))
+        for ticker, column in closes.items()
+    ]
+
+    async def partitions():
+        yield rows
+
+    mock_session.stream = AsyncMock(
+        return_value=MagicMock(mappings=MagicMock(return_value=MagicMock(partitions=partitions)))
+    )
+
+    response = test_client.get("/market/correlation", params={"tickers": "MSFT,AAPL", "window": 3})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["tickers"] == ["AAPL", "MSFT"]
+    assert data["returns"] == 3
+    assert data["correlation"][0][1] == pytest.approx(1.0, abs=1e-3)
+    assert len(data["covariance"]) == 2
+    query = mock_session.stream.call_args.args[0]
+    assert "ANY(CAST(:symbol_ids AS INTEGER[]))" in query.text
+    assert mock_session.stream.call_args.args[1]["symbol_ids"] == [1, 2]
+
+    too_many = ",".join(f"T{i}" for i in range(501))
+    assert test_client.get("/market/correlation", params={"tickers": too_many}).status_code == 400
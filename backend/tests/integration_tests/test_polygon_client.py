@@ -0,0 +1,174 @@
+import asyncio
+import datetime
+import email.utils
+import http.server
+import json
+import threading
+import types
+
+import httpx
+import pytest
+
+from src.repository import polygon_client
+from src.repository.polygon_client import PolygonClient, TokenBucket
+
+
+class StubPolygonServer(http.server.ThreadingHTTPServer):
+    """
+    Local stand-in for api.polygon.io replaying scripted `(status, headers, body)` responses in order.
+    """
+
+    def __init__(self, responses):
+        super().__init__(("127.0.0.1", 0), StubPolygonHandler)
+        self.responses = list(responses)
+        self.paths = []
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubPolygonHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        status, headers, body = self.server.responses.pop(0)
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def start(responses):
+        server = StubPolygonServer(responses)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_client(server, **kwargs):
+    options = {"api_key": "test-key", "requests_per_minute": 0, "max_retries": 3, "backoff_base": 0.01}
+    options.update(kwargs)
+    return PolygonClient(base_url=server.base_url, **options)
+
+
+def bar(t):
+    return {"t": t, "o": 1.0, "h": 2.0, "l": 0.5, "c": 1.5, "v": 100}
+
+
+@pytest.mark.asyncio
+async def test_iter_aggregate_pages_follows_next_url(stub_server):
+    server = stub_server([])
+    server.responses.extend(
+        [
+            (
+                200,
+                {},
+                {"results": [bar(1), bar(2)], "next_url": f"{server.base_url}/v2/aggs/ticker/AAPL/next?cursor=abc"},
+            ),
+            (200, {}, {"results": [bar(3)]}),
+        ]
+    )
+    client = make_client(server)
+
+    pages = [page async for page in client.iter_aggregate_pages("AAPL", 1, "hour", "2024-01-01", "2024-01-02")]
+    await client.close()
+
+    assert [[item["t"] for item in page] for page in pages] == [[1, 2], [3]]
+    assert server.paths[0].startswith("/v2/aggs/ticker/AAPL/range/1/hour/2024-01-01/2024-01-02?")
+    assert server.paths[1].startswith("/v2/aggs/ticker/AAPL/next?cursor=abc")
+    assert all("apiKey=test-key" in path for path in server.paths)
+    assert client.metrics.pages == 2
+
+
+@pytest.mark.asyncio
+async def test_request_retries_on_429_and_5xx(stub_server):
+    server = stub_server(
+        [
+            (429, {"Retry-After": "0"}, {"status": "ERROR"}),
+            (503, {}, {"status": "ERROR"}),
+            (200, {}, {"results": [bar(1)]}),
+        ]
+    )
+    client = make_client(server)
+
+    results = await client.fetch_aggregates("AAPL", 1, "hour", "2024-01-01", "2024-01-02")
+    await client.close()
+
+    assert len(results) == 1
+    assert client.metrics.requests == 3
+    assert client.metrics.retries == 2
+    assert client.metrics.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_request_gives_up_after_max_retries(stub_server):
+    server = stub_server([(500, {}, {"status": "ERROR"})] * 3)
+    client = make_client(server, max_retries=2)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.fetch_aggregates("AAPL", 1, "hour", "2024-01-01", "2024-01-02")
+    await client.close()
+
+    assert client.metrics.requests == 3
+    assert client.metrics.failures == 1
+
+
+@pytest.mark.parametrize(
+    "retry_after, expected",
+    [
+        ("2", 2.0),
+        ("3600", 5.0),
+        ("-1", 0.0),
+        (email.utils.format_datetime(datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc), usegmt=True), 0.0),
+        (email.utils.format_datetime(datetime.datetime(2999, 1, 1, tzinfo=datetime.timezone.utc), usegmt=True), 5.0),
+    ],
+)
+def test_retry_after_is_parsed_and_capped(retry_after, expected):
+    client = PolygonClient(api_key="test-key", requests_per_minute=0, backoff_max=5.0)
+    response = httpx.Response(429, headers={"Retry-After": retry_after})
+
+    assert client.backoff_delay(attempt=0, response=response) == expected
+
+
+@pytest.mark.asyncio
+async def test_missing_results_is_empty(stub_server):
+    server = stub_server([(200, {}, {"resultsCount": 0})])
+    client = make_client(server)
+
+    assert await client.fetch_aggregates("AAPL", 1, "hour", "2024-01-01", "2024-01-02") == []
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_throttles_beyond_burst(monkeypatch):
+    clock = {"now": 1000.0}
+
+    async def sleep(seconds):
+        clock["now"] += seconds
+
+    # Only the module's view of the clock is replaced, the event loop keeps the real one
+    monkeypatch.setattr(polygon_client, "time", types.SimpleNamespace(monotonic=lambda: clock["now"]))
+    monkeypatch.setattr(polygon_client, "asyncio", types.SimpleNamespace(Lock=asyncio.Lock, sleep=sleep))
+    bucket = TokenBucket(rate=50, capacity=2)
+
+    waits = [await bucket.acquire() for _ in range(4)]
+
+    # Two tokens of burst, then one token per 1/50 s
+    assert waits == [0.0, 0.0, pytest.approx(0.02), pytest.approx(0.02)]
+    assert clock["now"] == pytest.approx(1000.04)
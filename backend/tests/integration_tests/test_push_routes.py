@@ -0,0 +1,37 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from unittest.mock import MagicMock
+
+from src.api.dependencies.session import get_market_broadcaster
+from src.api.routes.push import router
+from src.repository.market_broadcast import MarketBroadcaster, bar_channel
+
+
+@pytest.fixture
+def broadcaster():
+    return MarketBroadcaster(redis_client=MagicMock(), queue_size=10)
+
+
+@pytest.fixture
+def test_client(broadcaster):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_market_broadcaster] = lambda: broadcaster
+    return TestClient(app)
+
+
+def test_websocket_receives_bars_of_subscribed_tickers(test_client, broadcaster):
+    with test_client.websocket_connect("/push/ws?tickers=AAPL,MSFT") as websocket:
+        websocket.portal.call(broadcaster.dispatch, bar_channel("GOOGL"), b'{"ticker":"GOOGL"}')
+        websocket.portal.call(broadcaster.dispatch, bar_channel("AAPL"), b'{"ticker":"AAPL"}')
+
+        assert websocket.receive_json() == {"ticker": "AAPL"}
+        assert broadcaster.metrics.subscribers == 1
+
+
+def test_websocket_without_tickers_is_refused(test_client):
+    with pytest.raises(WebSocketDisconnect):
+        with test_client.websocket_connect("/push/ws?tickers=,") as websocket:
+            websocket.receive_text()
@@ -0,0 +1,115 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import fastapi
+import httpx
+import pytest
+
+from src.api.dependencies.session import get_async_session
+from src.repository.database import async_db
+
+CONCURRENT_REQUESTS = 8
+
+
+class SessionFactory:
+    """
+    Stand-in for `async_sessionmaker` that counts the sessions open at once. Queries wait until
+    `concurrent_queries` of them are in flight, which requests sharing or queueing on one session never reach.
+    """
+
+    def __init__(self, concurrent_queries: int):
+        self.concurrent_queries = concurrent_queries
+        self.sessions: list[MagicMock] = []
+        self.open_sessions = 0
+        self.peak_open_sessions = 0
+        self.queries_in_flight = 0
+        self.all_queries_in_flight = asyncio.Event()
+
+    def __call__(self) -> MagicMock:
+        session = MagicMock(commit=AsyncMock(), rollback=AsyncMock())
+
+        async def execute(*args, **kwargs):
+            self.queries_in_flight += 1
+            if self.queries_in_flight == self.concurrent_queries:
+                self.all_queries_in_flight.set()
+            # Only guards against a hang, the assertions do not depend on timing
+            await asyncio.wait_for(self.all_queries_in_flight.wait(), timeout=5)
+
+        async def enter():
+            self.open_sessions += 1
+            self.peak_open_sessions = max(self.peak_open_sessions, self.open_sessions)
+            return session
+
+        async def exit(*exc_info):
+            self.open_sessions -= 1
+            return False
+
+        session.execute = AsyncMock(side_effect=execute)
+        session.__aenter__ = AsyncMock(side_effect=enter)
+        session.__aexit__ = AsyncMock(side_effect=exit)
+        self.sessions.append(session)
+        return session
+
+
+@pytest.fixture
+def app() -> fastapi.FastAPI:
+    app = fastapi.FastAPI()
+
+    @app.get("/query")
+    async def query(async_session=fastapi.Depends(get_async_session)) -> dict:
+        await async_session.execute("SELECT 1")
+        return {}
+
+    @app.get("/fail")
+    async def fail(async_session=fastapi.Depends(get_async_session)) -> dict:
+        await async_session.execute("SELECT 1")
+        raise RuntimeError("handler failed")
+
+    return app
+
+
+async def run_concurrent_requests(app: fastapi.FastAPI, count: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        responses = await asyncio.gather(*(client.get("/query") for _ in range(count)))
+    assert all(response.status_code == 200 for response in responses)
+
+
+async def test_every_request_gets_its_own_session_committed_after_the_handler(app, monkeypatch):
+    factory = SessionFactory(concurrent_queries=CONCURRENT_REQUESTS)
+    monkeypatch.setattr(async_db, "async_session_factory", factory)
+
+    await run_concurrent_requests(app, CONCURRENT_REQUESTS)
+
+    assert len(factory.sessions) == CONCURRENT_REQUESTS
+    for session in factory.sessions:
+        session.commit.assert_awaited_once()
+        session.rollback.assert_not_awaited()
+        session.__aexit__.assert_awaited_once()
+
+
+async def test_concurrent_requests_hold_their_sessions_at_the_same_time(app, monkeypatch):
+    factory = SessionFactory(concurrent_queries=CONCURRENT_REQUESTS)
+    monkeypatch.setattr(async_db, "async_session_factory", factory)
+
+    await run_concurrent_requests(app, CONCURRENT_REQUESTS)
+
+    # Every request had its own session open while the others ran, and all of them are closed afterwards
+    assert factory.peak_open_sessions == CONCURRENT_REQUESTS
+    assert factory.open_sessions == 0
+
+
+async def test_failed_request_rolls_its_session_back(app, monkeypatch):
+    factory = SessionFactory(concurrent_queries=1)
+    monkeypatch.setattr(async_db, "async_session_factory", factory)
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        response = await client.get("/fail")
+
+    assert response.status_code == 500
+    (session,) = factory.sessions
+    session.rollback.assert_awaited_once()
+    session.commit.assert_not_awaited()
+    session.__aexit__.assert_awaited_once()
+    assert factory.open_sessions == 0
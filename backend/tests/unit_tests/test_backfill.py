@@ -0,0 +1,106 @@
+import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.scheduler import backfill
+from src.scheduler.backfill import BackfillChunk, plan_backfill_chunks, run_backfill
+
+
+def test_plan_backfill_chunks_aligns_to_windows():
+    chunks = plan_backfill_chunks(
+        tickers=["AAPL"], start=datetime.date(1970, 1, 5), end=datetime.date(1970, 1, 25), chunk_days=10
+    )
+
+    assert chunks == [
+        BackfillChunk("AAPL", datetime.date(1970, 1, 5), datetime.date(1970, 1, 10)),
+        BackfillChunk("AAPL", datetime.date(1970, 1, 11), datetime.date(1970, 1, 20)),
+        BackfillChunk("AAPL", datetime.date(1970, 1, 21), datetime.date(1970, 1, 25)),
+    ]
+
+
+def test_plan_backfill_chunks_covers_every_ticker():
+    chunks = plan_backfill_chunks(
+        tickers=["AAPL", "MSFT"], start=datetime.date(2024, 1, 1), end=datetime.date(2024, 12, 31), chunk_days=30
+    )
+
+    for ticker in ("AAPL", "MSFT"):
+        ticker_chunks = [chunk for chunk in chunks if chunk.ticker == ticker]
+        assert ticker_chunks[0].start == datetime.date(2024, 1, 1)
+        assert ticker_chunks[-1].end == datetime.date(2024, 12, 31)
+        for previous, current in zip(ticker_chunks, ticker_chunks[1:]):
+            assert current.start == previous.end + datetime.timedelta(days=1)
+
+
+@pytest.mark.asyncio
+async def test_run_backfill_resumes_from_checkpoint(monkeypatch):
+    start, end = datetime.date(1970, 1, 1), datetime.date(1970, 1, 20)
+    done = BackfillChunk("AAPL", datetime.date(1970, 1, 1), datetime.date(1970, 1, 10))
+    redis_client = MagicMock(
+        smembers=AsyncMock(side_effect=lambda key: {done.checkpoint_member} if key.startswith("backfill:") else set()),
+        sadd=AsyncMock(),
+        delete=AsyncMock(return_value=1),
+        publish=AsyncMock(return_value=0),
+    )
+    backfill_chunk = AsyncMock(return_value=7)
+    monkeypatch.setattr(backfill, "backfill_chunk", backfill_chunk)
+
+    rows = await run_backfill(
+        async_session_factory=MagicMock(),
+        redis_client=redis_client,
+        tickers=["AAPL"],
+        start=start,
+        end=end,
+        chunk_days=10,
+        client=MagicMock(),
+    )
+
+    assert rows == 7
+    assert backfill_chunk.call_count == 1
+    assert backfill_chunk.call_args.kwargs["chunk"].start == datetime.date(1970, 1, 11)
+    redis_client.sadd.assert_called_once_with("backfill:checkpoint:1:hour", "AAPL:1970-01-11:1970-01-20")
+    redis_client.publish.assert_called_once_with("market_data:invalidate", "AAPL")
+
+
+@pytest.mark.asyncio
+async def test_run_backfill_does_not_checkpoint_failed_chunks(monkeypatch):
+    redis_client = MagicMock(smembers=AsyncMock(return_value=set()), sadd=AsyncMock())
+    monkeypatch.setattr(backfill, "backfill_chunk", AsyncMock(side_effect=RuntimeError("boom")))
+
+    rows = await run_backfill(
+        async_session_factory=MagicMock(),
+        redis_client=redis_client,
+        tickers=["AAPL"],
+        start=datetime.date(1970, 1, 1),
+        end=datetime.date(1970, 1, 10),
+        chunk_days=10,
+        client=MagicMock(),
+    )
+
+    assert rows == 0
+    redis_client.sadd.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_backfill_does_not_checkpoint_chunks_reaching_today(monkeypatch):
+    redis_client = MagicMock(
+        smembers=AsyncMock(return_value=set()),
+        sadd=AsyncMock(),
+        delete=AsyncMock(return_value=1),
+        publish=AsyncMock(return_value=0),
+    )
+    monkeypatch.setattr(backfill, "backfill_chunk", AsyncMock(return_value=7))
+    monkeypatch.setattr(backfill, "utc_today", lambda: datetime.date(1970, 1, 15))
+
+    await run_backfill(
+        async_session_factory=MagicMock(),
+        redis_client=redis_client,
+        tickers=["AAPL"],
+        start=datetime.date(1970, 1, 1),
+        end=datetime.date(1970, 1, 15),
+        chunk_days=10,
+        client=MagicMock(),
+    )
+
+    # The second chunk ends today, so a re-run fetches it again along with the rest of the day's bars
+    redis_client.sadd.assert_called_once_with("backfill:checkpoint:1:hour", "AAPL:1970-01-01:1970-01-10")
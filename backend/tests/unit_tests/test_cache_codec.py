@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from src.repository.cache_codec import CachePayloadCodec
+
+BARS = json.dumps(
+    [
+        {
+            "ticker": "AAPL",
+            "timestamp": f"2024-03-20T{hour:02d}:00:00+00:00",
+            "open_price": 150.0 + hour,
+            "high_price": 155.0 + hour,
+            "low_price": 148.0 + hour,
+            "close_price": 153.0 + hour,
+            "volume": 1000000 + hour,
+        }
+        for hour in range(24)
+    ]
+).encode()
+
+
+def test_large_payloads_are_compressed_and_restored():
+    codec = CachePayloadCodec.from_name("zlib", threshold=1024, level=6)
+
+    stored = codec.encode(BARS)
+
+    assert len(stored) < len(BARS)
+    assert codec.decode(stored) == BARS
+    assert codec.metrics.compressed_writes == 1
+    assert codec.metrics.compression_ratio > 2
+
+
+def test_small_payloads_are_stored_as_is():
+    codec = CachePayloadCodec.from_name("zlib", threshold=1024, level=6)
+    snapshot = b'{"ticker":"AAPL","close_price":153.0}'
+
+    assert codec.encode(snapshot) == snapshot
+    assert codec.decode(snapshot) == snapshot
+    assert codec.decode(None) is None
+    assert codec.metrics.compressed_writes == 0
+    assert codec.metrics.compression_ratio == 1.0
+
+
+def test_compressed_payloads_stay_readable_after_disabling_compression():
+    stored = CachePayloadCodec.from_name("zlib", threshold=0, level=6).encode(BARS)
+    codec = CachePayloadCodec.from_name("none", threshold=0, level=6)
+
+    assert codec.encode(BARS) == BARS
+    assert codec.decode(stored) == BARS
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        CachePayloadCodec.from_name("brotli", threshold=1024, level=6)
+
+
+@pytest.mark.parametrize("stored", [b"\x00", b"\x00\x7fpayload", b"\x00\x01not zlib"])
+def test_unreadable_payloads_are_misses(stored):
+    codec = CachePayloadCodec.from_name("zlib", threshold=1024, level=6)
+
+    assert codec.decode(stored) is None
+    assert codec.metrics.decode_errors == 1
@@ -0,0 +1,105 @@
+import datetime
+import itertools
+
+import numpy
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.indicators.returns import log_returns, pairwise_moments
+from src.repository.correlation_cache import ReturnCorrelationCache, load_close_matrix
+from src.repository.redis import RedisClient
+from src.repository.timescale import OHLCV_INTERVALS
+from src.utilities.formatters.json_formatter import parse_json_bytes
+
+DAY = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def close_rows(closes: dict[str, list[float | None]]) -> list[dict]:
+    # Newest bucket first, like `stream_closes`; None leaves the bar out
+    days = len(next(iter(closes.values())))
+    return [
+        {"ticker": ticker, "bucket": DAY + datetime.timedelta(days=day), "close_price": column[day]}
+        for day in reversed(range(days))
+        for ticker, column in closes.items()
+        if column[day] is not None
+    ]
+
+
+def make_market_repo(rows: list[dict], batch_size: int = 3) -> MagicMock:
+    market_repo = MagicMock()
+    market_repo.closed = False
+
+    async def stream_closes(**kwargs):
+        try:
+            for start in range(0, len(rows), batch_size):
+                yield rows[start:start + batch_size]
+        finally:
+            market_repo.closed = True
+
+    market_repo.stream_closes = MagicMock(side_effect=stream_closes)
+    return market_repo
+
+
+def test_pairwise_moments_match_numpy_over_common_returns():
+    rng = numpy.random.default_rng(3)
+    closes = 100 * numpy.exp(numpy.cumsum(rng.normal(0, 0.01, (200, 4)), axis=0))
+    closes[:40, 2] = numpy.nan
+    closes[90, 1] = numpy.nan
+    returns = log_returns(closes)
+
+    moments = pairwise_moments(returns)
+
+    for i, j in itertools.product(range(4), repeat=2):
+        common = ~numpy.isnan(returns[:, i]) & ~numpy.isnan(returns[:, j])
+        x, y = returns[common, i], returns[common, j]
+        assert moments.observations[i, j] == common.sum()
+        assert moments.covariance[i, j] == pytest.approx(numpy.cov(x, y)[0, 1])
+        assert moments.correlation[i, j] == pytest.approx(numpy.corrcoef(x, y)[0, 1])
+
+
+def test_pairwise_moments_leave_pairs_without_enough_returns_empty():
+    returns = numpy.array([[0.01, numpy.nan], [0.02, numpy.nan], [-0.01, 0.03]])
+
+    moments = pairwise_moments(returns)
+
+    assert moments.correlation[0, 0] == pytest.approx(1.0)
+    assert numpy.isnan(moments.correlation[0, 1]) and numpy.isnan(moments.covariance[1, 1])
+    assert moments.observations.tolist() == [[3, 1], [1, 1]]
+
+
+async def test_load_close_matrix_fills_the_last_buckets_and_closes_the_cursor():
+    market_repo = make_market_repo(close_rows({"AAPL": [1.0, 2.0, 3.0, 4.0, 5.0], "MSFT": [1.0, None, 3.0, 4.0, 5.0]}))
+
+    buckets, closes = await load_close_matrix(
+        market_repo, tickers=["AAPL", "MSFT"], interval=OHLCV_INTERVALS["1d"], window=3, end_time=DAY
+    )
+
+    assert buckets == [DAY + datetime.timedelta(days=day) for day in (2, 3, 4)]
+    assert closes.tolist() == [[3.0, 3.0], [4.0, 4.0], [5.0, 5.0]]
+    assert market_repo.closed
+
+
+async def test_correlation_is_computed_once_and_cached_as_the_response_body():
+    redis_client = AsyncMock(spec=RedisClient)
+    redis_client.get_bytes = AsyncMock(return_value=None)
+    market_repo = make_market_repo(close_rows({"MSFT": [1.0, 2.0, 2.0, 4.0], "AAPL": [2.0, 4.0, 4.0, 8.0]}))
+    correlation_cache = ReturnCorrelationCache(redis_client=redis_client, market_repo=market_repo)
+
+    body = await correlation_cache.get_correlation(
+        tickers=["MSFT", "AAPL", "TSLA"], interval=OHLCV_INTERVALS["1d"], window=10, end_time=DAY
+    )
+
+    result = parse_json_bytes(body)
+    assert result["tickers"] == ["AAPL", "MSFT"] and result["missing"] == ["TSLA"]
+    assert result["returns"] == 3
+    assert result["correlation"] == [[pytest.approx(1.0)] * 2] * 2
+    assert market_repo.stream_closes.call_args.kwargs["tickers"] == ["AAPL", "MSFT", "TSLA"]
+    key, cached_body = redis_client.set.call_args.args
+    assert cached_body == body
+
+    redis_client.get_bytes = AsyncMock(return_value=body)
+    assert await correlation_cache.get_correlation(
+        tickers=["TSLA", "AAPL", "MSFT"], interval=OHLCV_INTERVALS["1d"], window=10, end_time=DAY
+    ) == body
+    redis_client.get_bytes.assert_called_once_with(key)
+    assert market_repo.stream_closes.call_count == 1
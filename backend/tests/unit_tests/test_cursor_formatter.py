@@ -0,0 +1,18 @@
+import datetime
+
+import pytest
+
+from src.utilities.formatters.cursor_formatter import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trips_ticker_and_timestamp():
+    timestamp = datetime.datetime(2024, 3, 20, 10, 0, 0, 123456, tzinfo=datetime.timezone.utc)
+
+    assert decode_cursor(encode_cursor("AAPL", timestamp)) == ("AAPL", timestamp)
+    assert decode_cursor(encode_cursor("AAPL", timestamp.isoformat())) == ("AAPL", timestamp)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "WzEsMl0", "eyJhIjoxfQ"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
@@ -0,0 +1,120 @@
+import datetime
+import math
+
+import numpy
+import pytest
+
+from src.indicators.engine import IndicatorEngine, IndicatorSpec, OhlcvArrays
+from src.repository.indicator_cache import IndicatorSeriesCache
+from src.repository.timescale import OHLCV_INTERVALS
+from src.utilities.formatters.json_formatter import format_into_json_bytes, parse_json_bytes
+
+SPECS = [IndicatorSpec.parse(spec) for spec in ("sma:5", "ema:5", "rsi:5", "macd:3:6:3", "bbands:5:2", "vwap")]
+
+
+def make_bars(count: int, seed: int = 7) -> OhlcvArrays:
+    rng = numpy.random.default_rng(seed)
+    close = 100 + numpy.cumsum(rng.normal(0, 1, count))
+    return OhlcvArrays(high=close + 1, low=close - 1, close=close, volume=rng.integers(1, 1000, count).astype(float))
+
+
+def chunk(bars: OhlcvArrays, start: int, stop: int) -> OhlcvArrays:
+    return OhlcvArrays(bars.high[start:stop], bars.low[start:stop], bars.close[start:stop], bars.volume[start:stop])
+
+
+def test_spec_parsing_fills_defaults_and_rejects_bad_input():
+    assert IndicatorSpec.parse("macd").key == "macd:12:26:9"
+    assert IndicatorSpec.parse("bbands:20:2.5").outputs == [
+        "bbands:20:2.5:upper", "bbands:20:2.5:middle", "bbands:20:2.5:lower"
+    ]
+    for spec in ("foo", "sma:0", "sma:2.5", "sma:x", "sma:1:2"):
+        with pytest.raises(ValueError):
+            IndicatorSpec.parse(spec)
+
+
+def test_sma_rsi_and_vwap_values():
+    bars = OhlcvArrays(
+        high=numpy.arange(1.0, 8.0), low=numpy.arange(1.0, 8.0), close=numpy.arange(1.0, 8.0), volume=numpy.ones(7)
+    )
+    values = IndicatorEngine([IndicatorSpec.parse(spec) for spec in ("sma:3", "rsi:3", "vwap")]).extend(bars)
+
+    assert numpy.isnan(values["sma:3"][:2]).all()
+    assert values["sma:3"][2:].tolist() == [2.0, 3.0, 4.0, 5.0, 6.0]
+    assert values["rsi:3"][3:].tolist() == [100.0] * 4
+    assert values["vwap"].tolist() == [1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0]
+
+
+def test_incremental_updates_match_a_full_recomputation():
+    bars = make_bars(200)
+    full = IndicatorEngine(SPECS).extend(bars)
+
+    engine = IndicatorEngine(SPECS)
+    incremental = {output: [] for output in engine.outputs}
+    for start in range(0, 200, 37):
+        # Every step goes through the serialized state, as it does between requests
+        engine = IndicatorEngine.from_dict(SPECS, parse_json_bytes(format_into_json_bytes(engine.to_dict())))
+        for output, column in engine.extend(chunk(bars, start, start + 37)).items():
+            incremental[output].extend(column.tolist())
+
+    for output, column in full.items():
+        numpy.testing.assert_allclose(numpy.array(incremental[output], dtype=float), column, equal_nan=True)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.sets = {}
+
+    async def get_bytes(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, expire=None):
+        self.store[key] = value
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+
+class FakeMarketRepository:
+    def __init__(self, rows):
+        self.rows = rows
+        self.start_times = []
+
+    async def get_ohlcv(self, ticker, interval, start_time=None, end_time=None):
+        self.start_times.append(start_time)
+        rows = [row for row in self.rows if start_time is None or row["bucket"] >= start_time]
+        return rows[::-1]
+
+
+@pytest.mark.asyncio
+async def test_cached_series_is_extended_with_new_buckets_only():
+    bars = make_bars(30)
+    day = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    rows = [
+        {
+            "bucket": day + datetime.timedelta(days=i),
+            "high_price": bars.high[i],
+            "low_price": bars.low[i],
+            "close_price": bars.close[i],
+            "volume": bars.volume[i],
+        }
+        for i in range(30)
+    ]
+    repo = FakeMarketRepository(rows[:20])
+    cache = IndicatorSeriesCache(redis_client=FakeRedis(), market_repo=repo)
+    interval = OHLCV_INTERVALS["1d"]
+
+    # Day 19 is still forming: previewed, but not part of the stored state
+    timestamps, _ = await cache.get_indicators("AAPL", interval, SPECS, now=day + datetime.timedelta(days=19, hours=12))
+    assert len(timestamps) == 20
+
+    repo.rows = rows
+    timestamps, values = await cache.get_indicators("AAPL", interval, SPECS, now=day + datetime.timedelta(days=30))
+
+    assert repo.start_times == [None, day + datetime.timedelta(days=19)]
+    assert len(timestamps) == 30
+    full = IndicatorEngine(SPECS).extend(bars)
+    for output, column in full.items():
+        assert [None if math.isnan(value) else value for value in column.tolist()] == pytest.approx(
+            [None if value is None or math.isnan(value) else value for value in values[output]]
+        )
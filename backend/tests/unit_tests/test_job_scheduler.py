@@ -0,0 +1,140 @@
+import asyncio
+import datetime
+
+import pytest
+
+from src.scheduler.jobs import JOB_STATE_KEY, CronSchedule, IntervalSchedule, Job, JobScheduler, read_job_states
+from src.utilities.formatters.json_formatter import format_into_json_bytes
+
+UTC = datetime.timezone.utc
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value.decode() if isinstance(value, bytes) else value
+        return 1
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+
+def at(*parts):
+    return datetime.datetime(*parts, tzinfo=UTC)
+
+
+async def run_for(job_scheduler, seconds):
+    task = asyncio.create_task(job_scheduler.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.parametrize("expression, moment, expected", [
+    ("15 * * * *", at(2024, 3, 20, 10, 20, 5), at(2024, 3, 20, 11, 15)),
+    ("*/15 * * * *", at(2024, 3, 20, 10, 15), at(2024, 3, 20, 10, 30)),
+    # Friday evening to Monday morning
+    ("0 9 * * 1-5", at(2024, 3, 22, 18, 0), at(2024, 3, 25, 9, 0)),
+    ("30 2 29 2 *", at(2024, 3, 1), at(2028, 2, 29, 2, 30)),
+    # A restricted day-of-month or day-of-week: the 1st of April 2024 is a Monday, the 7th a Sunday
+    ("0 0 7 * 0", at(2024, 3, 31, 12, 0), at(2024, 4, 7, 0, 0)),
+])
+def test_cron_schedule_next_fire(expression, moment, expected):
+    assert CronSchedule(expression).next_after(moment) == expected
+
+
+def test_cron_schedule_rejects_bad_expressions():
+    for expression in ("* * * *", "60 * * * *", "* * * * 8", "5-1 * * * *", "*/0 * * * *", "0 0 31 2 *"):
+        with pytest.raises(ValueError):
+            CronSchedule(expression).next_after(at(2024, 1, 1))
+
+
+def test_interval_schedule_is_aligned_to_the_epoch():
+    schedule = IntervalSchedule(seconds=3600)
+
+    assert schedule.next_after(at(2024, 3, 20, 10, 20)) == at(2024, 3, 20, 11, 0)
+    assert schedule.next_after(at(2024, 3, 20, 11, 0)) == at(2024, 3, 20, 12, 0)
+
+
+@pytest.mark.asyncio
+async def test_slow_runs_do_not_push_later_ones_back():
+    runs = 0
+
+    async def slow():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.12)
+
+    job_scheduler = JobScheduler()
+    job_scheduler.register(Job(name="slow", run=slow, schedule=IntervalSchedule(seconds=0.05), overlap="allow"))
+    await run_for(job_scheduler, 0.52)
+
+    # Fired every 0.05s although each run takes 0.12s
+    assert runs >= 8
+    assert job_scheduler.metrics["slow"].max_lag < 0.05
+
+
+@pytest.mark.asyncio
+async def test_overlapping_runs_are_skipped_and_timeouts_counted():
+    in_flight = peak = 0
+
+    async def slow():
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.12)
+        finally:
+            in_flight -= 1
+
+    async def stuck():
+        await asyncio.sleep(10)
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    job_scheduler = JobScheduler()
+    job_scheduler.register(Job(name="slow", run=slow, schedule=IntervalSchedule(seconds=0.05)))
+    job_scheduler.register(Job(name="stuck", run=stuck, schedule=IntervalSchedule(seconds=0.1), timeout_seconds=0.02))
+    job_scheduler.register(Job(name="broken", run=broken, schedule=IntervalSchedule(seconds=0.1)))
+    await run_for(job_scheduler, 0.5)
+
+    metrics = job_scheduler.snapshot()
+    assert peak == 1 and metrics["slow"]["skipped_overlaps"] >= 4 and metrics["slow"]["successes"] >= 2
+    assert metrics["stuck"]["timeouts"] == metrics["stuck"]["failures"] >= 3
+    assert metrics["broken"]["failures"] >= 3 and metrics["broken"]["last_error"] == "boom"
+    assert metrics["slow"]["mean_duration"] == pytest.approx(0.12, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_missed_runs_are_caught_up_once_from_the_saved_state():
+    redis_client = FakeRedis()
+    last_scheduled_at = datetime.datetime.now(tz=UTC) - datetime.timedelta(hours=5, minutes=30)
+    for name in ("catch_up", "no_catch_up"):
+        await redis_client.hset(
+            JOB_STATE_KEY, name, format_into_json_bytes({"last_scheduled_at": last_scheduled_at.isoformat()})
+        )
+    runs = {"catch_up": 0, "no_catch_up": 0}
+
+    def count(name):
+        async def run():
+            runs[name] += 1
+        return run
+
+    job_scheduler = JobScheduler(redis_client=redis_client)
+    job_scheduler.register(Job(name="catch_up", run=count("catch_up"), schedule=IntervalSchedule(seconds=3600)))
+    job_scheduler.register(Job(
+        name="no_catch_up", run=count("no_catch_up"), schedule=IntervalSchedule(seconds=3600), catch_up=False
+    ))
+    await run_for(job_scheduler, 0.1)
+
+    assert runs == {"catch_up": 1, "no_catch_up": 0}
+    assert job_scheduler.metrics["catch_up"].missed_runs >= 4
+    states = await read_job_states(redis_client)
+    assert states["catch_up"]["metrics"]["successes"] == 1
+    assert datetime.datetime.fromisoformat(states["catch_up"]["last_scheduled_at"]) > last_scheduled_at
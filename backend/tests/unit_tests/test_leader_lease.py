@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+
+from src.scheduler.leader import LeaderLease
+
+TTL_MS = 300
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.failing = False
+
+    def _holder(self, key):
+        token, expires_at = self.store.get(key, (None, 0.0))
+        return token if expires_at > time.monotonic() else None
+
+    async def acquire_lock(self, key, token, expire_ms):
+        if self.failing:
+            raise ConnectionError("redis is down")
+        if self._holder(key) is not None:
+            return False
+        self.store[key] = (token, time.monotonic() + expire_ms / 1000)
+        return True
+
+    async def renew_lock(self, key, token, expire_ms):
+        if self.failing:
+            raise ConnectionError("redis is down")
+        if self._holder(key) != token:
+            return False
+        self.store[key] = (token, time.monotonic() + expire_ms / 1000)
+        return True
+
+    async def release_lock(self, key, token):
+        if self._holder(key) == token:
+            del self.store[key]
+            return True
+        return False
+
+
+def make_work(name, running, log):
+    async def work():
+        running.add(name)
+        log.append(name)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            running.discard(name)
+
+    return work
+
+
+async def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+    return time.monotonic()
+
+
+@pytest.mark.asyncio
+async def test_one_leader_at_a_time_and_failover_on_exit():
+    redis_client = FakeRedis()
+    running, log = set(), []
+    leases = {name: LeaderLease(redis_client, key="ingest:leader", ttl_ms=TTL_MS) for name in ("a", "b", "c")}
+    tasks = {name: asyncio.create_task(lease.run(make_work(name, running, log))) for name, lease in leases.items()}
+
+    await wait_for(lambda: running, timeout=1)
+    for _ in range(10):
+        await asyncio.sleep(TTL_MS / 4000)
+        assert len(running) == 1
+    (leader,) = running
+
+    stopped_at = time.monotonic()
+    tasks[leader].cancel()
+    await asyncio.gather(tasks[leader], return_exceptions=True)
+    # Released on exit, so a follower takes over within one retry instead of waiting for the lease to expire
+    took_over_at = await wait_for(lambda: running and leader not in running, timeout=1)
+    assert took_over_at - stopped_at < TTL_MS / 1000
+    assert len(running) == 1
+    assert leases[leader].metrics.renewals > 0
+
+    for task in tasks.values():
+        task.cancel()
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
+    assert not running and not redis_client.store
+
+
+@pytest.mark.asyncio
+async def test_leader_that_dies_is_replaced_once_its_lease_expires():
+    redis_client = FakeRedis()
+    running, log = set(), []
+    # A crashed leader: holds the key and never renews or releases it
+    redis_client.store["ingest:leader"] = ("dead", time.monotonic() + TTL_MS / 1000)
+    lease = LeaderLease(redis_client, key="ingest:leader", ttl_ms=TTL_MS)
+    task = asyncio.create_task(lease.run(make_work("b", running, log)))
+
+    await asyncio.sleep(TTL_MS / 2000)
+    assert not running
+    await wait_for(lambda: running, timeout=TTL_MS * 2 / 1000)
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_leader_steps_down_when_the_lease_is_taken_or_cannot_be_renewed():
+    redis_client = FakeRedis()
+    running, log = set(), []
+    lease = LeaderLease(redis_client, key="ingest:leader", ttl_ms=TTL_MS)
+    task = asyncio.create_task(lease.run(make_work("a", running, log)))
+    await wait_for(lambda: running, timeout=1)
+
+    redis_client.store["ingest:leader"] = ("other", time.monotonic() + 10)
+    await wait_for(lambda: not running, timeout=1)
+    assert lease.metrics.losses == 1 and not lease.is_leader
+
+    del redis_client.store["ingest:leader"]
+    await wait_for(lambda: running, timeout=1)
+    redis_client.failing = True
+    renewed_at = time.monotonic()
+    stepped_down_at = await wait_for(lambda: not running, timeout=1)
+    # Before the last renewed lease can have expired
+    assert stepped_down_at - renewed_at < TTL_MS / 1000
+    assert lease.metrics.losses == 2 and log == ["a", "a"]
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,89 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.repository.local_cache import LocalCache
+from src.repository.redis import RedisClient
+
+
+def test_least_recently_used_entry_is_evicted():
+    local_cache = LocalCache(max_entries=2, ttl=60)
+    local_cache.set("a", b"1")
+    local_cache.set("b", b"2")
+    local_cache.get("a")
+    local_cache.set("c", b"3")
+
+    assert local_cache.get("b") is None
+    assert local_cache.get("a") == b"1"
+    assert local_cache.get("c") == b"3"
+    assert local_cache.metrics.evictions == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("src.repository.local_cache.time.monotonic", lambda: now)
+    local_cache = LocalCache(max_entries=10, ttl=5)
+    local_cache.set("a", b"1")
+    local_cache.set("b", b"2", ttl=1)
+
+    now += 2
+    assert local_cache.get("a") == b"1"
+    assert local_cache.get("b") is None
+
+    now += 4
+    assert local_cache.get("a") is None
+    assert local_cache.metrics.expirations == 2
+
+
+def test_invalidate_ticker_drops_every_key_scheme_of_the_ticker():
+    local_cache = LocalCache(max_entries=10, ttl=60)
+    for key in (
+        "market_data:latest:AAPL",
+        "market_data:AAPL:segment:0",
+        "market_data_daily:AAPL:-:-",
+        "market_data:latest:AAPLX",
+    ):
+        local_cache.set(key, b"{}")
+
+    assert local_cache.invalidate_ticker("AAPL") == 3
+    assert len(local_cache) == 1
+    assert local_cache.get("market_data:latest:AAPLX") == b"{}"
+
+
+def test_ticker_index_follows_evictions_and_deletes():
+    local_cache = LocalCache(max_entries=2, ttl=60)
+    local_cache.set("market_data:latest:AAPL", b"{}")
+    local_cache.set("market_data:AAPL:segment:0", b"[]")
+    local_cache.set("market_data:latest:MSFT", b"{}")
+    local_cache.delete("market_data:AAPL:segment:0")
+
+    assert local_cache.invalidate_ticker("AAPL") == 0
+    assert local_cache.invalidate_ticker("MSFT") == 1
+    assert len(local_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_text_writes_drop_the_local_copy():
+    redis_client = RedisClient(local_cache=LocalCache(max_entries=10, ttl=60))
+    redis_client.client = AsyncMock()
+    redis_client.local_cache.set("key", b"{}")
+
+    await redis_client.set("key", "text")
+
+    assert redis_client.local_cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_client_reads_through_the_local_cache():
+    redis_client = RedisClient(local_cache=LocalCache(max_entries=10, ttl=60))
+    redis_client.raw_client = AsyncMock()
+    redis_client.raw_client.mget = AsyncMock(
+        side_effect=lambda keys: [b"{}" if key == "hot" else None for key in keys]
+    )
+
+    assert await redis_client.mget_bytes(["hot", "cold"]) == [b"{}", None]
+    assert await redis_client.mget_bytes(["hot", "cold"]) == [b"{}", None]
+
+    assert redis_client.raw_client.mget.call_args_list[-1].args == (["cold"],)
+    assert redis_client.local_cache.metrics.hits == 1
+    assert redis_client.metrics.snapshot() == {"hits": 1, "misses": 2}
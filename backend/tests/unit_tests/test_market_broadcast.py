@@ -0,0 +1,59 @@
+import datetime
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.repository.market_broadcast import MarketBroadcaster, bar_channel, publish_market_bars
+
+
+def test_bars_are_fanned_out_to_subscribers_of_the_ticker():
+    broadcaster = MarketBroadcaster(redis_client=MagicMock(), queue_size=10)
+    aapl = broadcaster.subscribe(["AAPL"])
+    both = broadcaster.subscribe(["AAPL", "MSFT"])
+    msft = broadcaster.subscribe(["MSFT"])
+
+    broadcaster.dispatch(bar_channel("AAPL"), b'{"ticker":"AAPL"}')
+
+    assert aapl.queue.get_nowait() == b'{"ticker":"AAPL"}'
+    assert both.queue.get_nowait() == b'{"ticker":"AAPL"}'
+    assert msft.queue.empty()
+    assert broadcaster.metrics.delivered == 2
+
+
+def test_slow_subscriber_keeps_only_the_newest_messages():
+    broadcaster = MarketBroadcaster(redis_client=MagicMock(), queue_size=2)
+    subscription = broadcaster.subscribe(["AAPL"])
+
+    for i in range(5):
+        broadcaster.dispatch(bar_channel("AAPL"), str(i).encode())
+
+    assert [subscription.queue.get_nowait() for _ in range(2)] == [b"3", b"4"]
+    assert broadcaster.metrics.dropped == 3
+
+    broadcaster.unsubscribe(subscription)
+    broadcaster.dispatch(bar_channel("AAPL"), b"5")
+    assert subscription.queue.empty()
+    assert broadcaster.metrics.subscribers == 0
+
+
+@pytest.mark.asyncio
+async def test_publish_market_bars_sends_one_message_per_ticker():
+    redis_client = MagicMock(publish=AsyncMock(return_value=1))
+    timestamp = datetime.datetime(2024, 3, 20, 10, tzinfo=datetime.timezone.utc)
+
+    await publish_market_bars(redis_client, "AAPL", [("AAPL", timestamp, 150.0, 155.0, 148.0, 153.0, 1000000)])
+
+    channel, message = redis_client.publish.call_args.args
+    assert channel == "market_data:bars:AAPL"
+    assert json.loads(message) == {
+        "ticker": "AAPL",
+        "bars": [{
+            "timestamp": "2024-03-20T10:00:00+00:00",
+            "open_price": 150.0,
+            "high_price": 155.0,
+            "low_price": 148.0,
+            "close_price": 153.0,
+            "volume": 1000000
+        }]
+    }
@@ -0,0 +1,145 @@
+import datetime
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.config.manager import settings
+from src.models.db.market import MarketData
+from src.repository.market_cache import (
+    align_to_segment,
+    first_bar_key,
+    MarketDataRangeCache,
+    range_cache_key,
+    SEGMENT,
+    segment_key,
+)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.expiries = {}
+
+    async def get_bytes(self, key):
+        return self.store.get(key)
+
+    async def mget_bytes(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    async def set(self, key, value, expire=None):
+        self.store[key] = value
+        self.expiries[key] = expire
+
+    async def set_many(self, mapping, expire=None):
+        self.store.update(mapping)
+        self.expiries.update(dict.fromkeys(mapping, expire))
+
+
+def make_bar(timestamp):
+    return MarketData(
+        ticker="AAPL",
+        timestamp=timestamp,
+        open_price=150.0,
+        high_price=155.0,
+        low_price=148.0,
+        close_price=153.0,
+        volume=1000000,
+    )
+
+
+@pytest.fixture
+def bars():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [make_bar(now - datetime.timedelta(hours=i)) for i in range(0, 72, 6)]
+
+
+@pytest.fixture
+def market_repo(bars):
+    async def get_market_data(ticker, start_time=None, end_time=None, limit=100):
+        selected = [bar for bar in bars if start_time <= bar.timestamp <= end_time]
+        return selected if limit is None else selected[:limit]
+
+    return MagicMock(
+        get_market_data=AsyncMock(side_effect=get_market_data),
+        get_first_timestamp=AsyncMock(return_value=bars[-1].timestamp if bars else None),
+    )
+
+
+@pytest.mark.asyncio
+async def test_range_cache_fills_segments_once(market_repo, bars):
+    range_cache = MarketDataRangeCache(redis_client=FakeRedis(), market_repo=market_repo)
+
+    first = await range_cache.get_market_data("AAPL", limit=5)
+    second = await range_cache.get_market_data("AAPL", limit=5)
+
+    assert [row["timestamp"] for row in first] == [bar.timestamp.isoformat() for bar in bars[:5]]
+    assert second == first
+    assert market_repo.get_market_data.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_range_cache_serves_overlapping_ranges_from_segments(market_repo, bars):
+    redis_client = FakeRedis()
+    range_cache = MarketDataRangeCache(redis_client=redis_client, market_repo=market_repo)
+    await range_cache.get_market_data("AAPL", limit=len(bars))
+    calls = market_repo.get_market_data.call_count
+
+    narrow = await range_cache.get_market_data(
+        "AAPL", start_time=bars[4].timestamp, end_time=bars[1].timestamp, limit=100
+    )
+
+    assert [row["timestamp"] for row in narrow] == [bar.timestamp.isoformat() for bar in bars[1:5]]
+    assert market_repo.get_market_data.call_count == calls
+    assert json.loads(redis_client.store[segment_key("AAPL", align_to_segment(bars[0].timestamp))])
+
+
+@pytest.mark.asyncio
+async def test_range_cache_empty_range(market_repo):
+    range_cache = MarketDataRangeCache(redis_client=FakeRedis(), market_repo=market_repo)
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    assert await range_cache.get_market_data("AAPL", start_time=now, end_time=now - SEGMENT) == []
+    market_repo.get_market_data.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_range_cache_does_not_walk_past_the_first_bar(market_repo, bars):
+    redis_client = FakeRedis()
+    range_cache = MarketDataRangeCache(redis_client=redis_client, market_repo=market_repo)
+
+    rows = await range_cache.get_market_data("AAPL", limit=1000)
+
+    assert len(rows) == len(bars)
+    assert market_repo.get_market_data.call_count == 1
+    segment_keys = [key for key in redis_client.store if ":segment:" in key]
+    assert min(segment_keys) == segment_key("AAPL", align_to_segment(bars[-1].timestamp))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("bars", [[]])
+async def test_range_cache_remembers_tickers_without_bars_briefly(market_repo):
+    redis_client = FakeRedis()
+    range_cache = MarketDataRangeCache(redis_client=redis_client, market_repo=market_repo)
+
+    assert await range_cache.get_market_data("NOPE", limit=5) == []
+    assert await range_cache.get_market_data("NOPE", limit=5) == []
+
+    # One short-lived negative entry instead of a walk over empty segments
+    assert list(redis_client.store) == [first_bar_key("NOPE")]
+    assert redis_client.expiries[first_bar_key("NOPE")] == settings.MARKET_CACHE_EMPTY_TTL
+    market_repo.get_first_timestamp.assert_awaited_once()
+    market_repo.get_market_data.assert_not_called()
+
+
+def test_range_cache_key_is_bucket_aligned():
+    bucket = datetime.timedelta(hours=1)
+    start = datetime.datetime(2024, 3, 20, 10, 15, tzinfo=datetime.timezone.utc)
+
+    assert range_cache_key("daily", "AAPL", bucket, start, None) == range_cache_key(
+        "daily", "AAPL", bucket, start + datetime.timedelta(minutes=30), None
+    )
+    assert range_cache_key("daily", "AAPL", bucket, start, None) != range_cache_key(
+        "daily", "AAPL", bucket, start + datetime.timedelta(hours=1), None
+    )
+    assert range_cache_key("daily", "AAPL", bucket, None, None) == "daily:AAPL:-:-"
@@ -6,6 +6,8 @@ from sqlalchemy import text
 
 from src.models.db.market import MarketData
 from src.repository.crud.market import MarketDataCRUDRepository
+from src.repository.symbols import symbol_cache
+from src.repository.timescale import OHLCV_INTERVALS
 
 
 @pytest.fixture
@@ -19,6 +21,14 @@ def market_repo(mock_session):
     return MarketDataCRUDRepository(mock_session)
 
 
+@pytest.fixture(autouse=True)
+def known_symbols():
+    # The mocked session has no `symbols` table to resolve tickers from
+    symbol_cache.remember([("AAPL", 1), ("MSFT", 2)])
+    yield
+    symbol_cache.clear()
+
+
 @pytest.mark.asyncio
 async def test_create_market_data(market_repo, mock_session):
     market_data = MarketData(
@@ -66,6 +76,40 @@ async def test_get_market_data(market_repo, mock_session):
 
     assert result == mock_data
     mock_session.execute.assert_called_once()
+    stmt = mock_session.execute.call_args.args[0].compile()
+    assert stmt.params["symbol_id_1"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_ticker_is_not_queried(market_repo, mock_session):
+    mock_session.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[])))
+
+    assert await market_repo.get_market_data("NOPE") == []
+    assert await market_repo.get_ohlcv("NOPE", OHLCV_INTERVALS["1d"]) == []
+    assert await market_repo.get_latest_market_data("NOPE") is None
+    # One `symbols` lookup each, and none of `market_data`; unknown tickers are looked up again next time
+    assert mock_session.execute.call_count == 3
+    assert all("FROM symbols" in str(call.args[0]) for call in mock_session.execute.call_args_list)
+
+
+@pytest.mark.asyncio
+async def test_symbol_ids_are_cached_and_created_on_write(mock_session):
+    symbol_cache.clear()
+    mock_session.execute = AsyncMock(side_effect=[
+        MagicMock(all=MagicMock(return_value=[("TSLA", 7)])),
+        MagicMock(all=MagicMock(return_value=[("AAPL", 1)])),
+        MagicMock(rowcount=2),
+    ])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    market_bars = [(ticker, now, 150.0, 155.0, 148.0, 153.0, 1000) for ticker in ("AAPL", "TSLA")]
+
+    assert await MarketDataCRUDRepository(mock_session).insert_market_bars(market_bars) == 2
+
+    create, lookup, upsert = (call.args for call in mock_session.execute.call_args_list)
+    assert create[1] == {"tickers": ["AAPL", "TSLA"]}
+    assert upsert[0].compile().params["symbol_id_m1"] == 7
+    # A newly created id is only cached once its transaction has committed
+    assert symbol_cache.ids == {"AAPL": 1}
 
 
 @pytest.mark.asyncio
@@ -136,4 +180,88 @@ async def test_get_hourly_aggregates(market_repo, mock_session):
 
     assert len(result) == 1
     assert result[0]["open_price"] == 150.0
-    mock_session.execute.assert_called_once() 
\ No newline at end of file
+    mock_session.execute.assert_called_once() 
+
+@pytest.mark.asyncio
+async def test_aggregates_read_from_continuous_aggregates(market_repo, mock_session):
+    mock_session.execute = AsyncMock(return_value=MagicMock(fetchall=MagicMock(return_value=[])))
+
+    await market_repo.get_daily_aggregates("AAPL")
+    await market_repo.get_hourly_aggregates("AAPL")
+
+    daily_stmt = str(mock_session.execute.call_args_list[0].args[0])
+    hourly_stmt = str(mock_session.execute.call_args_list[1].args[0])
+    assert "FROM market_data_daily" in daily_stmt
+    assert "FROM market_data_hourly" in hourly_stmt
+
+
+@pytest.mark.asyncio
+async def test_copy_market_bars(market_repo, mock_session):
+    market_bars = [("AAPL", datetime.datetime.now(datetime.timezone.utc), 150.0, 155.0, 148.0, 153.0, 1000000)]
+    driver_connection = MagicMock(copy_records_to_table=AsyncMock(return_value="COPY 1"))
+    connection = MagicMock(get_raw_connection=AsyncMock(return_value=MagicMock(driver_connection=driver_connection)))
+    mock_session.connection = AsyncMock(return_value=connection)
+    mock_session.execute = AsyncMock(return_value=MagicMock(rowcount=1))
+    mock_session.commit = AsyncMock()
+
+    result = await market_repo.copy_market_bars(market_bars)
+
+    assert result == 1
+    driver_connection.copy_records_to_table.assert_called_once()
+    assert driver_connection.copy_records_to_table.call_args.args[0] == "market_data_staging"
+    assert driver_connection.copy_records_to_table.call_args.kwargs["records"] == market_bars
+    assert "INSERT INTO symbols" in str(mock_session.execute.call_args_list[1].args[0])
+    assert "ON CONFLICT (symbol_id, timestamp)" in str(mock_session.execute.call_args.args[0])
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_insert_market_bars_batches(market_repo, mock_session):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    market_bars = [("AAPL", now + datetime.timedelta(hours=i), 150.0, 155.0, 148.0, 153.0, i) for i in range(5)]
+    market_bars.append(market_bars[-1])
+    mock_session.execute = AsyncMock(side_effect=lambda stmt: MagicMock(rowcount=len(stmt.compile().params) // 7))
+    mock_session.commit = AsyncMock()
+
+    result = await market_repo.insert_market_bars(market_bars, batch_size=2)
+
+    assert result == 5
+    assert mock_session.execute.call_count == 3
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_latest_timestamps(market_repo, mock_session):
+    latest = datetime.datetime.now(datetime.timezone.utc)
+    mock_session.execute = AsyncMock(
+        return_value=MagicMock(fetchall=MagicMock(return_value=[MagicMock(ticker="AAPL", timestamp=latest)]))
+    )
+
+    result = await market_repo.get_latest_timestamps(["AAPL", "MSFT"])
+
+    assert result == {"AAPL": latest}
+    assert mock_session.execute.call_args.args[1] == {"tickers": ["AAPL", "MSFT"]}
+
+
+@pytest.mark.parametrize(
+    ("interval", "source"),
+    [
+        ("1m", "FROM market_data\n"),
+        ("15m", "FROM market_data\n"),
+        ("1h", "FROM market_data_hourly"),
+        ("4h", "FROM market_data_hourly"),
+        ("1d", "FROM market_data_daily"),
+        ("1w", "FROM market_data_daily"),
+        ("1mo", "FROM market_data_daily"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_ohlcv_reads_from_finest_dividing_rollup(market_repo, mock_session, interval, source):
+    mock_session.execute = AsyncMock(return_value=MagicMock(fetchall=MagicMock(return_value=[])))
+
+    await market_repo.get_ohlcv("AAPL", OHLCV_INTERVALS[interval])
+
+    stmt = str(mock_session.execute.call_args.args[0])
+    assert source in stmt
+    # Only intervals no rollup materializes as-is are bucketed at query time
+    assert ("GROUP BY" in stmt) == (interval not in ("1h", "1d"))
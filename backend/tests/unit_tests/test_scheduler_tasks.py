@@ -0,0 +1,58 @@
+import asyncio
+import datetime
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.scheduler import tasks
+
+
+@pytest.fixture
+def mock_session_factory():
+    session = AsyncMock()
+    session_context = MagicMock(
+        __aenter__=AsyncMock(return_value=session),
+        __aexit__=AsyncMock(return_value=False),
+    )
+    return MagicMock(return_value=session_context)
+
+
+def test_process_market_data():
+    data = [{"t": 1710928800000, "o": 150.0, "h": 155.0, "l": 148.0, "c": 153.0, "v": 1000000.0}]
+
+    result = tasks.process_market_data(data, "AAPL")
+
+    assert result == [(
+        "AAPL",
+        datetime.datetime(2024, 3, 20, 10, 0, tzinfo=datetime.timezone.utc),
+        150.0,
+        155.0,
+        148.0,
+        153.0,
+        1000000,
+    )]
+    assert isinstance(result[0][6], int)
+
+
+@pytest.mark.asyncio
+async def test_update_market_data_fans_out_within_concurrency_limit(monkeypatch, mock_session_factory):
+    in_flight = 0
+    peak_in_flight = 0
+
+    async def fake_fetch_aggregates(**kwargs):
+        nonlocal in_flight, peak_in_flight
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return []
+
+    monkeypatch.setattr(tasks, "fetch_aggregates", fake_fetch_aggregates)
+    monkeypatch.setattr(tasks.settings, "INGEST_CONCURRENCY", 2)
+    monkeypatch.setattr(tasks.MarketDataCRUDRepository, "get_latest_timestamps", AsyncMock(return_value={}))
+    monkeypatch.setattr(tasks.MarketDataCRUDRepository, "copy_market_bars", AsyncMock(return_value=0))
+    monkeypatch.setattr(tasks.redis_client, "exists", AsyncMock(return_value=False))
+
+    await tasks.update_market_data(mock_session_factory)
+
+    assert peak_in_flight == 2
+    assert tasks.MarketDataCRUDRepository.copy_market_bars.call_count == 5
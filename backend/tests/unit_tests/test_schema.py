@@ -0,0 +1,26 @@
+import pytest
+from alembic.script import ScriptDirectory
+from unittest.mock import AsyncMock
+
+from src.repository.schema import MIGRATIONS_DIRECTORY, get_head_revision, verify_schema_version
+from src.utilities.exceptions.database import SchemaOutdated
+
+
+def test_migrations_form_a_single_line_of_history():
+    script_directory = ScriptDirectory(str(MIGRATIONS_DIRECTORY))
+
+    assert len(script_directory.get_heads()) == 1
+    assert len(script_directory.get_bases()) == 1
+
+
+@pytest.mark.asyncio
+async def test_startup_accepts_only_the_latest_revision():
+    connection = AsyncMock()
+
+    connection.run_sync = AsyncMock(return_value=get_head_revision())
+    assert await verify_schema_version(connection) == get_head_revision()
+
+    for outdated in (None, "0123456789ab"):
+        connection.run_sync = AsyncMock(return_value=outdated)
+        with pytest.raises(SchemaOutdated):
+            await verify_schema_version(connection)
@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+
+from src.repository.single_flight import SingleFlight
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def acquire_lock(self, key, token, expire_ms):
+        if key in self.store:
+            return False
+        self.store[key] = token
+        return True
+
+    async def release_lock(self, key, token):
+        if self.store.get(key) == token:
+            del self.store[key]
+            return True
+        return False
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_in_one_worker_run_one_load():
+    single_flight = SingleFlight(redis_client=FakeRedis(), poll_interval_ms=1)
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return ["bar"]
+
+    async def read_cached():
+        return None
+
+    results = await asyncio.gather(*(single_flight.do("AAPL", load, read_cached) for _ in range(10)))
+
+    assert results == [["bar"]] * 10
+    assert loads == 1
+    assert single_flight.metrics.leaders == 1
+    assert single_flight.metrics.collapsed_local == 9
+
+
+@pytest.mark.asyncio
+async def test_other_worker_waits_for_the_lock_holder_cache():
+    redis_client = FakeRedis()
+    cache = {}
+    leader = SingleFlight(redis_client=redis_client, poll_interval_ms=1)
+    follower = SingleFlight(redis_client=redis_client, poll_interval_ms=1)
+    follower_loads = 0
+
+    async def leader_load():
+        await asyncio.sleep(0.02)
+        cache["AAPL"] = ["bar"]
+        return ["bar"]
+
+    async def follower_load():
+        nonlocal follower_loads
+        follower_loads += 1
+        return ["bar"]
+
+    async def read_cached():
+        return cache.get("AAPL")
+
+    leader_task = asyncio.create_task(leader.do("AAPL", leader_load, read_cached))
+    await asyncio.sleep(0.005)
+    follower_result = await follower.do("AAPL", follower_load, read_cached)
+
+    assert await leader_task == ["bar"]
+    assert follower_result == ["bar"]
+    assert follower_loads == 0
+    assert follower.metrics.collapsed_remote == 1
+    assert redis_client.store == {}
+
+
+@pytest.mark.asyncio
+async def test_leader_failure_reaches_local_followers_and_releases_the_lock():
+    redis_client = FakeRedis()
+    single_flight = SingleFlight(redis_client=redis_client, poll_interval_ms=1)
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    async def read_cached():
+        return None
+
+    results = await asyncio.gather(
+        *(single_flight.do("AAPL", load, read_cached) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert redis_client.store == {}
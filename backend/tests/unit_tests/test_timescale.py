@@ -0,0 +1,52 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.repository.timescale import apply_market_data_storage_policies
+
+
+def mock_connection(scalar):
+    connection = AsyncMock()
+    connection.execute = AsyncMock(return_value=MagicMock(scalar=MagicMock(return_value=scalar)))
+    return connection
+
+
+def executed_sql(connection):
+    return [" ".join(str(call.args[0]).split()) for call in connection.execute.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_storage_policies_are_replaced():
+    connection = mock_connection(scalar=False)
+
+    await apply_market_data_storage_policies(connection, compress_after="7 days", drop_after="2 years")
+
+    statements = executed_sql(connection)
+    assert statements.index(
+        "SELECT remove_compression_policy('market_data', if_exists => TRUE)"
+    ) < statements.index("SELECT add_compression_policy('market_data', compress_after => INTERVAL '7 days')")
+    assert any("timescaledb.compress_segmentby = 'symbol_id'" in statement for statement in statements)
+    assert statements[-2:] == [
+        "SELECT remove_retention_policy('market_data', if_exists => TRUE)",
+        "SELECT add_retention_policy('market_data', drop_after => INTERVAL '2 years')",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_empty_intervals_only_remove_policies():
+    connection = mock_connection(scalar=False)
+
+    await apply_market_data_storage_policies(connection, compress_after="", drop_after=None)
+
+    assert executed_sql(connection) == [
+        "SELECT remove_compression_policy('market_data', if_exists => TRUE)",
+        "SELECT remove_retention_policy('market_data', if_exists => TRUE)",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_retention_within_the_aggregate_refresh_window_is_rejected():
+    connection = mock_connection(scalar=True)
+
+    with pytest.raises(ValueError):
+        await apply_market_data_storage_policies(connection, compress_after="7 days", drop_after="1 day")
+    assert not any("policy" in statement for statement in executed_sql(connection))